@@ -0,0 +1,236 @@
+import itertools
+from collections import namedtuple
+from datetime import timedelta
+
+from sqlalchemy import Date, Integer, cast, extract, func, literal, select
+
+try:
+    import numpy as np
+except ImportError:  # only the occupancy analytics need NumPy
+    np = None
+
+from archive import reservation_history
+from availability import generate_slots, to_minutes
+from schedule import DEFAULT_SCHEDULE
+
+
+BATCH_SIZE = 50_000
+"""
+int: Reservation rows fetched and converted to arrays per batch.
+"""
+
+
+OccupancyReport = namedtuple(
+    "OccupancyReport",
+    ["start", "slots", "occupancy", "utilization", "slot_utilization", "peak_slots", "full_days"],
+)
+"""
+namedtuple: Capacity figures for a date range, see `occupancy_report`.
+"""
+
+
+def reservation_columns_query(dialect_name, start, end):
+    """
+    Build the query of each reservation's day offset, start minute and duration in a date range.
+
+    The database computes the integers, with date and time functions of
+    its own: SQLite keeps dates and times as text, while PostgreSQL
+    subtracts dates into days and extracts the hour and minute of a time.
+
+    Args:
+        dialect_name (str): "sqlite" or "postgresql".
+        start (datetime.date): The first date of the range.
+        end (datetime.date): The last date of the range, inclusive.
+
+    Returns:
+        sqlalchemy.sql.Select: The query, reading archived reservations too.
+    """
+    history = reservation_history()
+    if dialect_name == "sqlite":
+        day = cast(func.julianday(history.c.date) - func.julianday(literal(start)), Integer)
+        minute = (cast(func.substr(history.c.time, 1, 2), Integer) * 60
+                  + cast(func.substr(history.c.time, 4, 2), Integer))
+    else:
+        day = history.c.date - literal(start, Date)
+        minute = (cast(extract("hour", history.c.time), Integer) * 60
+                  + cast(extract("minute", history.c.time), Integer))
+    return select(
+        day, minute, func.coalesce(func.nullif(history.c.duration, 0), 1)
+    ).where(history.c.date.between(start, end))
+
+
+def reservation_columns(db_session, start, end, batch_size=BATCH_SIZE):
+    """
+    Stream the reservations of a date range as batches of NumPy columns.
+
+    Archived reservations are read too, through `archive.reservation_history`.
+    The database computes each row's day offset, start minute and duration,
+    see `reservation_columns_query`, so the rows arrive as plain integers and
+    are never turned into `datetime` objects. A missing duration counts as
+    1 hour, as in `covered_slot_range`.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+        start (datetime.date): The first date of the range.
+        end (datetime.date): The last date of the range, inclusive.
+        batch_size (int): The number of rows per batch.
+
+    Yields:
+        tuple: `(days, starts, durations)` integer arrays: days since `start`,
+            minutes since midnight and hours.
+    """
+    query = reservation_columns_query(db_session.get_bind().dialect.name, start, end)
+
+    # a Core result: ORM row processing would cost as much as the query
+    result = db_session.connection().execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        columns = np.fromiter(
+            itertools.chain.from_iterable(rows), dtype=np.int64, count=3 * len(rows)
+        ).reshape(-1, 3)
+        yield columns[:, 0], columns[:, 1], columns[:, 2]
+
+
+def slot_bitmap(starts, durations, slot_starts):
+    """
+    Mark the slots each reservation covers.
+
+    A slot is covered when its start falls within
+    `[reservation start, reservation start + duration)`. The comparison is
+    broadcast over a `(reservations, 1)` column and a `(slots,)` row, so the
+    whole batch is handled in two vectorized comparisons.
+
+    Args:
+        starts (numpy.ndarray): Reservation starts in minutes since midnight.
+        durations (numpy.ndarray): Reservation lengths in hours.
+        slot_starts (numpy.ndarray): Slot starts in minutes since midnight.
+
+    Returns:
+        numpy.ndarray: A `(reservations, slots)` boolean array.
+    """
+    ends = starts + durations * 60
+    return (starts[:, None] <= slot_starts) & (slot_starts < ends[:, None])
+
+
+def occupancy_matrix(batches, day_count, slots):
+    """
+    Count the reservations overlapping every slot of every day.
+
+    Each batch is turned into a slot bitmap, and the covered cells are
+    counted into the matrix with one `bincount` over their flat
+    `(day, slot)` index.
+
+    Args:
+        batches (iterable): `(days, starts, durations)` arrays, as yielded by
+            `reservation_columns`.
+        day_count (int): The number of days in the range.
+        slots (list): The slot start times, the columns of the matrix.
+
+    Returns:
+        numpy.ndarray: A `(days, slots)` integer array of booked tables.
+    """
+    slot_starts = np.array([to_minutes(slot_time) for slot_time in slots], dtype=np.int64)
+    cell_count = day_count * len(slot_starts)
+    counts = np.zeros(cell_count, dtype=np.int64)
+    for days, starts, durations in batches:
+        covered = slot_bitmap(starts, durations, slot_starts)
+        cells = days[:, None] * len(slot_starts) + np.arange(len(slot_starts))
+        counts += np.bincount(cells[covered], minlength=cell_count)
+    return counts.reshape(day_count, len(slot_starts))
+
+
+def _day_slots(day_schedule, interval):
+    """
+    Return a day's slots, regenerated from its hours at another interval.
+    """
+    if interval == day_schedule.interval:
+        return day_schedule.slots
+    return tuple(generate_slots(interval, day_schedule.opening_time, day_schedule.closing_time))
+
+
+def occupancy_report(db_session, start, end, schedule=None, interval=None,
+                     peaks=3, batch_size=BATCH_SIZE):
+    """
+    Summarize table occupancy over a date range for capacity planning.
+
+    Each day's slots and capacity follow its hours and tables in the
+    schedule, as in `get_available_slots`. The matrix has a column for every
+    slot open on any day of the range; cells of slots a day is closed in
+    stay 0 and do not count towards utilization.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+        start (datetime.date): The first date of the range.
+        end (datetime.date): The last date of the range, inclusive.
+        schedule (schedule.Schedule, optional): The opening hours and
+            capacity. Defaults to `schedule.DEFAULT_SCHEDULE`.
+        interval (int, optional): The duration of each time slot in minutes.
+            Defaults to the schedule's.
+        peaks (int): The number of peak slots to report.
+        batch_size (int): The number of rows fetched per batch.
+
+    Returns:
+        OccupancyReport: With
+            - `start`: the first date, the row 0 of `occupancy`.
+            - `slots`: the slot start times, the columns of `occupancy`.
+            - `occupancy`: the `(days, slots)` matrix of booked tables.
+            - `utilization`: the share of all open table slots booked, from 0 to 1.
+            - `slot_utilization`: slot start times mapped to their share
+              of booked tables over the range.
+            - `peak_slots`: the `peaks` busiest `(slot_time, utilization)`
+              pairs, busiest first.
+            - `full_days`: the open dates on which no slot had a free table.
+
+    Raises:
+        RuntimeError: If NumPy is not installed.
+    """
+    if np is None:
+        raise RuntimeError("Occupancy analytics require NumPy: pip install numpy")
+
+    schedule = schedule or DEFAULT_SCHEDULE
+    interval = interval or schedule.interval
+    day_count = (end - start).days + 1
+    day_schedules = [schedule.for_day(start + timedelta(days=offset)) for offset in range(day_count)]
+
+    # a day's open slots depend only on its hours, shared by most days
+    hours = {}
+    for day_schedule in day_schedules:
+        key = (day_schedule.opening_time, day_schedule.closing_time)
+        if key not in hours:
+            hours[key] = _day_slots(day_schedule, interval)
+    slots = sorted({slot_time for day_slots in hours.values() for slot_time in day_slots})
+    columns = {slot_time: index for index, slot_time in enumerate(slots)}
+    open_rows = {
+        key: np.isin(np.arange(len(slots)), [columns[slot_time] for slot_time in day_slots])
+        for key, day_slots in hours.items()
+    }
+    open_cells = np.array(
+        [open_rows[(day.opening_time, day.closing_time)] for day in day_schedules], dtype=bool
+    ).reshape(day_count, len(slots))
+    capacity = np.where(
+        open_cells, np.array([day.tables for day in day_schedules])[:, None], 0
+    )
+
+    occupancy = occupancy_matrix(
+        reservation_columns(db_session, start, end, batch_size), day_count, slots
+    )
+    occupancy[~open_cells] = 0
+
+    booked = np.minimum(occupancy, capacity)
+    slot_capacity = capacity.sum(axis=0)
+    per_slot = np.divide(
+        booked.sum(axis=0), slot_capacity, out=np.zeros(len(slots)), where=slot_capacity > 0
+    )
+    busiest = np.argsort(-per_slot, kind="stable")[:peaks]
+    full_days = np.flatnonzero(
+        open_cells.any(axis=1) & ((occupancy >= capacity) | ~open_cells).all(axis=1)
+    )
+
+    return OccupancyReport(
+        start=start,
+        slots=slots,
+        occupancy=occupancy,
+        utilization=float(booked.sum() / capacity.sum()) if capacity.sum() else 0.0,
+        slot_utilization={slot_time: float(share) for slot_time, share in zip(slots, per_slot)},
+        peak_slots=[(slots[index], float(per_slot[index])) for index in busiest],
+        full_days=[start + timedelta(days=int(index)) for index in full_days],
+    )
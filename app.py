@@ -1,28 +1,346 @@
 from flask import (
+    Blueprint,
     Flask,
+    Response,
+    current_app,
     render_template,
+    send_from_directory,
+    url_for,
     json,
     jsonify,
     request,
 )
 
 from forms import ReservationForm
+from validation import validate_reservation
 from models import Reservation
-from database import SessionLocal
-from datetime import datetime, timedelta, time
+import database
+from config import Config
+from database import ReadSessionLocal, SessionLocal
+from logging_config import configure_logging
+from cache import AvailabilityCache, PageCache, SQLiteCacheBackend
+from events import HEARTBEAT, LocalBroker, SQLiteBroker, format_event
+from menu import MenuCache
+from images import (
+    MANIFEST_FILENAME,
+    VARIANTS_DIRNAME,
+    build_variants,
+    load_manifest as load_image_manifest,
+    page_image_weight,
+)
+import assets
+import metrics
+from analytics import occupancy_report
+from archive import CHUNK_SIZE as ARCHIVE_CHUNK_SIZE, archive_reservations, enable_incremental_vacuum
+from bulk import CHUNK_SIZE, import_reservations, read_records
+from export import EXPORT_FORMATS, MAX_PAGE_SIZE, PAGE_SIZE, export_reservations, list_reservations
+from seating import assign_table
+from markupsafe import Markup, escape
+from availability import compute_available_slots
+from schedule import ScheduleCache
+from occupancy import (
+    check_occupancy,
+    load_occupancy,
+    load_occupancy_range,
+    rebuild_occupancy,
+    reserve_slots,
+    reservation_intervals,
+)
+from datetime import datetime, timedelta, time, timezone
 from sqlalchemy import func
+import hmac
+import mimetypes
 import os
+import queue
+import time as timer
 import logging
+import click
+
+
+bp = Blueprint("main", __name__, cli_group=None)
+
+# Longest span the range availability API computes in one request
+MAX_RANGE_DAYS = 92
+
+
+def create_app(config=None):
+    """
+    Create and configure the Flask application.
+
+    Settings are loaded from `config.Config`, which reads the environment,
+    and then overridden by `config`. Nothing touches the database, log
+    handlers or cache until this is called, so importing the module has no
+    side effects. `flask run` finds this factory automatically.
+
+    Args:
+        config (dict, optional): Settings overriding the defaults, e.g.
+            `{"SQLALCHEMY_DATABASE_URI": "sqlite://"}` for an in-memory
+            database.
+
+    Returns:
+        flask.Flask: The configured application.
+    """
+    app = Flask(__name__, instance_relative_config=True)
+    app.config.from_object(Config)
+    if config:
+        app.config.from_mapping(config)
+
+    # Configure logging; debug output and SQL statements are off unless requested
+    configure_logging(app, level=app.config["LOG_LEVEL"], sql_echo=app.config["SQL_ECHO"])
+
+    # Configure the database engines and request-scoped sessions
+    database.init_app(app)
+
+    # Measure request latency, SQL statements and template rendering for /metrics
+    metrics.init_app(app)
+
+    # Configure the availability cache; set the shared path when running several workers
+    shared_path = app.config["AVAILABILITY_CACHE_SHARED_PATH"]
+    app.extensions["availability_cache"] = AvailabilityCache(
+        maxsize=app.config["AVAILABILITY_CACHE_SIZE"],
+        ttl=app.config["AVAILABILITY_CACHE_TTL"],
+        backend=SQLiteCacheBackend(shared_path) if shared_path else None,
+    )
+
+    # Publish availability updates to the event streams; set the shared path when running several workers
+    events_path = app.config["AVAILABILITY_EVENTS_PATH"]
+    app.extensions["availability_broker"] = (
+        SQLiteBroker(events_path, poll_interval=app.config["AVAILABILITY_EVENTS_POLL_INTERVAL"])
+        if events_path else LocalBroker()
+    )
+
+    # Load the menu once; it is reloaded only when the file changes
+    app.extensions["menu"] = MenuCache(
+        app.config["MENU_PATH"], check_interval=app.config["MENU_CHECK_INTERVAL"]
+    )
+
+    # Compile the opening hours and capacity once; recompiled when the file changes
+    app.extensions["schedule"] = ScheduleCache(
+        app.config["SCHEDULE_PATH"], check_interval=app.config["SCHEDULE_CHECK_INTERVAL"]
+    )
+
+    # Load the responsive image variants built by `flask build-images`
+    app.extensions["image_variants"] = {}
+    if app.config["RESPONSIVE_IMAGES"]:
+        app.extensions["image_variants"] = load_image_manifest(
+            os.path.join(app.static_folder, "images", VARIANTS_DIRNAME, MANIFEST_FILENAME)
+        )
+
+    # Serve static files under the fingerprinted names built by `flask build-assets`
+    app.extensions["asset_manifest"] = {"assets": {}, "encodings": {}, "fingerprinted": frozenset()}
+    if app.config["STATIC_FINGERPRINTS"]:
+        app.extensions["asset_manifest"] = assets.load_manifest(
+            os.path.join(app.static_folder, assets.DIST_DIRNAME, assets.MANIFEST_FILENAME)
+        )
+    app.url_defaults(fingerprint_static_url)
+    app.view_functions["static"] = send_static_asset
+
+    # Cache the rendered static pages
+    app.extensions["page_cache"] = PageCache()
+    app.extensions["templates_last_modified"] = templates_last_modified(app)
+
+    app.register_blueprint(bp)
+    return app
 
 
-app = Flask(__name__, instance_relative_config=True)
+def get_availability_cache():
+    """
+    Return the current app's availability cache.
+
+    Returns:
+        cache.AvailabilityCache: The cache created by `create_app`.
+    """
+    return current_app.extensions["availability_cache"]
+
+
+def get_schedule():
+    """
+    Return the current app's compiled schedule.
+
+    Returns:
+        schedule.Schedule: The opening hours and capacity, reloaded by the
+            app's schedule cache when the schedule file changes.
+    """
+    return current_app.extensions["schedule"].get()
 
-app.config["SECRET_KEY"] = "my_secret_key"  # for CSRF protection
-# Configure the SQLite database
+
+def fingerprint_static_url(endpoint, values):
+    """
+    Resolve `url_for("static", filename=...)` through the asset manifest.
+
+    Registered as a URL defaults function, so templates keep using logical
+    names such as "styles.css" and get the fingerprinted file when the
+    assets were built, or the original file otherwise.
+
+    Args:
+        endpoint (str): The endpoint a URL is built for.
+        values (dict): The URL values, updated in place.
+    """
+    if endpoint == "static" and "filename" in values:
+        filename = values["filename"].lstrip("/")
+        values["filename"] = current_app.extensions["asset_manifest"]["assets"].get(filename, filename)
+
+
+def send_static_asset(filename):
+    """
+    Serve a static file, with long-lived caching and precompression for fingerprinted assets.
+
+    Fingerprinted files never change, so they are marked immutable for a
+    year. When the client accepts it, the prebuilt `.br` or `.gz` sibling is
+    sent with a matching Content-Encoding instead of compressing the file on
+    every request. Only the files the manifest lists count as fingerprinted;
+    the rest of `dist/`, such as the manifest itself, keeps its name across
+    builds and is served with `no-cache`, so clients revalidate it. Other
+    static files are served as usual.
+
+    Args:
+        filename (str): The path of the file in the static folder.
+
+    Returns:
+        flask.Response: The file.
+    """
+    manifest = current_app.extensions["asset_manifest"]
+    if not filename.startswith(assets.DIST_DIRNAME + "/"):
+        return current_app.send_static_file(filename)
+    if filename not in manifest["fingerprinted"]:
+        response = current_app.send_static_file(filename)
+        response.cache_control.no_cache = True
+        return response
+
+    encodings = manifest["encodings"]
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    encoding = next(
+        (encoding for encoding in encodings.get(filename, ()) if request.accept_encodings[encoding]),
+        None,
+    )
+    suffix = {"br": ".br", "gzip": ".gz"}.get(encoding, "")
+    response = send_from_directory(
+        current_app.static_folder, filename + suffix, mimetype=mimetype, max_age=31536000  # one year
+    )
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.immutable = True
+    return response
+
+
+def templates_last_modified(app):
+    """
+    Return when the newest file in the app's template folder was modified.
+
+    Args:
+        app (flask.Flask): The application.
+
+    Returns:
+        datetime.datetime: The newest modification time, in UTC.
+    """
+    folder = os.path.join(app.root_path, app.template_folder)
+    newest = max(
+        os.stat(os.path.join(root, name)).st_mtime
+        for root, _, names in os.walk(folder)
+        for name in names
+    )
+    return datetime.fromtimestamp(newest, tz=timezone.utc)
+
+
+def render_cached_page(template, version=None, last_modified=None, **context):
+    """
+    Render a page that only changes with its templates, serving it from the page cache.
+
+    The page is cached per endpoint and content version, made of the
+    templates' modification time and `version`. Responses carry a strong
+    ETag and Last-Modified, and conditional requests matching them get a
+    304 without a body. Templates are only reloaded by Jinja when
+    auto-reload is on, so only then are they checked for changes on each
+    request.
+
+    Args:
+        template (str): The template to render.
+        version (hashable, optional): The version of any other content the
+            page is rendered from, such as the menu file.
+        last_modified (datetime.datetime, optional): When that content last changed.
+        **context: Variables passed to the template.
+
+    Returns:
+        flask.Response: The page, or an empty 304 response.
+    """
+    if current_app.jinja_env.auto_reload:
+        templates_modified = templates_last_modified(current_app)
+    else:
+        templates_modified = current_app.extensions["templates_last_modified"]
+    version = (templates_modified, version)
+    last_modified = max(templates_modified, last_modified or templates_modified)
+
+    page_cache = current_app.extensions["page_cache"]
+    key = (request.script_root, request.endpoint)
+    page = page_cache.get(key, version)
+    if page is None:
+        body = render_template(template, **context).encode()
+        page = page_cache.set(key, version, body, last_modified)
+
+    response = current_app.response_class(page.body, mimetype="text/html")
+    response.set_etag(page.etag)
+    response.last_modified = page.last_modified
+    response.cache_control.no_cache = True  # browsers revalidate instead of guessing
+    return response.make_conditional(request)
+
+
+@bp.app_template_global()
+def responsive_image(filename, alt, width, **attrs):
+    """
+    Render an image with responsive AVIF, WebP and JPEG variants.
+
+    Emits a `<picture>` whose sources list the variants of `filename` from
+    the manifest built by `flask build-images`, so browsers download the
+    smallest file in the best format they support for the display width.
+    Images without variants are rendered as a plain `<img>`.
+
+    Args:
+        filename (str): The image path in the static folder, e.g. "images/pie.jpg".
+        alt (str): The alternative text.
+        width (int): The CSS width the image is displayed at, in pixels.
+        **attrs: Extra `<img>` attributes, e.g. `class_` or `loading`.
+
+    Returns:
+        markupsafe.Markup: The image HTML.
+    """
+    attributes = {"src": url_for("static", filename=filename), "alt": alt, "width": width}
+    attributes.update((name.rstrip("_"), value) for name, value in attrs.items())
+    entry = current_app.extensions["image_variants"].get(filename)
+    if entry is None:
+        return Markup("<img %s>") % _html_attributes(attributes)
+
+    def srcset(image_format):
+        return ", ".join(
+            f"{url_for('static', filename=path)} {variant_width}w"
+            for variant_width, path, _ in entry["variants"][image_format]
+        )
+
+    sizes = f"(max-width: {width}px) 100vw, {width}px"
+    fallback = "jpeg" if "jpeg" in entry["variants"] else "png"
+    attributes.update(
+        height=round(entry["height"] * width / entry["width"]),
+        srcset=srcset(fallback),
+        sizes=sizes,
+    )
+    sources = "".join(
+        Markup('<source type="image/%s" srcset="%s" sizes="%s">') % (image_format, srcset(image_format), sizes)
+        for image_format in entry["variants"]
+        if image_format not in ("jpeg", "png")
+    )
+    return Markup("<picture>%s<img %s></picture>") % (Markup(sources), _html_attributes(attributes))
+
+
+def _html_attributes(attributes):
+    """
+    Render a dict as escaped HTML attributes.
+    """
+    return Markup(" ".join(f'{name}="{escape(value)}"' for name, value in attributes.items()))
 
 
 # route for the home page
-@app.route("/")
+@bp.route("/")
 def home():
     """
     Render the home page.
@@ -30,49 +348,44 @@ def home():
     Returns:
         Rendered HTML template for the home page.
     """
-    return render_template("index.html")
+    return render_cached_page("index.html")
 
 
 # route for menu page
-@app.route("/menu")
+@bp.route("/menu")
 def menu():
     """
-    Render the menu page with categorized food and drink items.
+    Render the menu page with the menu items grouped by category.
 
     Returns:
-        Rendered HTML template for the menu page with food and drink items passed as context.
+        Rendered HTML template for the menu page with the categorized menu passed as context.
     """
-    food_items, drink_items = load_menu()
-    return render_template("menu.html", food_items=food_items, drink_items=drink_items)
+    snapshot = load_menu()
+    return render_cached_page(
+        "menu.html",
+        version=snapshot.version,
+        last_modified=snapshot.last_modified,
+        menu=snapshot.menu,
+    )
 
 
-# helper function to load data
 def load_menu():
     """
-    Load and categorize menu items from a JSON file.
+    Return the categorized menu from the app's menu cache.
+
+    The menu file is parsed once at startup and again only after it changes,
+    see `menu.MenuCache`.
 
     Returns:
-        tuple: A tuple containing two lists:
-            - food_items (list): Items categorized as food.
-            - drink_items (list): Items categorized as drinks.
+        menu.MenuSnapshot: The menu, mapping category names (e.g. "Food",
+            "Drinks") to tuples of items in the order they appear in the menu
+            file, with the version and modification time of the file.
     """
-    current_directory = os.path.dirname(os.path.abspath(__file__))
-    json_path = os.path.join(current_directory, "menu.json")
-    with open(json_path, "r") as file:
-        menu_data = json.load(file)
-
-    # access items key
-    items = menu_data["items"]
-
-    # categorise items
-    food_items = [item for item in items if item["category"] == "Food"]
-    drink_items = [item for item in items if item["category"] == "Drinks"]
-
-    return food_items, drink_items
+    return current_app.extensions["menu"].snapshot()
 
 
 # route for about us page
-@app.route("/about_us")
+@bp.route("/about_us")
 def about_us():
     """
     Render the About Us page.
@@ -80,84 +393,152 @@ def about_us():
     Returns:
         Rendered HTML template for the About Us page.
     """
-    return render_template("about_us.html")
+    return render_cached_page("about_us.html")
 
 #route to get available timeslots from db
-def get_available_slots(date, tables=6, interval=30):
+def get_available_slots(date, tables=None, interval=None):
     """
     Calculate the available time slots for reservations on a given date.
 
-    This function generates time slots for the restaurant's operating hours 
-    and adjusts their availability based on existing reservations. Each slot 
-    represents a specific time interval (e.g., 30 minutes), and the number of 
-    available tables per slot is updated based on overlapping reservations.
+    The date's opening hours, slot interval and number of tables come from
+    the schedule, compiled once into a template of every slot and its
+    tables. Availability starts from a copy of that template and subtracts
+    the overlapping reservations of each slot. Closed days have no slots.
+
+    Availability for the schedule's interval is read from the materialized
+    `slot_occupancy` table, one row per booked slot. Other intervals are
+    recomputed from the day's `time` and `duration` columns with a single
+    sweep, so the cost grows with that day's reservations rather than the
+    whole table.
+
+    Results are cached per `(date, tables, interval, schedule version)` in the
+    app's availability cache until they expire or a booking for that date
+    invalidates them, so a schedule change applies on the next lookup. A
+    result computed while a booking for the date was being committed is
+    returned but not cached.
 
     Args:
         date (datetime): The specific date to check availability for reservations.
-        tables (int): The total number of tables available in the restaurant. Default is 6.
-        interval (int): The duration of each time slot in minutes (e.g., 30 minutes). Default is 30.
+        tables (int, optional): The number of tables per slot. Defaults to the date's capacity in the schedule.
+        interval (int, optional): The duration of each time slot in minutes. Defaults to the schedule's.
 
     Returns:
         dict: A dictionary where keys are time slots (as `datetime.time` objects) 
               and values are the number of available tables for each slot.
     """
-    print(f"looking for date {date}")
-    # Example: Querying reservations for a specific date and time
-    
-    db_session = SessionLocal()
+    current_app.logger.debug("Looking up available slots for %s", date)
+    day = date.date() if isinstance(date, datetime) else date
+    schedule = get_schedule()
+    interval = interval or schedule.interval
+
+    cache = get_availability_cache()
+    cache_key = (day, tables, interval, schedule.version)
+    # read before the query, so a booking committed meanwhile keeps this result out of the cache
+    generation = cache.generation(day)
+    cached = cache.get(cache_key, generation)
+    if cached is not None:
+        return dict(cached)
+
+    db_session = ReadSessionLocal()  # read-only pool
+    slots = compute_day_slots(db_session, day, schedule.for_day(day), tables, interval)
+
+    current_app.logger.debug("Computed slots for %s: %s", day, slots)
+    cache.set(cache_key, slots, generation)
+    return dict(slots)
+
+
+def compute_day_slots(db_session, day, day_schedule, tables=None, interval=None):
+    """
+    Compute the free tables of every available slot of a date, without caching.
+
+    Shared by `get_available_slots` and the async endpoints in `asgi.py`,
+    which call it through `AsyncSession.run_sync`.
 
-    reservations = db_session.query(Reservation)
-    reservations = reservations.filter(Reservation.date == date.date())
-    reservations = reservations.all()
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to read with.
+        day (datetime.date): The date.
+        day_schedule (schedule.DaySchedule): The date's hours and capacity.
+        tables (int, optional): The number of tables per slot. Defaults to the day's.
+        interval (int, optional): The slot length in minutes. Defaults to the day's.
+
+    Returns:
+        dict: Slot start times mapped to the number of available tables.
+              Fully booked slots are omitted.
+    """
+    if interval in (None, day_schedule.interval):
+        occupancy = load_occupancy(db_session, day) if day_schedule.slots else {}
+        return {
+            slot_time: count
+            for slot_time, count in day_schedule.available_tables(occupancy, tables).items()
+            if count > 0
+        }
+
+    intervals = reservation_intervals(db_session, day)
+    return compute_available_slots(
+        intervals,
+        tables=day_schedule.tables if tables is None else tables,
+        interval=interval,
+        opening_time=day_schedule.opening_time,
+        closing_time=day_schedule.closing_time,
+    )
+
+
+def available_slots_payload(slots, time_str=None):
+    """
+    Build the JSON body of `/get_available_slots/<date_str>`.
 
+    Args:
+        slots (dict): Slot start times mapped to the number of available tables.
+        time_str (str, optional): A time in "HH:MM" format to report alone.
 
-    print(f"Reservations on {date}: {[r.id for r in reservations]}")
-    for reservation in db_session.query(Reservation).all():
-        print(f"Reservation Date in DB: {reservation.date},(type: {type(reservation.date)})")
-        print(f"Input Date: {date} (type: {type(date)})")
+    Returns:
+        dict: `{time_str: count}` if `time_str` is given, else `{"slots": [...]}`.
 
+    Raises:
+        ValueError: If `time_str` is not a valid time.
+    """
+    if time_str:
+        # Filter for specific time if provided
+        specific_time = datetime.strptime(time_str, "%H:%M").time()
+        return {time_str: slots.get(specific_time, 0)}
+    return {"slots": [key.strftime("%H:%M") for key, value in slots.items()]}
 
-    for reservation in reservations:
-        print(f"Reservation ID: {reservation.id}, Time: {reservation.time}, Duration: {reservation.duration}")
+def availability_update(day, day_schedule, slots):
+    """
+    Build the payload of an availability event stream update.
 
-    # Generate time slots
-    opening_time = datetime.strptime("17:00", "%H:%M").time()  # 5:00 PM
-    closing_time = datetime.strptime("23:00", "%H:%M").time()  # 11:00 PM
-    current_time = datetime.combine(date, opening_time)
-    end_time = datetime.combine(date, closing_time)
-    slots = {}
+    Args:
+        day (datetime.date): The date.
+        day_schedule (schedule.DaySchedule): The date's hours.
+        slots (dict): Slot start times mapped to the number of available tables.
 
-    while current_time < end_time:
-        slot_time = current_time.time()
-        slots[slot_time] = tables  # Initially, all tables are available
-        current_time += timedelta(minutes=interval)
+    Returns:
+        dict: `{"date": "YYYY-MM-DD", "slots": {"HH:MM": <available_tables>, ...}}`,
+              with every slot of the day, fully booked ones at 0.
+    """
+    return {
+        "date": day.isoformat(),
+        "slots": {slot_time.strftime("%H:%M"): slots.get(slot_time, 0) for slot_time in day_schedule.slots},
+    }
 
-    # Adjust availability based on reservations
-    for reservation in reservations:
-        reserved_time = reservation.time.replace(microsecond=0, second=0)  # Normalize time
-        reserved_duration = reservation.duration or 1  # Default to 1 hour if no duration is specified
-        reserved_end_time = (datetime.combine(date.date(), reserved_time) +
-                             timedelta(hours=reserved_duration)).time()
 
-        print(f"Reservation blocks from {reserved_time} to {reserved_end_time}")
+def publish_availability(day):
+    """
+    Push a date's new availability to the event streams following it.
 
-        for slot_time in list(slots.keys()):  # Use list to safely modify dict
-            # Check if the slot falls within the reservation period
-            if reserved_time <= slot_time < reserved_end_time:
-                if slots[slot_time] > 0:
-                    print(f"Decrementing slot {slot_time} for reservation at {reserved_time}")
-                    slots[slot_time] -= 1
-                else:
-                    print(f"No available tables left for slot {slot_time}")
+    Call after invalidating the date's cached availability, so the update
+    is computed from the committed bookings. Nothing is computed while no
+    stream follows the date.
 
-    
-    # remove fully booked slots
-    slots = {slot: count for slot, count in slots.items() if count > 0}
-    print(f"Final computed slots: {slots}")
-    return slots
+    Args:
+        day (datetime.date): The date whose bookings changed.
+    """
+    broker = current_app.extensions["availability_broker"]
+    if broker.has_listeners(day):
+        broker.publish(day, availability_update(day, get_schedule().for_day(day), get_available_slots(day)))
 
 #route to get available timeslots API
-@app.route("/get_available_slots/<date_str>", methods=["GET"])
+@bp.route("/get_available_slots/<date_str>", methods=["GET"])
 def get_available_slots_api(date_str):
     """
     API endpoint to fetch available reservation slots for a specific date.
@@ -196,24 +577,144 @@ def get_available_slots_api(date_str):
     time_str = request.args.get("time") # Optional timeslot filter
     date = datetime.strptime(date_str, "%Y-%m-%d")
     slots = get_available_slots(date) 
-    
+    current_app.logger.debug("Slots fetched: %s", slots)
 
-    if time_str:
-        # Filter for specific time if provided
-        specific_time = datetime.strptime(time_str, "%H:%M").time()
-        count = slots.get(specific_time, 0)
-        print(f"Specific time: {specific_time}, Count: {count}")
-        return jsonify({time_str: count})
-    else:
-        print("Slots fetched successfully!") # Debug print
-        app.logger.info(f"Slots fetched: {slots}")
-        slots_serializable = [key.strftime("%H:%M") for key, value in slots.items()]
+    return jsonify(available_slots_payload(slots, time_str))
+
+#route to stream availability updates of a date
+@bp.route("/availability/<date_str>/events", methods=["GET"])
+def availability_events(date_str):
+    """
+    Stream the availability of a date as Server-Sent Events.
 
+    The first event carries the date's current counts, and another follows
+    every booking for the date, from any worker sharing
+    `AVAILABILITY_EVENTS_PATH`, so a booking page stays current over one
+    connection instead of polling `/get_available_slots/<date_str>`. Idle
+    streams get a keepalive comment every `AVAILABILITY_EVENTS_HEARTBEAT`
+    seconds. The browser's `EventSource` reconnects by itself, and the
+    first event after reconnecting brings it up to date.
 
-        return jsonify({"slots": slots_serializable})
+    Each stream holds a worker thread for as long as it is open; serve the
+    app with threaded workers, or through `asgi.py`, which streams on its
+    event loop.
+
+    Args:
+        date_str (str): A date string in the format "YYYY-MM-DD".
+
+    Returns:
+        A `text/event-stream` response of `availability` events:
+            event: availability
+            data: {"date": "<date>", "slots": {"<time_slot>": <available_tables>, ...}}
+
+        or a 400 JSON error for an invalid date.
+
+    Example Usage:
+        new EventSource("/availability/2024-12-05/events")
+    """
+    try:
+        day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "The date must be in YYYY-MM-DD format."}), 400
+
+    # subscribe before reading the counts, so no booking falls in between
+    updates = queue.SimpleQueue()
+    unsubscribe = current_app.extensions["availability_broker"].subscribe(day, updates.put)
+    try:
+        first = availability_update(day, get_schedule().for_day(day), get_available_slots(day))
+    except Exception:
+        unsubscribe()
+        raise
+    heartbeat = current_app.config["AVAILABILITY_EVENTS_HEARTBEAT"]
+
+    def stream():
+        yield format_event(first, retry=3000)
+        while True:
+            try:
+                yield format_event(updates.get(timeout=heartbeat))
+            except queue.Empty:
+                yield HEARTBEAT
+
+    response = Response(stream(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let a proxy buffer the stream
+    response.call_on_close(unsubscribe)
+    return response
+
+#route to get available timeslots for a range of dates API
+@bp.route("/get_available_slots", methods=["GET"])
+def get_available_slots_range_api():
+    """
+    API endpoint to fetch available table counts for every day in a date range.
+
+    Occupancy for the whole range is loaded with one query, and each day's
+    slots come from its hours in the schedule, as in `get_available_slots`.
+    The slot labels are listed once and each day carries one count per
+    slot, in the same order, so a month of availability fits in a single
+    response. Slots outside a day's opening hours count 0.
+
+    Query Parameters:
+        from (str): The first date in "YYYY-MM-DD" format.
+        to (str): The last date in "YYYY-MM-DD" format, inclusive. At most
+                  `MAX_RANGE_DAYS` days after `from`.
+
+    Returns:
+        json:
+            On success:
+                {
+                    "from": "<first_date>",
+                    "to": "<last_date>",
+                    "slots": ["<time_slot_1>", "<time_slot_2>", ...],
+                    "days": {
+                        "<date>": [<available_tables_slot_1>, <available_tables_slot_2>, ...],
+                        ...
+                    }
+                }
+            On an invalid range (status 400):
+                {
+                    "error": "<reason>"
+                }
+
+    Example Usage:
+        GET /get_available_slots?from=2024-12-01&to=2024-12-31 -> Returns availability for December 2024.
+    """
+    try:
+        start = datetime.strptime(request.args.get("from", ""), "%Y-%m-%d").date()
+        end = datetime.strptime(request.args.get("to", ""), "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "'from' and 'to' must be dates in YYYY-MM-DD format."}), 400
+
+    if end < start or (end - start).days >= MAX_RANGE_DAYS:
+        return jsonify({"error": f"The range must span 1 to {MAX_RANGE_DAYS} days."}), 400
+
+    db_session = ReadSessionLocal()  # read-only pool
+    occupancy = load_occupancy_range(db_session, start, end)
+
+    schedule = get_schedule()
+    day_schedules = {}
+    day = start
+    while day <= end:
+        day_schedules[day] = schedule.for_day(day)
+        day += timedelta(days=1)
+
+    # every slot open on some day of the range; days closed in a slot report 0
+    slot_times = sorted({slot_time for day_schedule in day_schedules.values() for slot_time in day_schedule.slots})
+    days = {}
+    for day, day_schedule in day_schedules.items():
+        available = day_schedule.available_tables(occupancy.get(day, {}))
+        days[day.isoformat()] = [available.get(slot_time, 0) for slot_time in slot_times]
+
+    return jsonify(
+        {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "slots": [slot_time.strftime("%H:%M") for slot_time in slot_times],
+            "days": days,
+        }
+    )
 
 # route for reservations
-@app.route("/reservations", methods=["GET", "POST"])
+@bp.route("/reservations", methods=["GET", "POST"])
 def reservations():
     """
     Handle the reservations page, supporting both GET and POST requests.
@@ -232,6 +733,7 @@ def reservations():
         - `num_people`: Number of people for the reservation (integer).
         - `date`: Date of the reservation (date).
         - `time`: Time slot for the reservation (select field with available times).
+        - `duration`: Length of the reservation in hours (1 to 3, default 1).
 
     Returns:
         - On GET: Rendered HTML template (`reservations.html`) containing the reservation form.
@@ -245,6 +747,15 @@ def reservations():
             "is_valid": True
         }
 
+    Example POST Fully Booked Response:
+        {
+            "message": "Sorry, that time is no longer available. Please choose another time.",
+            "errors": {
+                "time": "This time slot is fully booked."
+            },
+            "is_valid": False
+        }
+
     Example POST Failure Response:
         {
             "message": "Invalid form data. Please correct and try again.",
@@ -257,8 +768,14 @@ def reservations():
     Notes:
         - The time slot options are dynamically updated based on the availability 
           retrieved via the `get_available_slots` function.
-        - Uses Flask-WTF for form validation.
-        - Commits valid reservations to the `reservations` database table.
+        - Uses Flask-WTF for the CSRF check and `validation.validate_reservation`,
+          shared with `/reservations/json`, for the fields.
+        - Commits valid reservations to the `reservations` database table and
+          claims their slots in `slot_occupancy` in the same transaction. A
+          booking is rejected if any slot it covers is already at capacity.
+        - Each booking is seated at the smallest table with enough seats that
+          is free for its whole duration (`seating.assign_table`), and is
+          rejected if there is none.
     """
     global cached_slots
     # Create form object
@@ -266,54 +783,20 @@ def reservations():
 
     # Log type of request
     if request.method == "POST":
-        print("POST request received")
-        # handle GET request
-        # return render_template("reservations.html", form=form)
-
-        print("POST request received")
+        current_app.logger.debug("POST request received")
 
         # handle form submission
         if not form.validate_on_submit():  # POST request with invalid form data
-            # Collect error messages for invalid fields
-            error_messages = {
-                field_name: error_list[0] 
-                for field_name, error_list in form.errors.items()
-            }
-            return jsonify(
-                {
-                    "message": "Invalid form data. Please correct and try again.",
-                    "errors": error_messages,
-                    "is_valid": False
-                }
-            )
+            return jsonify(form_errors_payload(form))
 
-        selected_time = datetime.strptime(form.time.data, "%H:%M").time()
-        # If form is valid open a database session
-        db_session = SessionLocal()
-
-        # Create and save reservation
-        reservation = Reservation(
-            name=form.name.data,
-            email=form.email.data,
-            num_people=form.num_people.data,
-            date=form.date.data,
-            time=selected_time,
-        )
-        db_session.add(reservation)
-        db_session.commit()
-        db_session.close()  # close session after committing
-
-        # Send success message as JSON
-        return jsonify(
-            {
-                "message": f"{form.name.data} your reservation for {form.num_people.data} people on {form.date.data} at {form.time.data} has been "
-                f"successfully added. If any issues arise, we will contact you at {form.email.data}.",
-                "is_valid": True,
-            }
-        )
+        payload = book_reservation(SessionLocal(), form.values, get_schedule())
+        if payload["is_valid"]:
+            get_availability_cache().invalidate(form.values["date"])  # drop stale availability
+            publish_availability(form.values["date"])
+        return jsonify(payload)
 
     # Handle GET request or form validation failure
-    print("GET request received")
+    current_app.logger.debug("GET request received")
 
     # Dynamically populate time choices if a date is selected
     if form.date.data:  # If a date is selected, fetch available slots
@@ -327,8 +810,399 @@ def reservations():
     return render_template("reservations.html", form=form)
 
 
+def form_errors_payload(form):
+    """
+    Build the JSON body answering an invalid reservation form.
+
+    Args:
+        form (ReservationForm): The validated form.
+
+    Returns:
+        dict: The first error message of each invalid field.
+    """
+    # Collect error messages for invalid fields
+    error_messages = {
+        field_name: error_list[0] 
+        for field_name, error_list in form.errors.items()
+    }
+    return {
+        "message": "Invalid form data. Please correct and try again.",
+        "errors": error_messages,
+        "is_valid": False
+    }
+
+
+def book_reservation(db_session, values, schedule):
+    """
+    Save a validated reservation, claiming its slots and a table.
+
+    Everything happens in one transaction, committed on success and rolled
+    back otherwise, and the session is closed either way. Shared by the
+    `/reservations` and `/reservations/json` views and the async endpoint
+    in `asgi.py`, which calls it through `AsyncSession.run_sync`; the caller
+    invalidates cached availability after a successful booking.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to write with.
+        values (dict): The parsed fields from `validation.validate_reservation`.
+        schedule (schedule.Schedule): The opening hours and capacity.
+
+    Returns:
+        dict: The JSON body of the response, with `is_valid` telling whether
+              the reservation was booked.
+    """
+    # Create and save reservation
+    reservation = Reservation(**values)
+    db_session.add(reservation)
+
+    # Recheck capacity and claim the slots in the same transaction
+    if not reserve_slots(db_session, reservation, schedule=schedule):
+        db_session.rollback()
+        db_session.close()
+        return {
+            "message": "Sorry, that time is no longer available. Please choose another time.",
+            "errors": {"time": "This time slot is fully booked."},
+            "is_valid": False,
+        }
+
+    # Seat the party at the smallest table that is free for the whole booking
+    if not assign_table(db_session, reservation, schedule=schedule):
+        db_session.rollback()
+        db_session.close()
+        return {
+            "message": f"Sorry, no table for {values['num_people']} people is free at that time. Please choose another time.",
+            "errors": {"time": "No table for this party size is free at this time."},
+            "is_valid": False,
+        }
+
+    db_session.commit()
+    db_session.close()  # close session after committing
+
+    # Send success message as JSON
+    return {
+        "message": f"{values['name']} your reservation for {values['num_people']} people on {values['date']} "
+        f"at {values['time']:%H:%M} has been successfully added. If any issues arise, we will contact you "
+        f"at {values['email']}.",
+        "is_valid": True,
+    }
+
+
+# route for JSON bookings
+@bp.route("/reservations/json", methods=["POST"])
+def reservations_json():
+    """
+    Book one reservation from a JSON body, for kiosks and partner clients.
+
+    The fields and rules are those of the reservation form, checked by
+    `validation.validate_reservation` straight from the decoded JSON,
+    without building a form or checking a CSRF token. When
+    `BOOKING_API_TOKEN` is configured, requests must send it as
+    `Authorization: Bearer <token>`.
+
+    Example Request Body:
+        {"name": "Dale Cooper", "email": "cooper@example.com", "num_people": 2,
+         "date": "2024-12-05", "time": "19:00", "duration": 2}
+
+    Returns:
+        JSON response with the same body as a `POST /reservations`, with
+        status 201 when booked, 400 for a malformed body or invalid fields,
+        401 for a missing or wrong token, or 409 when the time is no longer
+        available.
+    """
+    token = current_app.config["BOOKING_API_TOKEN"]
+    if token and not has_bearer_token(token):
+        return jsonify({"error": "A valid API token is required."}), 401
+
+    record = request.get_json(silent=True)
+    if not isinstance(record, dict):
+        return jsonify({"error": "Expected a JSON object with reservation fields."}), 400
+
+    values, errors = validate_reservation(record)
+    if errors:
+        return jsonify({
+            "message": "Invalid reservation data. Please correct and try again.",
+            "errors": errors,
+            "is_valid": False,
+        }), 400
+
+    payload = book_reservation(SessionLocal(), values, get_schedule())
+    if not payload["is_valid"]:
+        return jsonify(payload), 409
+    get_availability_cache().invalidate(values["date"])
+    publish_availability(values["date"])
+    return jsonify(payload), 201
+
+
+# route for bulk reservation ingestion
+@bp.route("/reservations/bulk", methods=["POST"])
+def reservations_bulk():
+    """
+    Book a list of reservations in one request.
+
+    Accepts a JSON array of reservations with the same fields as the
+    reservation form (`name`, `email`, `num_people`, `date` as YYYY-MM-DD and
+    `time` as HH:MM). Every record is validated with the form's rules and
+    capacity is checked for the batch as a whole; see
+    `bulk.import_reservations`. When `BULK_API_TOKEN` is configured, requests
+    must send it as `Authorization: Bearer <token>`.
+
+    Example Request Body:
+        [
+            {"name": "Dale Cooper", "email": "cooper@example.com", "num_people": 2,
+             "date": "2024-12-05", "time": "19:00"},
+            {"name": "Harry Truman", "email": "not-an-email", "num_people": 4,
+             "date": "2024-12-05", "time": "19:00"}
+        ]
+
+    Example Response:
+        {
+            "accepted": 1,
+            "rejected": 1,
+            "results": [
+                {"index": 0, "accepted": true, "date": "2024-12-05"},
+                {"index": 1, "accepted": false, "errors": {"email": "email is invalid"}}
+            ]
+        }
+
+    Returns:
+        JSON response with per-record results, 400 for a malformed body,
+        401 for a missing or wrong token, or 413 for more than
+        `BULK_MAX_RECORDS` records.
+    """
+    token = current_app.config["BULK_API_TOKEN"]
+    if token and not has_bearer_token(token):
+        return jsonify({"error": "A valid API token is required."}), 401
+
+    records = request.get_json(silent=True)
+    if not isinstance(records, list):
+        return jsonify({"error": "Expected a JSON array of reservations."}), 400
+    if len(records) > current_app.config["BULK_MAX_RECORDS"]:
+        return jsonify({
+            "error": f"At most {current_app.config['BULK_MAX_RECORDS']} reservations per request."
+        }), 413
+
+    db_session = SessionLocal()
+    try:
+        results = import_reservations(db_session, records, schedule=get_schedule())
+    except Exception:
+        db_session.rollback()
+        raise
+
+    invalidate_booked_dates(results)
+
+    accepted = sum(result["accepted"] for result in results)
+    return jsonify({"accepted": accepted, "rejected": len(results) - accepted, "results": results})
+
+
+def has_bearer_token(token):
+    """
+    Check that the request sends `token` as `Authorization: Bearer <token>`.
+    """
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+def invalidate_booked_dates(results):
+    """
+    Drop cached availability for every date that received a booking in a bulk
+    import, and push the new counts to the event streams following them.
+
+    Args:
+        results (list): The per-record results of `bulk.import_reservations`.
+    """
+    availability_cache = get_availability_cache()
+    for day in {result["date"] for result in results if result["accepted"]}:
+        day = datetime.strptime(day, "%Y-%m-%d").date()
+        availability_cache.invalidate(day)
+        publish_availability(day)
+
+
+def admin_request_error():
+    """
+    Reject admin API requests without the `ADMIN_API_TOKEN` bearer token.
+
+    Returns:
+        tuple: A JSON error response and status, or None when the request may proceed.
+    """
+    token = current_app.config["ADMIN_API_TOKEN"]
+    if not token:
+        return jsonify({"error": "The admin API is disabled; set ADMIN_API_TOKEN."}), 403
+    if not has_bearer_token(token):
+        return jsonify({"error": "A valid API token is required."}), 401
+    return None
+
+
+def parse_date_range():
+    """
+    Read the optional `from` and `to` dates of an admin request.
+
+    Returns:
+        tuple: `(start, end)` dates, each None when not given.
+
+    Raises:
+        ValueError: If a date is not in YYYY-MM-DD format.
+    """
+    start, end = request.args.get("from"), request.args.get("to")
+    return (
+        datetime.strptime(start, "%Y-%m-%d").date() if start else None,
+        datetime.strptime(end, "%Y-%m-%d").date() if end else None,
+    )
+
+
+# route for the admin reservation listing
+@bp.route("/admin/reservations", methods=["GET"])
+def admin_reservations():
+    """
+    List reservations in `(date, time, id)` order, one page at a time.
+
+    Archived reservations are listed with the live ones. Pages are read
+    with keyset pagination: each response carries a `next` cursor, and
+    passing it back as `after` continues right after the last reservation
+    returned, at the same cost for every page. Requires the
+    `ADMIN_API_TOKEN` as `Authorization: Bearer <token>`.
+
+    Query Parameters:
+        from (str, optional): The first date, YYYY-MM-DD.
+        to (str, optional): The last date, YYYY-MM-DD, inclusive.
+        limit (int, optional): Reservations per page, at most `MAX_PAGE_SIZE`.
+            Defaults to `PAGE_SIZE`.
+        after (str, optional): The `next` cursor of the previous page.
+
+    Returns:
+        json:
+            {
+                "reservations": [{"id": 1, "name": "...", "date": "2024-12-05", "time": "19:00", ...}, ...],
+                "next": "<cursor>"
+            }
+
+        `next` is null on the last page. 400 for an invalid date, limit or
+        cursor, 401 or 403 without a valid token.
+
+    Example Usage:
+        GET /admin/reservations?from=2024-12-01&limit=50
+        GET /admin/reservations?from=2024-12-01&limit=50&after=MjAyNC0xMi0wNSwxOTowMDowMCw0Mg
+    """
+    error = admin_request_error()
+    if error:
+        return error
+
+    try:
+        start, end = parse_date_range()
+    except ValueError:
+        return jsonify({"error": "'from' and 'to' must be dates in YYYY-MM-DD format."}), 400
+    limit = request.args.get("limit", PAGE_SIZE, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"'limit' must be between 1 and {MAX_PAGE_SIZE}."}), 400
+
+    try:
+        reservations, next_cursor = list_reservations(
+            ReadSessionLocal(), limit, start, end, after=request.args.get("after")
+        )
+    except ValueError:
+        return jsonify({"error": "Invalid 'after' cursor."}), 400
+    return jsonify({"reservations": reservations, "next": next_cursor})
+
+
+# route for the admin reservation export
+@bp.route("/admin/reservations/export", methods=["GET"])
+def admin_reservations_export():
+    """
+    Download reservations as CSV or JSON Lines, archived ones included.
+
+    The export is streamed from a server-side cursor in batches, so it
+    starts at once and uses the same memory for any number of rows; see
+    `export.export_reservations`. Requires the `ADMIN_API_TOKEN` as
+    `Authorization: Bearer <token>`.
+
+    Query Parameters:
+        format (str, optional): "csv" (default) or "jsonl".
+        from (str, optional): The first date, YYYY-MM-DD.
+        to (str, optional): The last date, YYYY-MM-DD, inclusive.
+
+    Returns:
+        A `reservations.csv` or `reservations.jsonl` attachment in
+        `(date, time, id)` order, with the columns of the admin listing.
+        400 for an invalid format or date, 401 or 403 without a valid token.
+
+    Example Usage:
+        GET /admin/reservations/export?format=jsonl&from=2024-01-01&to=2024-12-31
+    """
+    error = admin_request_error()
+    if error:
+        return error
+
+    file_format = request.args.get("format", "csv")
+    if file_format not in EXPORT_FORMATS:
+        return jsonify({"error": "'format' must be csv or jsonl."}), 400
+    try:
+        start, end = parse_date_range()
+    except ValueError:
+        return jsonify({"error": "'from' and 'to' must be dates in YYYY-MM-DD format."}), 400
+
+    rows = export_reservations(
+        current_app.extensions["database"]["read_engine"], file_format, start, end
+    )
+    response = Response(rows, mimetype=EXPORT_FORMATS[file_format])
+    response.headers["Content-Disposition"] = f"attachment; filename=reservations.{file_format}"
+    response.headers["X-Accel-Buffering"] = "no"  # don't let a proxy buffer the export
+    return response
+
+
+# route for Prometheus metrics
+@bp.route("/metrics")
+def metrics_page():
+    """
+    Serve the request and database metrics in the Prometheus text format.
+
+    Reports, per route, the request latency histogram, request counts by
+    status, the number of SQL statements per request and the time spent in
+    SQL and in template rendering, plus the latency of every SQL statement
+    and the number of slow ones. Empty when `METRICS_ENABLED` is off.
+
+    Requires the `ADMIN_API_TOKEN` as `Authorization: Bearer <token>`,
+    unless `METRICS_PUBLIC` is on.
+
+    Returns:
+        The metrics as `text/plain; version=0.0.4`, or 401 or 403 without a
+        valid token.
+    """
+    error = None if current_app.config["METRICS_PUBLIC"] else admin_request_error()
+    if error:
+        return error
+
+    return Response(
+        current_app.extensions["metrics"].render(), mimetype="text/plain; version=0.0.4"
+    )
+
+
+# route for the most recent slow queries
+@bp.route("/metrics/slow_queries")
+def slow_queries():
+    """
+    List the most recent SQL statements slower than `SLOW_QUERY_THRESHOLD`.
+
+    The statements reveal the schema and may contain literal values, so this
+    always requires the `ADMIN_API_TOKEN` as `Authorization: Bearer <token>`.
+
+    Returns:
+        json:
+            {
+                "threshold": <seconds>,
+                "queries": [{"statement": "<sql>", "seconds": <duration>, "route": "<route>"}, ...]
+            }
+
+        Oldest first; `route` is null for statements outside a request.
+        401 or 403 without a valid token.
+    """
+    error = admin_request_error()
+    if error:
+        return error
+
+    collected = current_app.extensions["metrics"]
+    return jsonify({"threshold": collected.slow_query_threshold, "queries": list(collected.slow_queries)})
+
+
 # route for contacts
-@app.route("/contact")
+@bp.route("/contact")
 def contact():
     """
     Render the contact page.
@@ -336,7 +1210,186 @@ def contact():
     Returns:
         Rendered HTML template for the contact page.
     """
-    return render_template("contact.html")
+    return render_cached_page("contact.html")
+
+
+# command to generate the responsive image variants
+@bp.cli.command("build-images")
+def build_images_command():
+    """
+    Generate the responsive image variants and their manifest.
+    """
+    try:
+        manifest = build_variants(current_app.static_folder)
+    except RuntimeError as error:
+        raise click.ClickException(str(error))
+
+    original = sum(entry["bytes"] for entry in manifest.values())
+    click.echo(f"Built variants for {len(manifest)} images ({original / 1e6:.1f} MB of originals).")
+
+
+@bp.cli.command("image-report")
+@click.option("--density", default=2.0, help="Device pixel ratio of the simulated phone.")
+def image_report_command(density):
+    """
+    Report the image bytes saved per page by the responsive variants.
+    """
+    client = current_app.test_client()
+    click.echo(f"{'page':<15} {'original KB':>12} {'optimized KB':>13} {'saved':>7}")
+    for path in ("/", "/menu", "/reservations", "/about_us", "/contact"):
+        html = client.get(path).get_data(as_text=True)
+        original, optimized = page_image_weight(
+            html, current_app.static_folder, current_app.static_url_path, density
+        )
+        saved = 1 - optimized / original if original else 0
+        click.echo(f"{path:<15} {original / 1024:>12.0f} {optimized / 1024:>13.0f} {saved:>7.0%}")
+
+
+@bp.cli.command("build-assets")
+def build_assets_command():
+    """
+    Fingerprint and precompress the static files.
+    """
+    manifest = assets.build_assets(current_app.static_folder, current_app.static_url_path)
+    compressed = sum(1 for encodings in manifest["encodings"].values() if encodings)
+    click.echo(f"Fingerprinted {len(manifest['assets'])} files, precompressed {compressed}.")
+
+
+@bp.cli.command("import-reservations")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]),
+              help="The file format. Defaults to the file extension.")
+@click.option("--chunk-size", default=CHUNK_SIZE, show_default=True,
+              help="Records per transaction.")
+@click.option("--report", "report_path", type=click.Path(dir_okay=False),
+              help="Write the result of every record to this JSON Lines file.")
+def import_reservations_command(path, file_format, chunk_size, report_path):
+    """
+    Import reservations from a CSV or JSON Lines file.
+
+    Records are validated with the reservation form rules and capacity is
+    checked per slot; rejected records are listed with their errors.
+    """
+    started = timer.perf_counter()
+    with SessionLocal() as db_session:
+        results = import_reservations(
+            db_session, read_records(path, file_format), schedule=get_schedule(), chunk_size=chunk_size
+        )
+    elapsed = timer.perf_counter() - started
+    invalidate_booked_dates(results)
+
+    rejected = [result for result in results if not result["accepted"]]
+    if report_path:
+        with open(report_path, "w") as file:
+            for result in results:
+                file.write(json.dumps(result) + "\n")
+    else:
+        for result in rejected:
+            click.echo(f"record {result['index']}: {json.dumps(result['errors'])}")
+    click.echo(
+        f"Imported {len(results) - len(rejected)} of {len(results)} reservations "
+        f"in {elapsed:.1f}s, {len(rejected)} rejected."
+    )
+
+
+@bp.cli.command("occupancy-report")
+@click.option("--start", type=click.DateTime(["%Y-%m-%d"]), required=True,
+              help="The first date, YYYY-MM-DD.")
+@click.option("--end", type=click.DateTime(["%Y-%m-%d"]), required=True,
+              help="The last date, YYYY-MM-DD, inclusive.")
+@click.option("--interval", type=int,
+              help="Slot length in minutes. Defaults to the schedule's.")
+def occupancy_report_command(start, end, interval):
+    """
+    Report table utilization, peak slots and fully booked days over a date range.
+
+    Requires NumPy.
+    """
+    try:
+        with ReadSessionLocal() as db_session:
+            report = occupancy_report(
+                db_session, start.date(), end.date(), schedule=get_schedule(), interval=interval
+            )
+    except RuntimeError as error:
+        raise click.ClickException(str(error))
+
+    click.echo(f"Utilization: {report.utilization:.1%} of table slots booked.")
+    click.echo("Peak slots: " + ", ".join(
+        f"{slot_time:%H:%M} ({share:.0%})" for slot_time, share in report.peak_slots
+    ))
+    click.echo(f"Fully booked days: {len(report.full_days)}")
+    for day in report.full_days:
+        click.echo(f"  {day}")
+
+
+# command to backfill the materialized occupancy table
+@bp.cli.command("rebuild-occupancy")
+def rebuild_occupancy_command():
+    """
+    Rebuild the `slot_occupancy` table from existing reservations.
+
+    Usage:
+        flask rebuild-occupancy
+    """
+    with SessionLocal() as db_session:
+        count = rebuild_occupancy(db_session, schedule=get_schedule())
+        db_session.commit()
+    click.echo(f"Rebuilt {count} slot occupancy rows.")
+
+
+# command to archive past reservations
+@bp.cli.command("archive-reservations")
+@click.option("--days", type=int,
+              help="Archive reservations older than this many days. Defaults to ARCHIVE_AFTER_DAYS.")
+@click.option("--chunk-size", default=ARCHIVE_CHUNK_SIZE, show_default=True,
+              help="Reservations moved per transaction.")
+@click.option("--no-vacuum", is_flag=True, help="Keep the freed pages in the file.")
+@click.option("--enable-incremental-vacuum", "convert", is_flag=True,
+              help="First switch a database created without incremental auto-vacuum to it, "
+                   "with a one-off full VACUUM that blocks the app while it runs.")
+def archive_reservations_command(days, chunk_size, no_vacuum, convert):
+    """
+    Move past reservations to the archive table and free their space.
+
+    Meant to run on a schedule, e.g. nightly from cron. Reports read the
+    archive as well, through `archive.reservation_history`.
+
+    Usage:
+        flask archive-reservations [--days 180]
+    """
+    if convert:
+        enable_incremental_vacuum(database.get_engine())
+    days = current_app.config["ARCHIVE_AFTER_DAYS"] if days is None else days
+    before = datetime.now().date() - timedelta(days=days)
+
+    started = timer.perf_counter()
+    with SessionLocal() as db_session:
+        result = archive_reservations(db_session, before, chunk_size=chunk_size, vacuum=not no_vacuum)
+    click.echo(
+        f"Archived {result['archived']} reservations before {before} in "
+        f"{timer.perf_counter() - started:.1f}s, freed {result['freed_pages']} pages."
+    )
+
+
+# command to verify the materialized occupancy table
+@bp.cli.command("check-occupancy")
+def check_occupancy_command():
+    """
+    Compare `slot_occupancy` with availability recomputed from reservations.
+
+    Exits with status 1 if any slot disagrees.
+
+    Usage:
+        flask check-occupancy
+    """
+    with SessionLocal() as db_session:
+        mismatches = check_occupancy(db_session, schedule=get_schedule())
+
+    for day, slot_time, materialized, recomputed in mismatches:
+        click.echo(f"{day} {slot_time:%H:%M}: stored {materialized}, expected {recomputed}")
+    if mismatches:
+        raise SystemExit(1)
+    click.echo("Slot occupancy is consistent.")
 
 
 if __name__ == "__main__":
@@ -347,7 +1400,7 @@ if __name__ == "__main__":
     before the application starts. The app is then launched in debug mode, which provides
     enhanced error messages and automatic reloading for development purposes.
     """
-    from database import initialize_db
-
-    initialize_db()
+    app = create_app()
+    with app.app_context():
+        database.initialize_db()
     app.run(debug=True)
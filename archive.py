@@ -0,0 +1,157 @@
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, literal, select, text, union_all
+
+from models import ArchivedReservation, Reservation, SlotOccupancy
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+"""
+int: Reservations moved to the archive per transaction.
+"""
+
+VACUUM_PAGES = 2000
+"""
+int: Free pages returned to the filesystem after each chunk, about 8 MB with 4 KB pages.
+"""
+
+HISTORY_COLUMNS = ("id", "name", "email", "num_people", "date", "time", "duration", "table_id", "created_at")
+
+
+def reservation_history():
+    """
+    Combine the live and archived reservations into one selectable for reports.
+
+    SQLite pushes a filter on the result down into both halves of the
+    `UNION ALL`, so a date range still reads each table through its date
+    index.
+
+    Returns:
+        sqlalchemy.sql.Subquery: With the `HISTORY_COLUMNS` columns, e.g.
+            `history.c.date`.
+    """
+    return union_all(
+        select(*(getattr(Reservation, column) for column in HISTORY_COLUMNS)),
+        select(*(getattr(ArchivedReservation, column) for column in HISTORY_COLUMNS)),
+    ).subquery("reservation_history")
+
+
+def incremental_vacuum_enabled(db_session):
+    """
+    Check whether the database is a SQLite file in incremental auto-vacuum mode.
+    """
+    if db_session.get_bind().dialect.name != "sqlite":
+        return False
+    return db_session.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+
+
+def enable_incremental_vacuum(engine):
+    """
+    Switch an existing SQLite file to incremental auto-vacuum mode.
+
+    The mode of a file that already has tables only changes with a full
+    `VACUUM`, which rewrites the file and blocks every other connection
+    until it finishes, so this is a one-off step for files created before
+    the "performance" profile turned the mode on.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The write engine of the SQLite file.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("PRAGMA auto_vacuum=INCREMENTAL"))
+        connection.execute(text("VACUUM"))
+
+
+def vacuum_pages(db_session, pages=VACUUM_PAGES):
+    """
+    Return up to `pages` free pages at the end of the file to the filesystem.
+
+    Unlike `VACUUM`, which rewrites the whole file under an exclusive lock,
+    each call only moves as many pages as it frees, so it can run between
+    bookings.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to vacuum with. It is committed.
+        pages (int): The most pages to free.
+
+    Returns:
+        int: The number of pages freed.
+    """
+    before = db_session.execute(text("PRAGMA freelist_count")).scalar()
+    db_session.execute(text(f"PRAGMA incremental_vacuum({int(pages)})"))
+    db_session.commit()
+    return before - db_session.execute(text("PRAGMA freelist_count")).scalar()
+
+
+def archive_reservations(db_session, before, chunk_size=CHUNK_SIZE, vacuum=True):
+    """
+    Move the reservations dated before `before` to the archive table.
+
+    Reservations are moved oldest first, `chunk_size` at a time, each chunk
+    copied to `reservations_archive` and deleted from `reservations` in one
+    transaction, so bookings only wait for one chunk at a time and an
+    interrupted run leaves no row in both tables or in neither. The
+    `slot_occupancy` counters of the dates a chunk finishes are deleted in
+    the same transaction, since availability is never asked of them.
+
+    With `vacuum` on and the database in incremental auto-vacuum mode, the
+    pages freed by each chunk are returned to the filesystem, up to
+    `VACUUM_PAGES` per chunk and the rest at the end.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to write with. It is
+            committed after every chunk.
+        before (datetime.date): Reservations dated before this are archived.
+        chunk_size (int): Reservations per transaction.
+        vacuum (bool): Free the emptied pages afterwards.
+
+    Returns:
+        dict: `archived` reservations, `occupancy_rows` deleted counters and
+            `freed_pages`, 0 when vacuuming is off or unavailable.
+    """
+    vacuum = vacuum and incremental_vacuum_enabled(db_session)
+    archived = 0
+    occupancy_rows = 0
+    freed_pages = 0
+    while True:
+        rows = db_session.execute(
+            select(Reservation.id, Reservation.date)
+            .where(Reservation.date < before)
+            .order_by(Reservation.date, Reservation.time, Reservation.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+
+        columns = [getattr(Reservation, column) for column in HISTORY_COLUMNS]
+        db_session.execute(
+            insert(ArchivedReservation).from_select(
+                [*HISTORY_COLUMNS, "archived_at"],
+                select(*columns, literal(datetime.now(timezone.utc), ArchivedReservation.archived_at.type))
+                .where(Reservation.id.in_(ids)),
+            )
+        )
+        db_session.execute(delete(Reservation).where(Reservation.id.in_(ids)))
+        # the chunk's last date may continue in the next chunk
+        occupancy_rows += db_session.execute(
+            delete(SlotOccupancy).where(SlotOccupancy.date < rows[-1].date)
+        ).rowcount
+        db_session.commit()
+        archived += len(ids)
+        logger.info("Archived %d reservations", archived)
+        if vacuum:
+            freed_pages += vacuum_pages(db_session)
+
+    occupancy_rows += db_session.execute(delete(SlotOccupancy).where(SlotOccupancy.date < before)).rowcount
+    db_session.commit()
+    if vacuum:
+        while True:
+            freed = vacuum_pages(db_session)
+            freed_pages += freed
+            if not freed:
+                break
+    return {"archived": archived, "occupancy_rows": occupancy_rows, "freed_pages": freed_pages}
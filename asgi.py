@@ -0,0 +1,445 @@
+"""
+ASGI entry point serving availability and bookings without blocking on the database.
+
+`GET /get_available_slots/<date_str>` and `POST /reservations` are answered
+on the event loop, with their queries run through an `aiosqlite` engine, so
+a burst of date changes in the booking form waits on SQLite without tying
+up a worker thread per request. Both use the same code as the Flask views
+(`compute_day_slots`, `book_reservation`) through `AsyncSession.run_sync`,
+and build their JSON with the app's JSON provider, so the responses are the
+same. The availability event streams of `GET /availability/<date_str>/events`
+are served on the loop as well, so open streams do not hold threads. Every
+other request, including invalid input to these endpoints, is handed to the
+Flask app in a worker thread, which passes its response to the loop chunk
+by chunk, so streamed responses are not collected in memory.
+
+Usage:
+    uvicorn --factory asgi:create_asgi_app
+"""
+import asyncio
+import io
+import sys
+import threading
+from datetime import datetime
+
+from werkzeug.exceptions import HTTPException
+
+import database
+from events import HEARTBEAT, format_event
+from app import (
+    availability_update,
+    available_slots_payload,
+    book_reservation,
+    compute_day_slots,
+    create_app,
+    form_errors_payload,
+)
+from forms import ReservationForm
+
+
+def wsgi_environ(scope, body):
+    """
+    Build a WSGI environ from an ASGI HTTP scope and its request body.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        body (bytes): The complete request body.
+
+    Returns:
+        dict: The WSGI environ.
+    """
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key.startswith("HTTP_") and key in environ else value
+    return environ
+
+
+def response_start(status, headers):
+    """
+    Build the ASGI `http.response.start` message of a status code and `(name, value)` headers.
+    """
+    return {
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+    }
+
+
+def run_wsgi(wsgi_app, environ, emit):
+    """
+    Call a WSGI app and pass its response on as ASGI messages while it is produced.
+
+    Runs in a worker thread, which iterates the WSGI body there, so a
+    streamed response such as the admin export is sent chunk by chunk
+    instead of being collected in memory. The body ends with an empty
+    message, and the iterable is closed however iteration ends.
+
+    Args:
+        wsgi_app (callable): The WSGI app.
+        environ (dict): The WSGI environ.
+        emit (callable): Sends one ASGI message, blocking until it is sent.
+            Returns False once the client has disconnected, which stops
+            the response.
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = headers
+
+    chunks = wsgi_app(environ, start_response)
+    try:
+        started = False
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if not started:  # a WSGI app may call start_response as late as its first chunk
+                started = True
+                if not emit(response_start(response["status"], response["headers"])):
+                    return
+            if not emit({"type": "http.response.body", "body": chunk, "more_body": True}):
+                return
+        if not started:
+            emit(response_start(response["status"], response["headers"]))
+        emit({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+async def read_body(receive):
+    """
+    Read the complete body of an ASGI HTTP request.
+    """
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def wait_for_disconnect(receive):
+    """
+    Wait until the client of a streaming response disconnects.
+    """
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def send_response(send, status, headers, body):
+    """
+    Send a complete ASGI HTTP response.
+    """
+    await send(response_start(status, headers))
+    await send({"type": "http.response.body", "body": body})
+
+
+class AsyncApp:
+    """
+    An ASGI app answering the busiest endpoints natively and the rest through Flask.
+
+    Requests are routed with the Flask app's own URL map, so the async
+    endpoints match exactly the URLs of the views they replace.
+
+    Args:
+        flask_app (flask.Flask): The application created by `create_app`.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.database = database.init_async(flask_app)
+        self.handlers = {
+            "main.get_available_slots_api": self.available_slots,
+            "main.reservations": self.reservations,
+            "main.availability_events": self.availability_events,
+        }
+
+        # measured like Flask's views; the event stream would only skew the latencies
+        self.measured = set()
+        if flask_app.config["METRICS_ENABLED"]:
+            self.measured = {"main.get_available_slots_api", "main.reservations"}
+            for engine in {self.database["engine"], self.database["read_engine"]}:
+                flask_app.extensions["metrics"].instrument_engine(engine.sync_engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+
+        if scope["type"] != "http":
+            return
+
+        # built once without the body, which only the booking handler reads
+        environ = wsgi_environ(scope, b"")
+        rule, args = self.match(environ)
+        handler = self.handlers.get(rule.endpoint) if rule else None
+        if handler is not None and rule.endpoint in self.measured:
+            handled = await self.measure(handler, rule.rule, environ, receive, send, args)
+        else:
+            handled = handler is not None and await handler(environ, receive, send, **args)
+        if not handled:
+            await self.call_flask(scope, receive, send)
+
+    def match(self, environ):
+        """
+        Find the Flask URL rule of a request, or `(None, {})` if it has none.
+        """
+        try:
+            return self.flask_app.url_map.bind_to_environ(environ).match(return_rule=True)
+        except HTTPException:  # not found, wrong method or a redirect: Flask answers
+            return None, {}
+
+    async def measure(self, handler, route, environ, receive, send, args):
+        """
+        Run a handler with the request metrics Flask's hooks record for its views.
+
+        Requests the handler leaves to Flask are measured there instead.
+
+        Returns:
+            bool: What the handler returned.
+        """
+        metrics = self.flask_app.extensions["metrics"]
+        stats, token = metrics.start_request(route, environ["REQUEST_METHOD"])
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                stats.status = message["status"]
+            await send(message)
+
+        try:
+            handled = await handler(environ, receive, send_and_record, **args)
+        except Exception:
+            metrics.finish_request(stats, token, 500)
+            raise
+        if handled:
+            metrics.finish_request(stats, token, stats.status)
+        else:
+            metrics.discard_request(token)
+        return handled
+
+    async def call_flask(self, scope, receive, send):
+        """
+        Answer a request with the Flask app, in a worker thread.
+
+        The response is streamed as the thread produces it, see `run_wsgi`,
+        and stops early when the client disconnects.
+        """
+        environ = wsgi_environ(scope, await read_body(receive))
+        loop = asyncio.get_running_loop()
+        disconnected = threading.Event()
+        watcher = asyncio.ensure_future(wait_for_disconnect(receive))
+        watcher.add_done_callback(lambda _: disconnected.set())
+
+        def emit(message):
+            if disconnected.is_set():
+                return False
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+            return True
+
+        try:
+            await asyncio.to_thread(run_wsgi, self.flask_app, environ, emit)
+        finally:
+            watcher.cancel()
+
+    async def send_json(self, send, payload):
+        """
+        Send a JSON body exactly as `flask.jsonify` would.
+        """
+        response = self.flask_app.json.response(payload)
+        await send_response(send, response.status_code, response.headers.to_wsgi_list(), response.get_data())
+
+    async def day_slots(self, day, schedule):
+        """
+        Look up a date's available slots like `app.get_available_slots(date)`, on the async engine.
+
+        Returns:
+            dict: Slot start times mapped to the number of available tables.
+        """
+        # the same cache entry as `get_available_slots(date)`
+        cache = self.flask_app.extensions["availability_cache"]
+        cache_key = (day, None, schedule.interval, schedule.version)
+        generation = cache.generation(day)
+        slots = cache.get(cache_key, generation)
+        if slots is None:
+            async with self.database["read_sessions"]() as session:
+                slots = await session.run_sync(compute_day_slots, day, schedule.for_day(day))
+            cache.set(cache_key, slots, generation)
+        return dict(slots)
+
+    async def available_slots(self, environ, receive, send, date_str):
+        """
+        Answer `GET /get_available_slots/<date_str>`, see `app.get_available_slots_api`.
+
+        Returns:
+            bool: False if the request is left to the Flask view.
+        """
+        try:
+            day = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return False
+
+        slots = await self.day_slots(day, self.flask_app.extensions["schedule"].get())
+        time_str = self.flask_app.request_class(environ).args.get("time")
+        try:
+            payload = available_slots_payload(slots, time_str)
+        except ValueError:
+            return False
+        await self.send_json(send, payload)
+        return True
+
+    async def reservations(self, environ, receive, send):
+        """
+        Answer `POST /reservations`, see `app.reservations`.
+
+        The form, including its CSRF token, is validated in a Flask request
+        context, then the booking runs on the async engine.
+
+        Returns:
+            bool: False if the request is left to the Flask view.
+        """
+        if environ["REQUEST_METHOD"] != "POST":
+            return False
+
+        body = await read_body(receive)
+        environ.update({"wsgi.input": io.BytesIO(body), "CONTENT_LENGTH": str(len(body))})
+        with self.flask_app.request_context(environ):
+            form = ReservationForm()
+            valid = form.validate_on_submit()
+        if not valid:
+            await self.send_json(send, form_errors_payload(form))
+            return True
+
+        schedule = self.flask_app.extensions["schedule"].get()
+        async with self.database["sessions"]() as session:
+            payload = await session.run_sync(book_reservation, form.values, schedule)
+        if payload["is_valid"]:
+            day = form.values["date"]
+            self.flask_app.extensions["availability_cache"].invalidate(day)
+            await self.publish_availability(day, schedule)
+        await self.send_json(send, payload)
+        return True
+
+    async def publish_availability(self, day, schedule):
+        """
+        Push a date's new availability to its event streams, see `app.publish_availability`.
+        """
+        broker = self.flask_app.extensions["availability_broker"]
+        if broker.has_listeners(day):
+            update = availability_update(day, schedule.for_day(day), await self.day_slots(day, schedule))
+            await asyncio.to_thread(broker.publish, day, update)
+
+    async def availability_events(self, environ, receive, send, date_str):
+        """
+        Answer `GET /availability/<date_str>/events`, see `app.availability_events`.
+
+        The stream is served on the event loop: each open stream costs a
+        queue and a subscription, not a thread.
+
+        Returns:
+            bool: False if the request is left to the Flask view.
+        """
+        try:
+            day = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return False
+
+        # broker callbacks run in other threads; hand their updates to this loop
+        loop = asyncio.get_running_loop()
+        updates = asyncio.Queue()
+
+        def deliver(update):
+            try:
+                loop.call_soon_threadsafe(updates.put_nowait, update)
+            except RuntimeError:  # the loop has closed
+                pass
+
+        unsubscribe = self.flask_app.extensions["availability_broker"].subscribe(day, deliver)
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            schedule = self.flask_app.extensions["schedule"].get()
+            first = availability_update(day, schedule.for_day(day), await self.day_slots(day, schedule))
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            })
+            chunk = format_event(first, retry=3000)
+            heartbeat = self.flask_app.config["AVAILABILITY_EVENTS_HEARTBEAT"]
+            while not disconnected.done():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                update = asyncio.ensure_future(updates.get())
+                done, _ = await asyncio.wait(
+                    {update, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED
+                )
+                if update in done:
+                    chunk = format_event(update.result())
+                else:
+                    update.cancel()
+                    chunk = HEARTBEAT
+        except OSError:  # the client went away mid-send
+            pass
+        finally:
+            unsubscribe()
+            disconnected.cancel()
+        return True
+
+    async def lifespan(self, receive, send):
+        """
+        Handle the ASGI lifespan protocol, closing the async engines at shutdown.
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.database["engine"].dispose()
+                await self.database["read_engine"].dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app=None, config=None):
+    """
+    Create the ASGI application.
+
+    Args:
+        flask_app (flask.Flask, optional): The Flask app to serve. Created
+            with `create_app(config)` if not given.
+        config (dict, optional): Passed to `create_app`.
+
+    Returns:
+        AsyncApp: The ASGI application.
+    """
+    return AsyncApp(flask_app or create_app(config))
@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+try:
+    import brotli
+except ImportError:  # .br files are only built when brotli is installed
+    brotli = None
+
+
+DIST_DIRNAME = "dist"
+"""
+str: The folder inside `static` holding fingerprinted copies of the assets.
+"""
+
+MANIFEST_FILENAME = "manifest.json"
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".json", ".svg", ".txt", ".ico")
+"""
+tuple: Assets that get precompressed `.br` and `.gz` siblings. Images are
+       already compressed and are served as they are.
+"""
+
+# url(...) references in stylesheets, quoted or not
+CSS_URL = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+
+
+def fingerprint(name, content):
+    """
+    Insert a content hash into a file name.
+
+    Args:
+        name (str): The logical name, e.g. "styles.css".
+        content (bytes): The file content.
+
+    Returns:
+        str: The fingerprinted name, e.g. "styles.3f2a1b9c0d4e.css".
+    """
+    stem, extension = posixpath.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{extension}"
+
+
+def _rewrite_css_urls(content, name, assets, static_url_path):
+    """
+    Point a stylesheet's url() references at the fingerprinted assets.
+
+    References are rewritten relative to the stylesheet's own fingerprinted
+    location, so they keep working under any URL prefix.
+    """
+    directory = posixpath.dirname(name)
+
+    def replace(match):
+        url = match.group(2)
+        if url.startswith(static_url_path + "/"):
+            target = url[len(static_url_path) + 1:]
+        elif "://" in url or url.startswith(("/", "data:", "#")):
+            return match.group(0)
+        else:
+            target = posixpath.normpath(posixpath.join(directory, url))
+        if target not in assets:
+            return match.group(0)
+        return f'url("{posixpath.relpath(assets[target], posixpath.dirname(DIST_DIRNAME + "/" + name))}")'
+
+    return CSS_URL.sub(replace, content.decode()).encode()
+
+
+def _write_compressed(path, content):
+    """
+    Write the `.br` and `.gz` siblings of a file that are smaller than it.
+
+    Returns:
+        list: The encodings written, as named in Accept-Encoding.
+    """
+    encodings = []
+    candidates = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        candidates.insert(0, ("br", ".br", lambda data: brotli.compress(data, quality=11)))
+    for encoding, suffix, compress in candidates:
+        compressed = compress(content)
+        if len(compressed) < len(content):
+            with open(path + suffix, "wb") as file:
+                file.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+
+def build_assets(static_folder, static_url_path="/static"):
+    """
+    Copy the static files to content-hashed names and precompress them.
+
+    Every file under `static_folder` is copied to `static/dist` with a hash of
+    its content in the name, so a changed file gets a new URL and unchanged
+    files can be cached by browsers forever. Stylesheets are fingerprinted
+    after the files they reference, with their url() references rewritten.
+    Text assets get `.br` (when brotli is installed) and `.gz` siblings, so
+    responses never have to be compressed per request. Files left over from
+    earlier builds are removed.
+
+    Args:
+        static_folder (str): The app's static folder.
+        static_url_path (str): The URL prefix of static files.
+
+    Returns:
+        dict: The manifest, see `load_manifest`.
+    """
+    dist_dir = os.path.join(static_folder, DIST_DIRNAME)
+    names = []
+    for root, dirnames, filenames in os.walk(static_folder):
+        if root == static_folder and DIST_DIRNAME in dirnames:
+            dirnames.remove(DIST_DIRNAME)
+        for filename in filenames:
+            path = os.path.relpath(os.path.join(root, filename), static_folder)
+            names.append(path.replace(os.sep, "/"))
+
+    # stylesheets last, so the assets they reference are already fingerprinted
+    names.sort(key=lambda name: (name.endswith(".css"), name))
+    manifest = {"assets": {}, "encodings": {}}
+    for name in names:
+        with open(os.path.join(static_folder, name), "rb") as file:
+            content = file.read()
+        if name.endswith(".css"):
+            content = _rewrite_css_urls(content, name, manifest["assets"], static_url_path)
+
+        hashed = f"{DIST_DIRNAME}/{fingerprint(name, content)}"
+        path = os.path.join(static_folder, hashed)
+        manifest["assets"][name] = hashed
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(content)
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            manifest["encodings"][hashed] = _write_compressed(path, content)
+
+    keep = {MANIFEST_FILENAME}
+    for hashed in manifest["assets"].values():
+        relative = hashed[len(DIST_DIRNAME) + 1:]
+        keep.update((relative, relative + ".br", relative + ".gz"))
+    for root, _, filenames in os.walk(dist_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            if os.path.relpath(path, dist_dir).replace(os.sep, "/") not in keep:
+                os.remove(path)
+
+    os.makedirs(dist_dir, exist_ok=True)
+    with open(os.path.join(dist_dir, MANIFEST_FILENAME), "w") as file:
+        json.dump(manifest, file, indent=2)
+    return _index_manifest(manifest)
+
+
+def _index_manifest(manifest):
+    """
+    Add the `fingerprinted` set of a manifest's fingerprinted paths, for membership tests per request.
+    """
+    manifest["fingerprinted"] = frozenset(manifest["assets"].values())
+    return manifest
+
+
+def load_manifest(path):
+    """
+    Load the asset manifest written by `build_assets`.
+
+    The manifest has two keys: `assets` maps logical static paths (e.g.
+    "styles.css") to their fingerprinted paths (e.g. "dist/styles.3f2a1b9c0d4e.css"),
+    and `encodings` lists the precompressed encodings available for each
+    fingerprinted path, in order of preference. The loaded manifest also
+    holds `fingerprinted`, a frozenset of the fingerprinted paths, built
+    once here so serving a file does not scan `assets`.
+
+    Args:
+        path (str): The manifest file.
+
+    Returns:
+        dict: The manifest, or empty `assets`, `encodings` and
+              `fingerprinted` if assets were never built.
+    """
+    try:
+        with open(path, "r") as file:
+            return _index_manifest(json.load(file))
+    except FileNotFoundError:
+        return _index_manifest({"assets": {}, "encodings": {}})
+
@@ -0,0 +1,141 @@
+from datetime import datetime, time, timedelta
+
+
+# restaurant opening hours used to generate reservation slots
+OPENING_TIME = time(17, 0)  # 5:00 PM
+CLOSING_TIME = time(23, 0)  # 11:00 PM
+SLOT_INTERVAL = 30  # minutes per slot
+TABLES = 6  # interchangeable tables per slot
+
+
+def to_minutes(value):
+    """
+    Convert a time of day to minutes since midnight.
+
+    Seconds and microseconds are ignored, which normalizes stored reservation
+    times to the minute.
+
+    Args:
+        value (datetime.time): The time of day to convert.
+
+    Returns:
+        int: Minutes since midnight.
+    """
+    return value.hour * 60 + value.minute
+
+
+def generate_slots(interval=SLOT_INTERVAL, opening_time=OPENING_TIME, closing_time=CLOSING_TIME):
+    """
+    Generate the slot start times for the restaurant's operating hours.
+
+    Args:
+        interval (int): The duration of each time slot in minutes. Default is 30.
+        opening_time (datetime.time): The time the first slot starts.
+        closing_time (datetime.time): The time after which no slot may start.
+
+    Returns:
+        list: The slot start times as `datetime.time` objects, in order.
+    """
+    day = datetime.min
+    current_time = datetime.combine(day, opening_time)
+    end_time = datetime.combine(day, closing_time)
+    slots = []
+
+    while current_time < end_time:
+        slots.append(current_time.time())
+        current_time += timedelta(minutes=interval)
+
+    return slots
+
+
+def covered_slot_range(reserved_time, reserved_duration, slot_count,
+                       interval=SLOT_INTERVAL, opening_time=OPENING_TIME):
+    """
+    Find the slots covered by a single reservation.
+
+    A slot is covered when its start falls within
+    `[reservation time, reservation time + duration)`.
+
+    Args:
+        reserved_time (datetime.time): The reservation start time.
+        reserved_duration (int): The reservation length in hours. A missing
+            duration counts as 1 hour.
+        slot_count (int): The number of slots in the day.
+        interval (int): The duration of each time slot in minutes.
+        opening_time (datetime.time): The start time of the first slot.
+
+    Returns:
+        tuple: `(first, last)` slot indexes, with `last` exclusive. The range
+               is empty when the reservation lies outside opening hours.
+    """
+    start = to_minutes(reserved_time) - to_minutes(opening_time)
+    end = start + (reserved_duration or 1) * 60  # Default to 1 hour
+
+    # index of the first slot starting at or after each boundary
+    first = min(max(-(-start // interval), 0), slot_count)
+    last = min(max(-(-end // interval), 0), slot_count)
+    return first, last
+
+
+def sweep_occupancy(intervals, slot_count, interval=SLOT_INTERVAL, opening_time=OPENING_TIME):
+    """
+    Count the reservations overlapping each slot using a difference-array sweep.
+
+    Each reservation adds +1 at the first slot it covers and -1 just after the
+    last one, so a single prefix sum yields the occupancy of every slot. The
+    cost is O(reservations + slots) instead of checking every reservation
+    against every slot.
+
+    Args:
+        intervals (iterable): `(time, duration)` pairs, where `time` is a
+            `datetime.time` and `duration` is the length in hours. A missing
+            duration counts as 1 hour.
+        slot_count (int): The number of slots in the day.
+        interval (int): The duration of each time slot in minutes.
+        opening_time (datetime.time): The start time of the first slot.
+
+    Returns:
+        list: The number of overlapping reservations for each slot index.
+    """
+    diff = [0] * (slot_count + 1)
+
+    for reserved_time, reserved_duration in intervals:
+        first, last = covered_slot_range(
+            reserved_time, reserved_duration, slot_count, interval, opening_time
+        )
+        if first < last:
+            diff[first] += 1
+            diff[last] -= 1
+
+    occupancy = []
+    running = 0
+    for step in diff[:slot_count]:
+        running += step
+        occupancy.append(running)
+    return occupancy
+
+
+def compute_available_slots(intervals, tables=TABLES, interval=SLOT_INTERVAL,
+                            opening_time=OPENING_TIME, closing_time=CLOSING_TIME):
+    """
+    Compute the number of free tables for each slot of a day.
+
+    Args:
+        intervals (iterable): `(time, duration)` pairs for the day's reservations.
+        tables (int): The total number of tables available in the restaurant.
+        interval (int): The duration of each time slot in minutes.
+        opening_time (datetime.time): The start time of the first slot.
+        closing_time (datetime.time): The time after which no slot may start.
+
+    Returns:
+        dict: Slot start times mapped to the number of available tables.
+              Fully booked slots are omitted.
+    """
+    slots = generate_slots(interval, opening_time, closing_time)
+    occupancy = sweep_occupancy(intervals, len(slots), interval, opening_time)
+
+    return {
+        slot_time: tables - booked
+        for slot_time, booked in zip(slots, occupancy)
+        if booked < tables
+    }
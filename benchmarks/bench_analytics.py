@@ -0,0 +1,122 @@
+"""
+Benchmark a year of occupancy analytics against the per-day availability loop.
+
+A year of synthetic reservations is seeded and the occupancy of every slot
+of every day is computed:
+
+- per-day loop: `get_available_slots` for each day, with the availability
+  cache disabled. At the default interval it reads the materialized
+  `slot_occupancy` table; at other intervals it recomputes each day from
+  its reservations.
+- NumPy matrix: `occupancy_report`, which loads the whole range in column
+  batches and builds the `(days, slots)` matrix with vectorized operations.
+
+Both must agree on every slot.
+
+Usage:
+    python -m benchmarks.bench_analytics [--per-day 30] [--days 365]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time as timer
+from datetime import date, time, timedelta
+
+from sqlalchemy import insert
+
+from analytics import occupancy_report
+from app import create_app, get_available_slots
+from availability import TABLES
+from database import SessionLocal, initialize_db
+from models import Reservation
+from occupancy import rebuild_occupancy
+
+START = date(2029, 1, 1)
+
+
+def seed_year(engine, days, per_day, rng):
+    """
+    Insert about `per_day` reservations for each of `days` days.
+    """
+    rows = [
+        {
+            "name": "Bench",
+            "email": "bench@example.com",
+            "num_people": rng.randint(1, 6),
+            "date": START + timedelta(days=offset),
+            "time": time(rng.randint(17, 22), rng.choice((0, 30))),
+            "duration": rng.choice((1, 1, 2)),
+        }
+        for offset in range(days)
+        for _ in range(rng.randint(per_day // 2, per_day * 3 // 2))
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(Reservation), rows)
+    return len(rows)
+
+
+def per_day_loop(end, interval):
+    """
+    Booked tables per slot for every day, one `get_available_slots` call per day.
+    """
+    day = START
+    booked = {}
+    while day <= end:
+        available = get_available_slots(day, interval=interval)
+        booked[day] = available
+        day += timedelta(days=1)
+    return booked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(17)
+    end = START + timedelta(days=args.days - 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "AVAILABILITY_CACHE_SIZE": 0,
+        })
+        engine = app.extensions["database"]["engine"]
+        initialize_db(bind=engine)
+        count = seed_year(engine, args.days, args.per_day, rng)
+
+        with app.app_context():
+            with SessionLocal() as db_session:
+                rebuild_occupancy(db_session)
+                db_session.commit()
+
+            print(f"{count} reservations over {args.days} days")
+            print(f"{'interval':>8} {'per-day loop ms':>16} {'NumPy matrix ms':>16} {'speedup':>8}")
+            for interval in (30, 15):
+                started = timer.perf_counter()
+                loop = per_day_loop(end, interval)
+                loop_ms = (timer.perf_counter() - started) * 1000
+
+                started = timer.perf_counter()
+                with SessionLocal() as db_session:
+                    report = occupancy_report(db_session, START, end, interval=interval)
+                matrix_ms = (timer.perf_counter() - started) * 1000
+
+                for offset, row in enumerate(report.occupancy.tolist()):
+                    expected = {
+                        slot_time: TABLES - booked
+                        for slot_time, booked in zip(report.slots, row)
+                        if booked < TABLES
+                    }
+                    assert loop[START + timedelta(days=offset)] == expected, "results disagree"
+                print(f"{interval:>8} {loop_ms:>16.1f} {matrix_ms:>16.1f} {loop_ms / matrix_ms:>7.1f}x")
+
+            print(f"utilization {report.utilization:.0%}, {len(report.full_days)} fully booked days, "
+                  f"peak slots {', '.join(f'{slot:%H:%M}' for slot, _ in report.peak_slots)}")
+        app.extensions["database"]["read_engine"].dispose()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Measure archiving and the hot path before and after it.
+
+A database is seeded with `--reservations` past reservations by
+`benchmarks.datagen`, ending yesterday. Bookings for the coming weeks and
+availability reads are timed, then everything older than `--days` is
+archived with `archive.archive_reservations` and the same requests are
+timed again on a copy of the database that received the same bookings, so
+both runs start from the same state apart from the archive.
+
+Usage:
+    python -m benchmarks.bench_archive [--reservations 300000] [--days 30] [--requests 1000]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time as timer
+from datetime import date, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app import create_app
+from archive import archive_reservations
+from benchmarks.datagen import months_needed, seed_database
+from models import Reservation
+
+
+def make_app(db_path):
+    """
+    Create an app on the benchmark database, with the availability cache disabled.
+    """
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "WTF_CSRF_ENABLED": False,
+        "AVAILABILITY_CACHE_SIZE": 0,
+        "LOG_LEVEL": "WARNING",
+        "SLOW_QUERY_THRESHOLD": 5,  # seeding inserts in large batches
+    })
+
+
+def time_requests(db_path, count):
+    """
+    Book `count` reservations over the next weeks and read as much availability.
+
+    Returns:
+        tuple: Microseconds per booking and per availability read.
+    """
+    app = make_app(db_path)
+    client = app.test_client()
+    rng = random.Random(7)
+    today = date.today()
+    times = ["17:00", "18:00", "19:00", "20:00", "21:00"]
+    bookings = [
+        {"name": "Guest", "email": "guest@example.com", "num_people": rng.randint(1, 4),
+         "date": (today + timedelta(days=rng.randrange(1, 60))).isoformat(),
+         "time": rng.choice(times), "duration": 1}
+        for _ in range(count)
+    ]
+    reads = [f"/get_available_slots/{(today + timedelta(days=rng.randrange(1, 60))).isoformat()}"
+             for _ in range(count)]
+
+    started = timer.perf_counter()
+    for booking in bookings:
+        client.post("/reservations", data=booking)
+    booking_time = (timer.perf_counter() - started) / count
+    started = timer.perf_counter()
+    for path in reads:
+        client.get(path)
+    read_time = (timer.perf_counter() - started) / count
+    for engine in set(app.extensions["database"].values()):
+        engine.dispose()
+    return booking_time * 1e6, read_time * 1e6
+
+
+def table_rows(engine):
+    """
+    Count the rows of the hot reservations table.
+    """
+    with Session(engine) as db_session:
+        return db_session.scalar(select(func.count()).select_from(Reservation))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reservations", type=int, default=300_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kept = os.path.join(tmp, "kept.db")
+        app = make_app(kept)
+        engine = app.extensions["database"]["engine"]
+        months = months_needed(args.reservations)
+        start = date.today() - timedelta(days=months * 30)
+        seed_database(engine, args.reservations, start, months=months)
+        with engine.connect() as connection:
+            connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        engine.dispose()
+        archived = os.path.join(tmp, "archived.db")
+        shutil.copy(kept, archived)
+
+        app = make_app(archived)
+        engine = app.extensions["database"]["engine"]
+        started = timer.perf_counter()
+        with Session(engine) as db_session:
+            result = archive_reservations(db_session, date.today() - timedelta(days=args.days))
+        elapsed = timer.perf_counter() - started
+        print(f"archived {result['archived']} of {args.reservations} reservations in {elapsed:.1f}s, "
+              f"freed {result['freed_pages']} pages")
+        engine.dispose()
+
+        print(f"{'database':<10} {'hot rows':>9} {'booking µs':>11} {'availability µs':>16}")
+        for label, db_path in (("kept", kept), ("archived", archived)):
+            time_requests(db_path, 50)  # warm up
+            booking, read = time_requests(db_path, args.requests)
+            rows = table_rows(make_app(db_path).extensions["database"]["engine"])
+            print(f"{label:<10} {rows:>9} {booking:>11.0f} {read:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark `get_available_slots` as the reservation history grows.
+
+The table is seeded in steps up to one million rows spread over many past
+dates, while the benchmarked date always holds the same 40 reservations.
+After each step `slot_occupancy` is rebuilt from the reservations, as
+`flask rebuild-occupancy` does, so both lookup paths see the full history:
+
+- occupancy: the schedule's interval, read from `slot_occupancy`.
+- recompute: a 15-minute interval, recomputed from the date's reservations.
+- sweep only: the slot computation on its own, which stays flat.
+
+Any growth in the first two comes from the database filtering on `date`.
+
+Usage:
+    python -m benchmarks.bench_availability [--max-rows 1000000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time as timer
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import create_app, get_available_slots
+from availability import compute_available_slots
+from database import initialize_db
+from models import Reservation
+from occupancy import rebuild_occupancy
+
+TARGET_DATE = datetime(2030, 6, 15)
+TARGET_RESERVATIONS = 40
+RECOMPUTE_INTERVAL = 15
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def reservation_rows(count, day, rng):
+    """
+    Build `count` synthetic reservation rows for a single day.
+    """
+    return [
+        {
+            "name": "Bench",
+            "email": "bench@example.com",
+            "num_people": rng.randint(1, 6),
+            "date": day,
+            "time": time(rng.randint(17, 22), rng.choice((0, 30))),
+            "duration": rng.choice((1, 1, 2)),
+        }
+        for _ in range(count)
+    ]
+
+
+def seed_history(engine, count, rng, batch_size=50_000):
+    """
+    Insert `count` reservations spread across ten years of past dates.
+    """
+    start = date(2020, 1, 1)
+    with engine.begin() as connection:
+        for offset in range(0, count, batch_size):
+            batch = []
+            for _ in range(min(batch_size, count - offset)):
+                day = start + timedelta(days=rng.randrange(3650))
+                batch.extend(reservation_rows(1, day, rng))
+            connection.execute(insert(Reservation), batch)
+
+
+def measure(func, repeat):
+    """
+    Return the median wall time of `func` in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = timer.perf_counter()
+        func()
+        samples.append((timer.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-rows", type=int, default=SIZES[-1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        # bypass the availability cache while timing
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "AVAILABILITY_CACHE_SIZE": 0,
+            "SLOW_QUERY_THRESHOLD": 60,  # seeding inserts are slow by design
+        })
+        engine = app.extensions["database"]["engine"]
+        initialize_db(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(Reservation),
+                reservation_rows(TARGET_RESERVATIONS, TARGET_DATE.date(), rng),
+            )
+        intervals = [(r["time"], r["duration"])
+                     for r in reservation_rows(TARGET_RESERVATIONS, TARGET_DATE.date(), rng)]
+
+        print(f"{'rows':>10} {'occupancy ms':>13} {'recompute ms':>13} {'sweep only ms':>14}")
+        seeded = 0
+        with app.app_context():
+            for size in (s for s in SIZES if s <= args.max_rows):
+                seed_history(engine, size - seeded, rng)
+                seeded = size
+                with Session(engine) as db_session:
+                    rebuild_occupancy(db_session)
+                    db_session.commit()
+                occupancy = measure(lambda: get_available_slots(TARGET_DATE), args.repeat)
+                recompute = measure(
+                    lambda: get_available_slots(TARGET_DATE, interval=RECOMPUTE_INTERVAL), args.repeat
+                )
+                sweep = measure(lambda: compute_available_slots(intervals), args.repeat)
+                print(f"{size:>10} {occupancy:>13.3f} {recompute:>13.3f} {sweep:>14.3f}")
+        app.extensions["database"]["read_engine"].dispose()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark importing historical reservations in bulk versus one POST per booking.
+
+Writes `--rows` synthetic reservations spread over ten years to a CSV file,
+imports them with `bulk.import_reservations` into a SQLite file database,
+and times `--sample` of them through `POST /reservations`, the per-row path,
+extrapolating that to the full file.
+
+Usage:
+    python -m benchmarks.bench_bulk_import [--rows 100000] [--sample 500]
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time as timer
+from datetime import date, timedelta
+
+from app import create_app
+from bulk import read_records, import_reservations
+from database import SessionLocal, initialize_db
+
+
+def write_history(path, rows, rng):
+    """
+    Write `rows` reservations on random days and slots to a CSV file.
+    """
+    start = date(2015, 1, 1)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "email", "num_people", "date", "time"])
+        for index in range(rows):
+            writer.writerow([
+                f"Guest {index}", "guest@example.com", rng.randint(1, 6),
+                (start + timedelta(days=rng.randrange(3650))).isoformat(),
+                f"{rng.randint(17, 21)}:{rng.choice(('00', '30'))}",
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "history.csv")
+        write_history(csv_path, args.rows, rng)
+
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bulk.db')}",
+            "WTF_CSRF_ENABLED": False,
+        })
+        with app.app_context():
+            initialize_db()
+            started = timer.perf_counter()
+            with SessionLocal() as db_session:
+                results = import_reservations(db_session, read_records(csv_path))
+            bulk_seconds = timer.perf_counter() - started
+        accepted = sum(result["accepted"] for result in results)
+
+        client = app.test_client()
+        sample = list(read_records(csv_path))[:args.sample]
+        started = timer.perf_counter()
+        for record in sample:
+            client.post("/reservations", data=record)
+        per_row_seconds = (timer.perf_counter() - started) / len(sample) * args.rows
+
+    print(f"{'path':<22} {'seconds':>10} {'rows/s':>10}")
+    print(f"{'bulk import':<22} {bulk_seconds:>10.1f} {args.rows / bulk_seconds:>10.0f}")
+    print(f"{'per-row POST (est.)':<22} {per_row_seconds:>10.1f} {args.rows / per_row_seconds:>10.0f}")
+    print(f"{accepted} of {args.rows} rows accepted by the bulk import.")
+
+
+if __name__ == "__main__":
+    main()
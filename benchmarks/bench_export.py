@@ -0,0 +1,106 @@
+"""
+Compare the admin export and listing with loading every reservation at once.
+
+On a database seeded with `--reservations` rows by `benchmarks.datagen`:
+
+- export: `db_session.query(Reservation).all()` serialized to JSON Lines,
+  against `export.export_reservations` streaming the same rows in batches.
+  Reports the time to the first bytes and the total time of each, then
+  the peak Python memory in a second run under `tracemalloc`, which slows
+  allocations down too much to time them together.
+- deep page: a page near the end of the table read with LIMIT/OFFSET,
+  against the same page read with a keyset cursor.
+
+Usage:
+    python -m benchmarks.bench_export [--reservations 200000] [--page-size 100]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time as timer
+import tracemalloc
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from benchmarks.datagen import seed_database
+from database import build_engine
+from export import encode_cursor, export_reservations, list_reservations, reservations_query, serialize
+from models import Reservation
+
+
+def measure(produce):
+    """
+    Run `produce`, a generator of output chunks, and time it.
+
+    Returns:
+        tuple: Seconds to the first chunk and total seconds.
+    """
+    started = timer.perf_counter()
+    first = None
+    for _ in produce():
+        if first is None:
+            first = timer.perf_counter() - started
+    return first, timer.perf_counter() - started
+
+
+def peak_memory(produce):
+    """
+    Run `produce` under `tracemalloc` and return the peak traced MB.
+    """
+    tracemalloc.start()
+    for _ in produce():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reservations", type=int, default=200_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed_database(engine, args.reservations, date(2031, 1, 1))
+
+        def load_all():
+            with Session(engine) as db_session:
+                reservations = db_session.query(Reservation).all()
+                yield "".join(json.dumps(serialize(reservation)) + "\n" for reservation in reservations)
+
+        print(f"{args.reservations} reservations")
+        print(f"{'export':<22} {'first bytes ms':>15} {'total s':>8} {'peak MB':>8}")
+        for label, produce in (
+            ("query().all()", load_all),
+            ("streamed", lambda: export_reservations(engine, "jsonl")),
+        ):
+            first, total = measure(produce)
+            peak = peak_memory(produce)
+            print(f"{label:<22} {first * 1000:>15.1f} {total:>8.2f} {peak:>8.1f}")
+
+        offset = args.reservations - args.page_size
+        with Session(engine) as db_session:
+            query = reservations_query()
+            last_before = db_session.execute(query.offset(offset - 1).limit(1)).one()
+            timings = {}
+            for label, read_page in (
+                ("LIMIT/OFFSET", lambda: db_session.execute(query.offset(offset).limit(args.page_size)).all()),
+                ("keyset", lambda: list_reservations(db_session, args.page_size, after=encode_cursor(last_before))),
+            ):
+                read_page()  # warm up
+                started = timer.perf_counter()
+                for _ in range(20):
+                    read_page()
+                timings[label] = (timer.perf_counter() - started) / 20
+        print(f"\npage at offset {offset}: " + ", ".join(
+            f"{label} {seconds * 1000:.2f} ms" for label, seconds in timings.items()
+        ))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark request latency with synchronous versus queued logging.
+
+Drives `/get_available_slots/<date_str>` through the Flask test client with
+the availability cache disabled, and compares:
+
+- sync debug + SQL echo: every record, including each SQL statement, is
+  written to the log file on the request thread, as the old `print` and
+  `echo=True` setup did.
+- queued debug + SQL echo: the same records, handed to the background
+  listener thread by `configure_logging`.
+- queued default: the production default of INFO level without SQL echo.
+
+Each write to the log file is delayed by `--sink-latency-ms` to stand in for a
+congested stdout pipe or log driver.
+
+Usage:
+    python -m benchmarks.bench_logging [--requests 2000] [--sink-latency-ms 0.1]
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time as timer
+from contextlib import contextmanager
+from datetime import date, time
+from app import create_app
+from database import SessionLocal, initialize_db
+from logging_config import LOG_FORMAT, configure_logging, shutdown_logging
+from models import Reservation
+from occupancy import reserve_slots
+
+
+class SlowFileHandler(logging.FileHandler):
+    """
+    A file handler whose writes take an extra fixed delay.
+    """
+
+    def __init__(self, filename, latency):
+        super().__init__(filename)
+        self.latency = latency
+
+    def emit(self, record):
+        timer.sleep(self.latency)
+        super().emit(record)
+
+
+def seeded_app():
+    """
+    Create the app on an in-memory database holding a day of reservations.
+    """
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "AVAILABILITY_CACHE_SIZE": 0})
+    with app.app_context():
+        initialize_db()
+        with SessionLocal() as db_session:
+            for hour in range(17, 23):
+                reservation = Reservation(
+                    name="Bench", email="bench@example.com", num_people=2,
+                    date=date(2030, 6, 15), time=time(hour, 0),
+                )
+                db_session.add(reservation)
+                reserve_slots(db_session, reservation)
+            db_session.commit()
+    return app
+
+
+@contextmanager
+def synchronous_logging(app, handler):
+    """
+    Temporarily replace the queue handler with a handler on the request thread.
+    """
+    root_logger = logging.getLogger()
+    shutdown_logging()
+    root_logger.addHandler(handler)
+    app.logger.setLevel(logging.DEBUG)
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+    try:
+        yield
+    finally:
+        root_logger.removeHandler(handler)
+
+
+def run(client, count):
+    """
+    Issue `count` requests and return per-request latencies in milliseconds.
+    """
+    samples = []
+    for _ in range(count):
+        started = timer.perf_counter()
+        client.get("/get_available_slots/2030-06-15")
+        samples.append((timer.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    """
+    Print the median and p99 latency of a scenario.
+    """
+    p99 = statistics.quantiles(samples, n=100)[98]
+    print(f"{label:<28} {statistics.median(samples):>8.3f} {p99:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.1)
+    args = parser.parse_args()
+
+    app = seeded_app()
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = SlowFileHandler(os.path.join(tmp, "app.log"), args.sink_latency_ms / 1000)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        client = app.test_client()
+        run(client, 100)  # warm up
+
+        print(f"{'scenario':<28} {'p50 ms':>8} {'p99 ms':>8}")
+        with synchronous_logging(app, handler):
+            report("sync debug + SQL echo", run(client, args.requests))
+
+        configure_logging(app, level="DEBUG", sql_echo=True, handlers=[handler])
+        report("queued debug + SQL echo", run(client, args.requests))
+
+        configure_logging(app, handlers=[handler])
+        report("queued default", run(client, args.requests))
+
+        shutdown_logging()
+        handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark `/menu` requests per second across the menu and page caches.
+
+- per-request load: every request opens, parses and categorizes `menu.json`
+  and renders the template, as `/menu` originally did.
+- menu cache: the menu is parsed once, but the template is rendered on
+  every request.
+- page cache: the rendered page is served from memory.
+- conditional GET: the client revalidates with its ETag and gets a 304.
+
+`--items` pads the menu with synthetic items spread over several categories
+to show how a larger menu affects each approach.
+
+Usage:
+    python -m benchmarks.bench_menu [--requests 2000] [--items 0]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time as timer
+from unittest.mock import patch
+
+from app import create_app
+from config import Config
+from menu import MenuSnapshot, read_menu
+
+CATEGORIES = ("Food", "Drinks", "Desserts", "Specials")
+
+
+def padded_menu(path, items):
+    """
+    Write a copy of the shipped menu with `items` synthetic items appended.
+    """
+    with open(Config.MENU_PATH, "r") as file:
+        menu_data = json.load(file)
+    template = menu_data["items"][0]
+    for index in range(items):
+        menu_data["items"].append(dict(
+            template, category=CATEGORIES[index % len(CATEGORIES)], name=f"Item {index}"
+        ))
+    with open(path, "w") as file:
+        json.dump(menu_data, file)
+
+
+def requests_per_second(client, count, headers=None):
+    """
+    Issue `count` menu requests and return the throughput.
+    """
+    started = timer.perf_counter()
+    for _ in range(count):
+        client.get("/menu", headers=headers)
+    return count / (timer.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "menu.json")
+        padded_menu(path, args.items)
+        app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "MENU_PATH": path})
+        client = app.test_client()
+        etag = client.get("/menu").headers["ETag"]
+        requests_per_second(client, 100)  # warm up
+
+        # a fresh version on every request defeats the page cache
+        def per_request_load():
+            return MenuSnapshot(object(), None, read_menu(path))
+
+        cached_menu = app.extensions["menu"].get()
+
+        def menu_cache_only():
+            return MenuSnapshot(object(), None, cached_menu)
+
+        print(f"{'scenario':<20} {'requests/s':>12}")
+        for label, load_menu in (("per-request load", per_request_load),
+                                 ("menu cache", menu_cache_only)):
+            with patch("app.load_menu", load_menu):
+                print(f"{label:<20} {requests_per_second(client, args.requests):>12.0f}")
+        print(f"{'page cache':<20} {requests_per_second(client, args.requests):>12.0f}")
+        rate = requests_per_second(client, args.requests, {"If-None-Match": etag})
+        print(f"{'conditional GET':<20} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
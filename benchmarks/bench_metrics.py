@@ -0,0 +1,124 @@
+"""
+Measure the overhead of the request metrics on the busiest endpoints.
+
+The same requests are timed with `METRICS_ENABLED` off and on, alternating
+rounds so both see the same machine state, and the best round of each is
+compared:
+
+- availability: `GET /get_available_slots/<date>` with the availability
+  cache disabled, so every request runs its occupancy query.
+- booking page: `GET /reservations`, which renders the form template.
+- booking: `POST /reservations` for random slots of a month, each a
+  write transaction of several statements.
+
+Timings of whole requests vary by several percent between rounds on a
+busy machine, so the cost of the instrumentation itself is also measured
+in isolation: one request's hooks plus `--queries` timed statements.
+
+Usage:
+    python -m benchmarks.bench_metrics [--requests 2000] [--rounds 10] [--queries 3]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time as timer
+
+from app import create_app
+from database import initialize_db
+from metrics import Metrics
+
+
+def make_app(db_path, enabled):
+    """
+    Create an app on the benchmark database.
+    """
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "WTF_CSRF_ENABLED": False,
+        "AVAILABILITY_CACHE_SIZE": 0,
+        "LOG_LEVEL": "WARNING",
+        "METRICS_ENABLED": enabled,
+    })
+
+
+def scenarios(count):
+    """
+    Build the request lists of each scenario.
+    """
+    rng = random.Random(1)
+    dates = [f"2031-03-{day:02d}" for day in range(1, 29)]
+    times = ["17:00", "18:00", "19:00", "20:00", "21:00"]
+    return {
+        "availability": [("GET", f"/get_available_slots/{rng.choice(dates)}", None) for _ in range(count)],
+        "booking page": [("GET", "/reservations", None)] * count,
+        "booking": [
+            ("POST", "/reservations", {
+                "name": "Guest", "email": "guest@example.com", "num_people": 2,
+                "date": rng.choice(dates), "time": rng.choice(times), "duration": 1,
+            })
+            for _ in range(count // 4)
+        ],
+    }
+
+
+def run(db_path, enabled, requests):
+    """
+    Issue the requests to a fresh app and return the seconds per request.
+
+    The session registries are bound to the latest app, so each run
+    creates its own, and the other setting's engines are never used.
+    """
+    app = make_app(db_path, enabled)
+    client = app.test_client()
+    started = timer.perf_counter()
+    for method, path, data in requests:
+        client.open(path, method=method, data=data)
+    elapsed = timer.perf_counter() - started
+    for engine in set(app.extensions["database"].values()):
+        engine.dispose()
+    return elapsed / len(requests)
+
+
+def instrumentation_cost(queries, count=100_000):
+    """
+    Return the seconds the metrics add to a request running `queries` statements.
+    """
+    metrics = Metrics()
+    execute = metrics._timed(lambda cursor, statement, parameters, context=None: None)
+    started = timer.perf_counter()
+    for _ in range(count):
+        stats, token = metrics.start_request("/get_available_slots/<date_str>", "GET")
+        for _ in range(queries):
+            execute(None, "SELECT 1", ())
+        metrics.finish_request(stats, token, 200)
+    return (timer.perf_counter() - started) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        initialize_db(bind=make_app(db_path, False).extensions["database"]["engine"])
+
+        print(f"{'scenario':<14} {'off µs/req':>11} {'on µs/req':>10} {'overhead':>9}")
+        for label, requests in scenarios(args.requests).items():
+            run(db_path, False, requests[:100])  # warm up
+            best = {False: float("inf"), True: float("inf")}
+            for index in range(args.rounds):
+                for enabled in ((False, True) if index % 2 else (True, False)):
+                    best[enabled] = min(best[enabled], run(db_path, enabled, requests))
+            overhead = best[True] / best[False] - 1
+            print(f"{label:<14} {best[False] * 1e6:>11.0f} {best[True] * 1e6:>10.0f} {overhead:>9.1%}")
+
+        cost = instrumentation_cost(args.queries)
+        print(f"\ninstrumentation alone: {cost * 1e6:.1f} µs per request with {args.queries} statements")
+
+
+if __name__ == "__main__":
+    main()
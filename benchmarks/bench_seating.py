@@ -0,0 +1,105 @@
+"""
+Benchmark table lookups of the bitset seating plan against a per-table scan.
+
+A day is filled with random bookings until about `--fill` of the table
+slots are taken, then `--lookups` random "is there a table for N people
+from T for D hours" queries are answered by:
+
+- per-table scan: every table's booked intervals are checked for overlap
+  in order of seat count, the straightforward way to answer the question.
+- seating plan: `SeatingPlan.find_table`, a few integer operations per
+  covered slot however many tables there are.
+
+Both must pick the same table for every query.
+
+Usage:
+    python -m benchmarks.bench_seating [--tables 200] [--interval 15] [--lookups 20000]
+"""
+import argparse
+import random
+import time as timer
+from datetime import time
+
+from availability import generate_slots, to_minutes
+from seating import SeatingPlan
+
+OPENING_TIME = time(11, 0)
+CLOSING_TIME = time(23, 45)
+SEAT_COUNTS = (2, 2, 4, 4, 4, 6, 8)
+
+
+class PerTableScan:
+    """
+    Booked `(start, end)` minutes kept per table, checked one table at a time.
+    """
+
+    def __init__(self, tables):
+        self.tables = sorted(tables, key=lambda table: (table[1], table[0]))
+        self.booked = {table_id: [] for table_id, _ in self.tables}
+
+    def find_table(self, num_people, start_time, duration=1):
+        start = to_minutes(start_time)
+        end = start + duration * 60
+        for table_id, seats in self.tables:
+            if seats >= num_people and all(
+                end <= booked_start or booked_end <= start
+                for booked_start, booked_end in self.booked[table_id]
+            ):
+                return table_id
+        return None
+
+    def claim(self, table_id, start_time, duration=1):
+        start = to_minutes(start_time)
+        self.booked[table_id].append((start, start + duration * 60))
+
+
+def random_query(rng, slots):
+    return rng.randint(1, 8), rng.choice(slots), rng.randint(1, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--interval", type=int, default=15)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--fill", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tables = [(table_id, SEAT_COUNTS[table_id % len(SEAT_COUNTS)]) for table_id in range(1, args.tables + 1)]
+    plan = SeatingPlan(tables, args.interval, OPENING_TIME, CLOSING_TIME)
+    scan = PerTableScan(tables)
+    slots = generate_slots(args.interval, OPENING_TIME, CLOSING_TIME)
+
+    # fill the day; misses count too, so a fully booked day still terminates
+    bookings = 0
+    target = int(args.fill * args.tables * plan.slot_count)
+    taken = 0
+    for _ in range(target * 4):
+        if taken >= target:
+            break
+        num_people, start_time, duration = random_query(rng, slots)
+        table_id = plan.assign(num_people, start_time, duration)
+        if table_id is not None:
+            scan.claim(table_id, start_time, duration)
+            first, last = plan._slot_range(start_time, duration)
+            taken += last - first
+            bookings += 1
+
+    queries = [random_query(rng, slots) for _ in range(args.lookups)]
+    print(f"{args.tables} tables, {plan.slot_count} slots of {args.interval} minutes, "
+          f"{bookings} bookings, {taken / (args.tables * plan.slot_count):.0%} of table slots taken")
+    print(f"{'engine':<16} {'lookups/s':>12}")
+    answers = {}
+    for label, engine in (("per-table scan", scan), ("seating plan", plan)):
+        started = timer.perf_counter()
+        answers[label] = [engine.find_table(*query) for query in queries]
+        elapsed = timer.perf_counter() - started
+        print(f"{label:<16} {args.lookups / elapsed:>12.0f}")
+
+    assert answers["per-table scan"] == answers["seating plan"], "engines disagree"
+
+
+if __name__ == "__main__":
+    main()
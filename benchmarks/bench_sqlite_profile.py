@@ -0,0 +1,155 @@
+"""
+Benchmark mixed booking and availability load with and without the SQLite profile.
+
+Reader processes query a day's slot occupancy while writer processes book
+reservations, for a fixed duration per scenario:
+
+- default: SQLite's stock rollback journal, reads and writes on one pool.
+- performance: the "performance" profile (WAL, synchronous=NORMAL,
+  busy_timeout, cache and mmap sizing) with reads on a read-only pool.
+
+Throughput, p50 and p99 latency and failed operations are reported for each side.
+
+Usage:
+    python -m benchmarks.bench_sqlite_profile [--seconds 5] [--readers 8] [--writers 2]
+"""
+import argparse
+import os
+import random
+import statistics
+import multiprocessing
+import tempfile
+import time as timer
+from datetime import date, time, timedelta
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import build_engine, initialize_db
+from models import Reservation
+from occupancy import load_occupancy, reserve_slots
+
+FIRST_DAY = date(2030, 6, 1)
+DAYS = 30
+
+
+def writer(session_factory, deadline, latencies, failures, seed):
+    """
+    Book reservations on random days until the deadline.
+    """
+    rng = random.Random(seed)
+    while timer.perf_counter() < deadline:
+        started = timer.perf_counter()
+        try:
+            with session_factory() as db_session:
+                reservation = Reservation(
+                    name="Bench", email="bench@example.com", num_people=2,
+                    date=FIRST_DAY + timedelta(days=rng.randrange(DAYS)),
+                    time=time(rng.randint(17, 22), rng.choice((0, 30))),
+                )
+                db_session.add(reservation)
+                if reserve_slots(db_session, reservation, tables=10_000):
+                    db_session.commit()
+                else:
+                    db_session.rollback()
+        except OperationalError:
+            failures.append(1)
+            continue
+        latencies.append(timer.perf_counter() - started)
+
+
+def reader(session_factory, deadline, latencies, failures, seed):
+    """
+    Read the occupancy of random days until the deadline.
+    """
+    rng = random.Random(seed)
+    while timer.perf_counter() < deadline:
+        started = timer.perf_counter()
+        try:
+            with session_factory() as db_session:
+                load_occupancy(db_session, FIRST_DAY + timedelta(days=rng.randrange(DAYS)))
+        except OperationalError:
+            failures.append(1)
+            continue
+        latencies.append(timer.perf_counter() - started)
+
+
+def worker(role, path, profile, read_pool, seconds, seed, results):
+    """
+    Run one reader or writer in its own process and send back its results.
+
+    Separate processes keep the GIL out of the measurement, as with
+    multi-process server workers.
+    """
+    if role == "read" and read_pool:
+        engine = build_engine(f"sqlite:///{path}", profile=profile, read_only=True)
+    else:
+        engine = build_engine(f"sqlite:///{path}", profile=profile)
+    latencies, failures = [], []
+    loop = reader if role == "read" else writer
+    loop(sessionmaker(bind=engine), timer.perf_counter() + seconds, latencies, failures, seed)
+    engine.dispose()
+    results.put((role, latencies, failures))
+
+
+def run_scenario(path, profile, read_pool, seconds, readers, writers):
+    """
+    Run the mixed load against a fresh database and return the raw results.
+    """
+    engine = build_engine(f"sqlite:///{path}", profile=profile)
+    initialize_db(bind=engine)
+    engine.dispose()
+
+    results = multiprocessing.Queue()
+    roles = ["read"] * readers + ["write"] * writers
+    processes = [
+        multiprocessing.Process(
+            target=worker, args=(role, path, profile, read_pool, seconds, seed, results)
+        )
+        for seed, role in enumerate(roles)
+    ]
+    for process in processes:
+        process.start()
+
+    combined = {"read": ([], []), "write": ([], [])}
+    for _ in processes:
+        role, latencies, failures = results.get()
+        combined[role][0].extend(latencies)
+        combined[role][1].extend(failures)
+    for process in processes:
+        process.join()
+    return combined
+
+
+def report(label, latencies, failures, seconds):
+    """
+    Print throughput, latency percentiles and failures for one side of a scenario.
+    """
+    if len(latencies) < 2:
+        print(f"{label:<22} {len(latencies) / seconds:>9.0f} {'-':>8} {'-':>8} {len(failures):>7}")
+        return
+    p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+    p50 = statistics.median(latencies) * 1000
+    print(f"{label:<22} {len(latencies) / seconds:>9.0f} {p50:>8.3f} {p99:>8.3f} {len(failures):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<22} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for profile, read_pool in (("default", False), ("performance", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run_scenario(
+                os.path.join(tmp, "bench.db"), profile, read_pool,
+                args.seconds, args.readers, args.writers,
+            )
+        for side in ("read", "write"):
+            report(f"{profile} {side}", *results[side], args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Seed a database with synthetic reservations spread over several months.
+
+Every generated booking fits: it lies within its day's opening hours, no
+slot goes over capacity and each party is seated at a free table that
+seats it, so the seeded database behaves like real history. Days are
+filled to about `--fill` of their table slots, and the same `--seed`
+always produces the same rows.
+
+Usage:
+    python -m benchmarks.datagen instance/bench.db [--reservations 100000] [--start 2031-01-01] [--seed 42]
+"""
+import argparse
+import math
+import random
+import time as timer
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from database import build_engine, initialize_db
+from models import Reservation
+from occupancy import rebuild_occupancy
+from schedule import DEFAULT_SCHEDULE
+from seating import SeatingPlan, load_tables
+
+DURATIONS = (1, 1, 1, 2, 2, 3)
+"""
+tuple: Booking lengths in hours, drawn uniformly, so most bookings last an hour.
+"""
+
+NAMES = ("Dale Cooper", "Audrey Horne", "Shelly Johnson", "Pete Martell", "Lucy Moran", "Andy Brennan")
+
+
+def months_needed(count, fill=0.5, schedule=None):
+    """
+    Estimate the number of months of dates `count` reservations fill to `fill`.
+
+    Args:
+        count (int): The number of reservations.
+        fill (float): The target share of table slots booked, from 0 to 1.
+        schedule (schedule.Schedule, optional): The opening hours and capacity.
+
+    Returns:
+        int: At least one month.
+    """
+    schedule = schedule or DEFAULT_SCHEDULE
+    week = [schedule.weekdays[weekday] for weekday in range(7)]
+    table_slots_per_day = sum(len(day.slots) * day.tables for day in week) / 7
+    slots_per_booking = 60 / schedule.interval * sum(DURATIONS) / len(DURATIONS)
+    per_day = table_slots_per_day * fill / slots_per_booking
+    return max(1, math.ceil(count / (per_day * 30)))
+
+
+def generate_reservations(count, start, months, tables, rng, schedule=None, fill=0.5):
+    """
+    Generate reservation rows for the dates of `months` months from `start`.
+
+    Bookings are drawn at random dates, times, party sizes and durations,
+    and each is kept only if a table that seats the party is free for its
+    whole duration, so the rows never overbook a slot.
+
+    Args:
+        count (int): The number of reservations.
+        start (datetime.date): The first date.
+        months (int): The number of 30-day months to spread them over.
+        tables (list): `(table_id, seats)` pairs of the restaurant.
+        rng (random.Random): The source of randomness.
+        schedule (schedule.Schedule, optional): The opening hours and capacity.
+        fill (float): The share of a day's table slots booked at most.
+
+    Yields:
+        dict: `Reservation` column values, with `table_id`.
+
+    Raises:
+        ValueError: If the dates cannot hold `count` reservations at `fill`.
+    """
+    schedule = schedule or DEFAULT_SCHEDULE
+    days = [start + timedelta(days=offset) for offset in range(months * 30)]
+    days = [day for day in days if schedule.for_day(day).slots]
+    max_seats = max(seats for _, seats in tables)
+    plans = {}
+    booked_slots = {}  # day -> table slots taken
+    produced = 0
+    attempts = 0
+    while produced < count:
+        attempts += 1
+        if attempts > 50 * count + 1000:
+            raise ValueError(f"{count} reservations do not fit in {months} months at {fill:.0%} fill")
+
+        day = rng.choice(days)
+        day_schedule = schedule.for_day(day)
+        if booked_slots.get(day, 0) >= fill * len(day_schedule.slots) * day_schedule.tables:
+            continue
+        start_time = rng.choice(day_schedule.slots)
+        duration = rng.choice(DURATIONS)
+        num_people = rng.randint(1, max_seats)
+        if day not in plans:
+            plans[day] = SeatingPlan(
+                tables, day_schedule.interval, day_schedule.opening_time, day_schedule.closing_time
+            )
+        covered = len(day_schedule.covered_slots(start_time, duration))
+        table_id = plans[day].assign(num_people, start_time, duration)
+        if table_id is None:
+            continue
+
+        booked_slots[day] = booked_slots.get(day, 0) + covered
+        produced += 1
+        yield {
+            "name": rng.choice(NAMES),
+            "email": "guest@example.com",
+            "num_people": num_people,
+            "date": day,
+            "time": start_time,
+            "duration": duration,
+            "table_id": table_id,
+        }
+
+
+def seed_database(engine, count, start, seed=42, months=None, fill=0.5, schedule=None, batch_size=20_000):
+    """
+    Create the schema if needed and insert synthetic reservations.
+
+    The `slot_occupancy` table is rebuilt afterwards, so availability reads
+    see the new bookings.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The database to seed.
+        count (int): The number of reservations.
+        start (datetime.date): The first date.
+        seed (int): Seeds the random generator; the same seed gives the same rows.
+        months (int, optional): The number of 30-day months to spread them
+            over. Defaults to `months_needed(count, fill)`.
+        fill (float): The share of a day's table slots booked at most.
+        schedule (schedule.Schedule, optional): The opening hours and capacity.
+        batch_size (int): Rows inserted per statement.
+
+    Returns:
+        tuple: The first and last date of the seeded range.
+    """
+    schedule = schedule or DEFAULT_SCHEDULE
+    months = months or months_needed(count, fill, schedule)
+    initialize_db(bind=engine)
+    with Session(engine) as db_session:
+        rows = generate_reservations(
+            count, start, months, load_tables(db_session), random.Random(seed), schedule, fill
+        )
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                db_session.execute(insert(Reservation), batch)
+                batch = []
+        if batch:
+            db_session.execute(insert(Reservation), batch)
+        rebuild_occupancy(db_session, schedule=schedule)
+        db_session.commit()
+    return start, start + timedelta(days=months * 30 - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="The SQLite file to seed; created if missing.")
+    parser.add_argument("--reservations", type=int, default=100_000)
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2031, 1, 1))
+    parser.add_argument("--months", type=int, help="Defaults to enough months for --fill.")
+    parser.add_argument("--fill", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = build_engine(f"sqlite:///{args.path}")
+    started = timer.perf_counter()
+    first, last = seed_database(
+        engine, args.reservations, args.start, seed=args.seed, months=args.months, fill=args.fill
+    )
+    engine.dispose()
+    print(f"Seeded {args.reservations} reservations from {first} to {last} "
+          f"in {timer.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
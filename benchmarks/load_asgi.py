@@ -0,0 +1,178 @@
+"""
+Load test the availability and booking endpoints, WSGI against ASGI, one process each.
+
+The same app is served three ways, each in a single process:
+
+- wsgi sync: a gunicorn sync worker, handling one request at a time.
+- wsgi threaded: a gunicorn gthread worker with `--threads` threads.
+- asgi: uvicorn serving `asgi.create_asgi_app`, which answers these two
+  endpoints on the event loop with an aiosqlite engine.
+
+For each concurrency level, that many clients send requests back to back
+for `--seconds`: `GET /get_available_slots/<date>` for random dates of a
+month, and one `POST /reservations` in every `--post-every` requests. The
+availability cache is disabled, so every request reaches the database.
+
+Requires gunicorn (`pip install gunicorn`) for the WSGI servers.
+
+Usage:
+    python -m benchmarks.load_asgi [--seconds 5] [--concurrency 1 16 64] [--threads 16]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import tempfile
+import time as timer
+from urllib.parse import urlencode
+
+SERVERS = ("wsgi sync", "wsgi threaded", "asgi")
+
+
+def serve(kind, port, db_path, threads):
+    """
+    Run one server in this process until it is terminated.
+    """
+    from app import create_app
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "WTF_CSRF_ENABLED": False,
+        "AVAILABILITY_CACHE_SIZE": 0,
+        "LOG_LEVEL": "WARNING",
+    })
+    if kind == "asgi":
+        import uvicorn
+        from asgi import create_asgi_app
+
+        uvicorn.run(create_asgi_app(app), host="127.0.0.1", port=port, log_level="warning",
+                    access_log=False, backlog=1024)
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"127.0.0.1:{port}")
+            self.cfg.set("workers", 1)
+            self.cfg.set("threads", threads if kind == "wsgi threaded" else 1)
+            self.cfg.set("backlog", 1024)
+            self.cfg.set("loglevel", "warning")
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
+def wait_for_port(port, timeout=15):
+    deadline = timer.monotonic() + timeout
+    while timer.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        timer.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_request(rng, post):
+    """
+    Build a raw HTTP/1.1 request for one availability lookup or booking.
+    """
+    day = f"2031-03-{rng.randint(1, 31):02d}"
+    if not post:
+        return f"GET /get_available_slots/{day} HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n".encode()
+    body = urlencode({
+        "name": "Load Test", "email": "load@example.com", "num_people": rng.randint(1, 6),
+        "date": day, "time": f"{rng.randint(17, 22)}:{rng.choice(('00', '30'))}", "duration": 1,
+    })
+    return (
+        "POST /reservations HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n"
+        "Content-Type: application/x-www-form-urlencoded\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n{body}"
+    ).encode()
+
+
+async def client(port, deadline, rng, post_every, latencies, errors):
+    """
+    Send requests back to back until the deadline, recording their latency.
+    """
+    count = 0
+    while timer.perf_counter() < deadline:
+        count += 1
+        request = build_request(rng, post=count % post_every == 0)
+        started = timer.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            ok = response.startswith(b"HTTP/1.1 200") or response.startswith(b"HTTP/1.0 200")
+        except OSError:
+            ok = False
+        if ok:
+            latencies.append(timer.perf_counter() - started)
+        else:
+            errors.append(1)
+
+
+async def load(port, concurrency, seconds, post_every, seed):
+    latencies, errors = [], []
+    deadline = timer.perf_counter() + seconds
+    await asyncio.gather(*(
+        client(port, deadline, random.Random(seed + index), post_every, latencies, errors)
+        for index in range(concurrency)
+    ))
+    return latencies, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--post-every", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    from app import create_app
+    from database import initialize_db
+
+    print(f"{'server':<14} {'clients':>7} {'requests/s':>11} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in SERVERS:
+            db_path = os.path.join(tmp, f"{kind.replace(' ', '_')}.db")
+            setup = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}", "LOG_LEVEL": "WARNING"})
+            initialize_db(bind=setup.extensions["database"]["engine"])
+            setup.extensions["database"]["engine"].dispose()
+
+            port = free_port()
+            server = multiprocessing.Process(target=serve, args=(kind, port, db_path, args.threads))
+            server.start()
+            try:
+                wait_for_port(port)
+                for concurrency in args.concurrency:
+                    latencies, errors = asyncio.run(
+                        load(port, concurrency, args.seconds, args.post_every, seed=concurrency)
+                    )
+                    latencies.sort()
+                    p50 = statistics.median(latencies) * 1000 if latencies else 0
+                    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+                    print(f"{kind:<14} {concurrency:>7} {len(latencies) / args.seconds:>11.0f} "
+                          f"{p50:>8.1f} {p95:>8.1f} {errors:>7}")
+            finally:
+                server.terminate()
+                server.join()
+
+
+if __name__ == "__main__":
+    main()
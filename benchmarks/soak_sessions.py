@@ -0,0 +1,105 @@
+"""
+Soak test: confirm database connections stay flat over many requests.
+
+Drives a mix of successful and failing requests through the Flask test
+client against a pooled SQLite file database, and samples the read and write
+connection pools at regular checkpoints. Every checkpoint must show no
+connection still checked out and no more open connections than the pools keep.
+
+Usage:
+    python -m benchmarks.soak_sessions [--requests 100000] [--checkpoint 10000]
+"""
+import argparse
+import itertools
+import os
+import tempfile
+from unittest.mock import patch
+
+from app import create_app
+from database import POOL_OPTIONS, initialize_db
+
+
+def request_mix():
+    """
+    Yield request callables covering success and error paths.
+    """
+    def available_slots(client, index):
+        return client.get(f"/get_available_slots/2030-{index % 12 + 1:02d}-15")
+
+    def invalid_time(client, index):
+        # fails with a server error after the session was opened
+        return client.get("/get_available_slots/2030-06-15?time=late")
+
+    def booking(client, index):
+        return client.post("/reservations", data={
+            "name": "Soak", "email": "soak@example.com", "num_people": 2,
+            "date": f"2030-{index % 12 + 1:02d}-{index % 28 + 1:02d}", "time": "19:00",
+        })
+
+    def invalid_booking(client, index):
+        return client.post("/reservations", data={"name": "Soak", "email": "nope"})
+
+    return itertools.cycle((available_slots, invalid_time, booking, invalid_booking))
+
+
+def soak(requests, checkpoint, database_path):
+    """
+    Run the request mix and sample the pool every `checkpoint` requests.
+
+    Args:
+        requests (int): The total number of requests.
+        checkpoint (int): The number of requests between samples.
+        database_path (str): The SQLite file to use.
+
+    Returns:
+        list: `(requests_done, checked_out, open_connections)` samples.
+    """
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{database_path}",
+        "AVAILABILITY_CACHE_SIZE": 0,
+        "WTF_CSRF_ENABLED": False,
+        "PROPAGATE_EXCEPTIONS": False,
+    })
+    engine = app.extensions["database"]["engine"]
+    read_engine = app.extensions["database"]["read_engine"]
+    initialize_db(bind=engine)
+    samples = []
+
+    with patch.object(app.logger, "disabled", True):  # skip expected error tracebacks
+        client = app.test_client()
+        mix = request_mix()
+        for index in range(1, requests + 1):
+            next(mix)(client, index)
+            if index % checkpoint == 0:
+                pools = (engine.pool, read_engine.pool)
+                checked_out = sum(pool.checkedout() for pool in pools)
+                checked_in = sum(pool.checkedin() for pool in pools)
+                samples.append((index, checked_out, checked_in + checked_out))
+
+    engine.dispose()
+    read_engine.dispose()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--checkpoint", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        samples = soak(args.requests, args.checkpoint, os.path.join(tmp, "soak.db"))
+
+    print(f"{'requests':>10} {'checked out':>12} {'open':>6}")
+    for done, checked_out, open_connections in samples:
+        print(f"{done:>10} {checked_out:>12} {open_connections:>6}")
+
+    leaked = any(checked_out for _, checked_out, _ in samples)
+    grew = any(open_connections > 2 * POOL_OPTIONS["pool_size"] for _, _, open_connections in samples)
+    if leaked or grew:
+        raise SystemExit("Connection count did not stay flat.")
+    print("Connection count stayed flat.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+Run the benchmark suite and compare it with the stored baseline.
+
+Two parts, both in-process and seeded, so runs on one machine are comparable:
+
+- availability: `get_available_slots` called directly for random dates of
+  a database seeded with each of `--sizes` reservations by
+  `benchmarks.datagen`, with the availability cache disabled.
+- load: `--concurrency` threads with their own test clients drive `/`,
+  `/menu`, `/get_available_slots/<date>` and `POST /reservations` in turn,
+  each for `--seconds`, against a database of `--load-rows` reservations.
+
+Each benchmark runs `--repeat` times and keeps the best value of each
+figure, the run least disturbed by the rest of the machine. Each result
+reports throughput and p50/p95/p99 latency. Results are compared with
+`--baseline` (default `benchmarks/baseline.json`): a throughput more than
+`--tolerance` below the baseline, or a p50 or p95 latency more than
+`--tolerance` above it, is a regression and the run exits with status 1.
+
+The machine's speed drifts on shared hardware, so each benchmark also
+times a fixed pure-Python loop, `reference_ms`, and the baseline is scaled
+by how much slower or faster that loop ran than when the baseline was
+recorded. Load results share the machine with the client threads and
+SQLite's write lock, so their tails depend on thread scheduling: only
+their throughput and p50 are checked, against the looser
+`--load-tolerance`. p99 is never checked, as a handful of slow samples
+moves it. Baselines depend on the machine; record them on the machine
+that checks them with `--update-baseline`.
+
+Usage:
+    python -m benchmarks.suite [--quick] [--update-baseline] [--tolerance 0.3] [--load-tolerance 0.5]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time as timer
+from datetime import date, timedelta
+
+from app import create_app, get_available_slots
+from benchmarks.datagen import seed_database
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+START = date(2031, 1, 1)
+CHECKED = {"throughput": "higher", "p50_ms": "lower", "p95_ms": "lower"}
+LOAD_CHECKED = {"throughput": "higher", "p50_ms": "lower"}
+
+
+def summarize(latencies, seconds=None):
+    """
+    Summarize latency samples in seconds.
+
+    Args:
+        latencies (list): Per-call latencies in seconds.
+        seconds (float, optional): The wall time the samples took; defaults
+            to their sum, for calls made one after another.
+
+    Returns:
+        dict: `throughput` per second and `p50_ms`, `p95_ms` and `p99_ms`.
+    """
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "throughput": round(len(latencies) / (seconds or sum(latencies)), 1),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+def reference_ms(rounds=5):
+    """
+    Time a fixed pure-Python workload, best of `rounds`, as a measure of the machine's current speed.
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        started = timer.perf_counter()
+        total = 0
+        for number in range(200_000):
+            total += number % 7
+        best = min(best, timer.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def best_of(summaries):
+    """
+    Combine repeated runs of a benchmark, keeping the best value of each figure.
+
+    The best run is the one least disturbed by the rest of the machine, so
+    it varies least between runs.
+    """
+    best = {}
+    for figure in summaries[0]:
+        values = [summary[figure] for summary in summaries]
+        best[figure] = max(values) if figure == "throughput" else min(values)
+    return best
+
+
+def make_app(db_path):
+    """
+    Create an app on a benchmark database, with caches that would hide the work disabled.
+    """
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "WTF_CSRF_ENABLED": False,
+        "AVAILABILITY_CACHE_SIZE": 0,
+        "LOG_LEVEL": "WARNING",
+        "SLOW_QUERY_THRESHOLD": 5,  # bookings queue on the write lock by design
+    })
+
+
+def dispose(app):
+    """
+    Close an app's connection pools.
+    """
+    for engine in set(app.extensions["database"].values()):
+        engine.dispose()
+
+
+def bench_availability(tmp, sizes, calls, repeat):
+    """
+    Time `get_available_slots` on databases of each size, best of `repeat` runs.
+
+    Returns:
+        dict: Results keyed "get_available_slots[<rows> rows]".
+    """
+    results = {}
+    for size in sizes:
+        db_path = os.path.join(tmp, f"availability-{size}.db")
+        app = make_app(db_path)
+        first, last = seed_database(app.extensions["database"]["engine"], size, START)
+        rng = random.Random(size)
+        days = [first + timedelta(days=rng.randrange((last - first).days + 1)) for _ in range(calls)]
+        summaries = []
+        with app.app_context():
+            for day in days[:50]:  # warm up
+                get_available_slots(day)
+            for _ in range(repeat):
+                latencies = []
+                for day in days:
+                    started = timer.perf_counter()
+                    get_available_slots(day)
+                    latencies.append(timer.perf_counter() - started)
+                summaries.append(dict(summarize(latencies), reference_ms=reference_ms()))
+        dispose(app)
+        results[f"get_available_slots[{size} rows]"] = best_of(summaries)
+    return results
+
+
+def route_requests(first, last):
+    """
+    Build the request generator of each load-tested route.
+
+    Each generator takes a `random.Random` and returns `(method, path, data)`.
+    Bookings go to dates after the seeded range, so most of them succeed
+    and each one runs the whole booking transaction.
+    """
+    seeded_days = (last - first).days + 1
+    times = ["17:00", "17:30", "18:00", "19:00", "20:00", "21:00", "21:30"]
+
+    def availability(rng):
+        day = first + timedelta(days=rng.randrange(seeded_days))
+        return "GET", f"/get_available_slots/{day.isoformat()}", None
+
+    def booking(rng):
+        day = last + timedelta(days=1 + rng.randrange(365))
+        return "POST", "/reservations", {
+            "name": "Load Test", "email": "load@example.com", "num_people": rng.randint(1, 4),
+            "date": day.isoformat(), "time": rng.choice(times), "duration": rng.choice((1, 2)),
+        }
+
+    return {
+        "GET /": lambda rng: ("GET", "/", None),
+        "GET /menu": lambda rng: ("GET", "/menu", None),
+        "GET /get_available_slots/<date_str>": availability,
+        "POST /reservations": booking,
+    }
+
+
+def drive(app, make_request, concurrency, seconds):
+    """
+    Send requests from `concurrency` threads for `seconds` and time each one.
+
+    Returns:
+        dict: The `summarize` figures plus the number of `errors`, requests
+              that raised or got a status of 400 or above.
+    """
+    deadline = timer.perf_counter() + seconds
+    latencies = []
+    errors = []
+    start_barrier = threading.Barrier(concurrency)
+
+    def client_loop(seed):
+        client = app.test_client()
+        rng = random.Random(seed)
+        own_latencies = []
+        own_errors = 0
+        start_barrier.wait()
+        while timer.perf_counter() < deadline:
+            method, path, data = make_request(rng)
+            started = timer.perf_counter()
+            try:
+                status = client.open(path, method=method, data=data).status_code
+            except Exception:
+                status = 500
+            own_latencies.append(timer.perf_counter() - started)
+            own_errors += status >= 400
+        latencies.extend(own_latencies)
+        errors.append(own_errors)
+
+    started = timer.perf_counter()
+    threads = [threading.Thread(target=client_loop, args=(seed,)) for seed in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return dict(summarize(latencies, timer.perf_counter() - started), errors=sum(errors))
+
+
+def bench_load(tmp, rows, concurrency, seconds, repeat):
+    """
+    Load test each route in turn against one seeded database, best of `repeat` runs.
+
+    Returns:
+        dict: Results keyed "<method> <route> x<concurrency>".
+    """
+    app = make_app(os.path.join(tmp, "load.db"))
+    first, last = seed_database(app.extensions["database"]["engine"], rows, START)
+    results = {}
+    for label, make_request in route_requests(first, last).items():
+        drive(app, make_request, concurrency, min(seconds, 0.5))  # warm up
+        runs = []
+        for _ in range(repeat):
+            run = drive(app, make_request, concurrency, seconds)
+            runs.append(dict(run, reference_ms=reference_ms()))
+        results[f"{label} x{concurrency}"] = dict(
+            best_of([{figure: run[figure] for figure in run if figure != "errors"} for run in runs]),
+            errors=sum(run["errors"] for run in runs),
+        )
+    dispose(app)
+    return results
+
+
+def compare(results, baseline, tolerance, checked=CHECKED):
+    """
+    Find the results that regressed against the baseline.
+
+    Baseline figures are first scaled by the ratio of the result's
+    `reference_ms` to the baseline's, when both have one.
+
+    Args:
+        results (dict): Benchmark names mapped to their figures.
+        baseline (dict): The same, from a previous run.
+        tolerance (float): The allowed relative change, e.g. 0.3 for 30%.
+        checked (dict): The figures to check, mapped to "higher" or "lower"
+            for the direction that is better.
+
+    Returns:
+        list: `(name, figure, scaled baseline value, value)` for every regression.
+              Benchmarks or figures missing from the baseline are skipped.
+    """
+    regressions = []
+    for name, figures in results.items():
+        base = baseline.get(name, {})
+        slowdown = 1.0
+        if figures.get("reference_ms") and base.get("reference_ms"):
+            slowdown = figures["reference_ms"] / base["reference_ms"]
+        for figure, better in checked.items():
+            expected = base.get(figure)
+            if expected is None:
+                continue
+            expected = expected / slowdown if better == "higher" else expected * slowdown
+            value = figures[figure]
+            if better == "higher" and value < expected * (1 - tolerance):
+                regressions.append((name, figure, round(expected, 3), value))
+            elif better == "lower" and value > expected * (1 + tolerance):
+                regressions.append((name, figure, round(expected, 3), value))
+    return regressions
+
+
+def report(results, baseline):
+    """
+    Print every result next to its baseline.
+    """
+    print(
+        f"{'benchmark':<48} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'base req/s':>11} {'base p95':>9} {'speed':>6}"
+    )
+    for name, figures in results.items():
+        base = baseline.get(name, {})
+        print(
+            f"{name:<48} {figures['throughput']:>9.1f} {figures['p50_ms']:>8.2f} "
+            f"{figures['p95_ms']:>8.2f} {figures['p99_ms']:>8.2f} "
+            f"{base.get('throughput', float('nan')):>11.1f} {base.get('p95_ms', float('nan')):>9.2f} "
+            f"{base.get('reference_ms', float('nan')) / figures['reference_ms']:>6.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--load-rows", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true",
+                        help="Smaller databases and shorter runs, to check the suite itself works.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--load-tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+    if args.quick:
+        args.sizes, args.calls, args.load_rows, args.seconds, args.repeat = [1_000], 200, 2_000, 0.5, 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        micro = bench_availability(tmp, args.sizes, args.calls, args.repeat)
+        load = bench_load(tmp, args.load_rows, args.concurrency, args.seconds, args.repeat)
+    results = dict(micro, **load)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+    report(results, baseline)
+
+    failed = [name for name, figures in results.items() if figures.get("errors")]
+    for name in failed:
+        print(f"ERRORS: {name} had {results[name]['errors']} failed requests")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(dict(baseline, **results), file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline written to {args.baseline}.")
+        return
+
+    regressions = compare(micro, baseline, args.tolerance) + compare(load, baseline, args.load_tolerance, LOAD_CHECKED)
+    for name, figure, expected, value in regressions:
+        print(f"REGRESSION: {name} {figure} {value} vs baseline {expected}")
+    if regressions or failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import csv
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, update
+
+from models import Reservation, SlotOccupancy
+from occupancy import insert_counters
+from schedule import DEFAULT_SCHEDULE
+from seating import load_seating_plans
+from validation import FIELDS, validate_reservation
+
+
+CHUNK_SIZE = 5000
+"""
+int: Records validated, capacity-checked and inserted per transaction.
+"""
+
+RECORD_FIELDS = FIELDS
+
+FULLY_BOOKED = "This time slot is fully booked."
+OUTSIDE_OPENING_HOURS = "This time is outside opening hours."
+NO_TABLE = "No table for this party size is free at this time."
+
+
+def read_records(path, file_format=None):
+    """
+    Stream reservation records from a CSV or JSON Lines file.
+
+    CSV files need a header row naming the `RECORD_FIELDS` columns; JSONL
+    files hold one JSON object per line.
+
+    Args:
+        path (str): The file to read.
+        file_format (str, optional): "csv" or "jsonl". Defaults to the file extension.
+
+    Yields:
+        dict: One record per row or line.
+    """
+    file_format = file_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "r", newline="") as file:
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def validate_record(record):
+    """
+    Validate one record against the `ReservationForm` rules.
+
+    Records are checked with `validation.validate_reservation`, the core the
+    form itself validates with, so no form is built per record.
+
+    Args:
+        record (dict): The submitted reservation fields.
+
+    Returns:
+        tuple: `(values, errors)`. `values` holds the `Reservation` column
+            values, or is None when `errors` maps field names to the error
+            message of each invalid field.
+    """
+    if not isinstance(record, dict):
+        return None, {"record": "Expected an object with reservation fields."}
+    return validate_reservation(record)
+
+
+def import_reservations(db_session, records, schedule=None, chunk_size=CHUNK_SIZE):
+    """
+    Validate, capacity-check and insert reservation records in chunks.
+
+    Each chunk of records is handled in one transaction:
+
+    1. Every record is validated with the `ReservationForm` rules.
+    2. Occupancy counters for all slots the valid records cover are created,
+       and the counters of the chunk's dates are read with `FOR UPDATE`
+       row locks (on SQLite, the insert takes the write lock instead), so
+       no other booking can change them until the chunk commits.
+    3. The counters and the seating plans of the chunk's dates are read
+       once and the records are checked against them in order, each
+       accepted record claiming its slots and the smallest free table that
+       seats it, so capacity is enforced across the chunk as a whole as well
+       as against earlier bookings.
+    4. Accepted reservations are inserted and the changed counters updated
+       with one `executemany` each, then the chunk commits.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to write with. It is
+            committed after every chunk.
+        records (iterable): Dicts with the `RECORD_FIELDS` keys.
+        schedule (schedule.Schedule, optional): The opening hours and
+            capacity. Defaults to `schedule.DEFAULT_SCHEDULE`.
+        chunk_size (int): The number of records per transaction.
+
+    Returns:
+        list: One result per record, in input order:
+            `{"index": i, "accepted": True, "date": "YYYY-MM-DD"}` or
+            `{"index": i, "accepted": False, "errors": {...}}`.
+    """
+    schedule = schedule or DEFAULT_SCHEDULE
+    results = []
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            results.extend(_import_chunk(db_session, chunk, len(results), schedule))
+            chunk = []
+    if chunk:
+        results.extend(_import_chunk(db_session, chunk, len(results), schedule))
+    return results
+
+
+def _import_chunk(db_session, chunk, offset, schedule):
+    """
+    Import one chunk of records in a single transaction, see `import_reservations`.
+    """
+    results = []
+    candidates = []
+    for index, record in enumerate(chunk, start=offset):
+        values, errors = validate_record(record)
+        slots = (
+            schedule.for_day(values["date"]).covered_slots(values["time"], values["duration"])
+            if values else []
+        )
+        if values and not slots:
+            errors = {"time": OUTSIDE_OPENING_HOURS}
+        if errors:
+            results.append({"index": index, "accepted": False, "errors": errors})
+        else:
+            results.append({"index": index, "accepted": True})
+            candidates.append((results[-1], values, slots))
+
+    if not candidates:
+        return results
+
+    keys = {(values["date"], slot_time) for _, values, slots in candidates for slot_time in slots}
+    insert_counters(db_session, keys)
+    rows = db_session.execute(
+        select(SlotOccupancy.date, SlotOccupancy.slot_time, SlotOccupancy.booked)
+        .where(SlotOccupancy.date.in_({day for day, _ in keys}))
+        .order_by(SlotOccupancy.date, SlotOccupancy.slot_time)
+        .with_for_update()
+    )
+    occupancy = {(row.date, row.slot_time): row.booked for row in rows}
+    plans = load_seating_plans(db_session, {day for day, _ in keys}, schedule=schedule)
+
+    accepted = []
+    changed = set()
+    for result, values, slots in candidates:
+        day = values["date"]
+        tables = schedule.for_day(day).tables
+        if any(occupancy[(day, slot_time)] >= tables for slot_time in slots):
+            result.update(accepted=False, errors={"time": FULLY_BOOKED})
+            continue
+        table_id = plans[day].assign(values["num_people"], values["time"], values["duration"])
+        if table_id is None:
+            result.update(accepted=False, errors={"time": NO_TABLE})
+            continue
+        for slot_time in slots:
+            occupancy[(day, slot_time)] += 1
+            changed.add((day, slot_time))
+        result["date"] = day.isoformat()
+        accepted.append(dict(values, table_id=table_id))
+
+    if accepted:
+        created_at = datetime.now(timezone.utc)
+        db_session.execute(
+            insert(Reservation), [dict(values, created_at=created_at) for values in accepted]
+        )
+        db_session.execute(
+            update(SlotOccupancy),
+            [
+                {"date": day, "slot_time": slot_time, "booked": occupancy[(day, slot_time)]}
+                for day, slot_time in changed
+            ],
+        )
+    db_session.commit()
+    return results
@@ -0,0 +1,271 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+class SQLiteCacheBackend:
+    """
+    A shared invalidation store that keeps worker process caches coherent.
+
+    Each date has a generation counter in a small SQLite file that every
+    worker opens. Invalidating a date bumps its generation, and entries cached
+    under an older generation are treated as misses in all processes. Only
+    the counters are shared; cached values stay in each process.
+
+    Args:
+        path (str): The SQLite file shared by all workers.
+        timeout (float): Seconds to wait for another worker's write lock.
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache_generations "
+                "(date TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+
+    def _connection(self):
+        """
+        Return this thread's connection to the shared file.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def generation(self, day):
+        """
+        Return the current generation of a date, 0 if it was never invalidated.
+        """
+        row = self._connection().execute(
+            "SELECT generation FROM cache_generations WHERE date = ?", (day.isoformat(),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, day):
+        """
+        Advance the generation of a date, invalidating it in every process.
+        """
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO cache_generations (date, generation) VALUES (?, 1) "
+                "ON CONFLICT(date) DO UPDATE SET generation = generation + 1",
+                (day.isoformat(),),
+            )
+
+
+class AvailabilityCache:
+    """
+    An in-process LRU cache of computed availability with TTL expiry.
+
+    Keys are `(date, tables, interval, schedule version)` tuples. Entries expire `ttl` seconds
+    after they are stored, and the least recently used entry is evicted once
+    `maxsize` is exceeded. `invalidate` drops every entry for a date and,
+    when a shared backend is configured, invalidates it in other processes
+    too.
+
+    Every invalidation advances the date's generation. Callers read it with
+    `generation` before computing a value and pass it to `set`, which drops
+    the value if the date was invalidated in the meantime, since it may have
+    been computed from the bookings before the change.
+
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that were missing, expired or stale.
+
+    Args:
+        maxsize (int): The maximum number of entries kept. Default is 512.
+        ttl (float): Seconds an entry stays valid. Default is 30.
+        backend (SQLiteCacheBackend, optional): Shared invalidation store.
+        clock (callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, maxsize=512, ttl=30, backend=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, generation, value)
+        self._generations = {}  # date -> local invalidations, without a backend
+        self._lock = threading.Lock()
+
+    def generation(self, day):
+        """
+        Return a date's invalidation generation, shared by all processes with a backend.
+        """
+        if self.backend:
+            return self.backend.generation(day)
+        with self._lock:
+            return self._generations.get(day, 0)
+
+    def get(self, key, generation=None):
+        """
+        Look up a cached value.
+
+        Args:
+            key (tuple): A cache key starting with the date.
+            generation (int, optional): The date's generation, if already
+                read with `generation`.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        if generation is None:
+            generation = self.generation(key[0])
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock() or entry[1] != generation:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, generation=None):
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (tuple): A cache key starting with the date.
+            value: The value to cache. Callers must not mutate it afterwards.
+            generation (int, optional): The date's generation read before
+                `value` was computed. If the date has been invalidated since,
+                the value is not stored. Defaults to the current generation.
+
+        Returns:
+            bool: Whether the value was stored.
+        """
+        current = self.backend.generation(key[0]) if self.backend else None
+
+        with self._lock:
+            if current is None:
+                current = self._generations.get(key[0], 0)
+            if generation is not None and generation != current:
+                return False
+            generation = current
+            self._entries[key] = (self.clock() + self.ttl, generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, day):
+        """
+        Drop every entry for a date, in all processes sharing the backend.
+
+        Args:
+            day (datetime.date): The date whose availability changed.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == day]:
+                del self._entries[key]
+            if not self.backend:
+                self._generations[day] = self._generations.get(day, 0) + 1
+
+        if self.backend:
+            self.backend.bump(day)
+
+    def clear(self):
+        """
+        Drop all local entries and reset the hit and miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Report the cache counters.
+
+        Returns:
+            dict: `hits`, `misses` and the current number of entries as `size`.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+CachedPage = namedtuple("CachedPage", ["body", "etag", "last_modified"])
+"""
+namedtuple: A rendered page with its strong ETag (a hash of `body`) and
+            the time its content last changed.
+"""
+
+
+class PageCache:
+    """
+    Rendered pages keyed by route, each valid for one content version.
+
+    Only the latest version of each page is kept: looking a page up with a
+    different version is a miss, and storing the new rendering replaces the
+    old one, so edits to a page's sources invalidate it without any explicit
+    call.
+
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to render.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # key -> (version, CachedPage)
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """
+        Look up a rendered page.
+
+        Args:
+            key (hashable): Identifies the page, e.g. its endpoint.
+            version (hashable): The current version of the page's content.
+
+        Returns:
+            CachedPage: The page rendered for `version`, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, version, body, last_modified):
+        """
+        Store a rendered page, replacing any older version of it.
+
+        Args:
+            key (hashable): Identifies the page.
+            version (hashable): The content version `body` was rendered from.
+            body (bytes): The rendered page.
+            last_modified (datetime.datetime): When the content last changed.
+
+        Returns:
+            CachedPage: The stored page.
+        """
+        page = CachedPage(body, hashlib.sha256(body).hexdigest()[:32], last_modified)
+        with self._lock:
+            self._entries[key] = (version, page)
+        return page
+
+    def clear(self):
+        """
+        Drop all pages and reset the hit and miss counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -1,47 +1,454 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from models import Base
+import logging
+import os
+import threading
 
+from flask import current_app, has_app_context
+from flask.globals import app_ctx
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from models import Base, DiningTable, SlotOccupancy
+from occupancy import COUNTER_INSERTS, rebuild_occupancy
+from seating import DEFAULT_TABLE_SEATS
 
-print("Running database.py")
 
-# database connection URI
-DATABASE_URI = "sqlite:///instance/reservations.db"
+logger = logging.getLogger(__name__)
+
+# default database file, inside the app's instance folder
+DATABASE_FILENAME = "reservations.db"
+"""
+str: The SQLite file used when `SQLALCHEMY_DATABASE_URI` is not configured.
+"""
+
+# connection pool settings
+POOL_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+}
+"""
+dict: Default connection pool settings for file and server databases.
+      `pool_size` connections stay open, up to `max_overflow` more are opened
+      under load, and a request waits at most `pool_timeout` seconds for one.
+      `pool_pre_ping` replaces connections that went stale.
+"""
+
+SERVER_POOL_RECYCLE = 1800
+"""
+int: Seconds after which server database connections are replaced, before
+     the server or a proxy closes them as idle.
 """
-str: The URI for connecting to the SQLite database. 
-     Uses a relative path pointing to 'instance/reservations.db'.
+
+# SQLite connection profiles
+SQLITE_PROFILES = {
+    "default": {},
+    "performance": {
+        "auto_vacuum": "INCREMENTAL",  # only takes effect on a new file
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,  # milliseconds
+        "cache_size": -64000,  # 64 MB
+        "mmap_size": 268435456,  # 256 MB
+    },
+}
+"""
+dict: PRAGMA settings applied to every new SQLite connection, by profile name.
+      "performance" uses the write-ahead log so bookings no longer block
+      availability reads, waits for a busy writer instead of failing with
+      "database is locked", and enlarges the page cache and memory map.
+      New files are created in incremental auto-vacuum mode, so the space
+      archiving frees can be returned to the filesystem a little at a time
+      (`archive.vacuum_pages`) instead of by a full `VACUUM`.
+      "default" keeps SQLite's stock settings.
 """
 
-# create SQLALchemy engine
-engine = create_engine(DATABASE_URI, echo=True)
+
+def apply_sqlite_profile(engine, pragmas):
+    """
+    Apply PRAGMA settings to every connection the engine opens.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The SQLite engine to configure.
+        pragmas (dict): PRAGMA names mapped to their values.
+
+    Returns:
+        None
+    """
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def is_memory_uri(uri):
+    """
+    Check whether a URI points at an in-memory SQLite database.
+
+    Args:
+        uri (str): The database URI.
+
+    Returns:
+        bool: True for "sqlite://" and "sqlite:///:memory:".
+    """
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def read_only_uri(uri):
+    """
+    Turn a SQLite file URI into one that opens the file read-only.
+
+    Args:
+        uri (str): A URI such as "sqlite:///instance/reservations.db".
+
+    Returns:
+        str: The URI opening the same file with `mode=ro`.
+    """
+    return f"sqlite:///file:{make_url(uri).database}?mode=ro&uri=true"
+
+
+def build_engine(uri, profile="performance", read_only=False, **options):
+    """
+    Create an engine with pool settings appropriate for the backend.
+
+    - In-memory SQLite uses a single shared connection (`StaticPool`), since
+      every new connection would otherwise see an empty database.
+    - SQLite files use a `QueuePool` with `POOL_OPTIONS` and the PRAGMA
+      settings of `profile`. Connections are created with
+      `check_same_thread=False`, because a pooled connection is returned by
+      one request thread and reused by another on threaded servers. Sessions
+      never share a connection between threads at the same time.
+    - Server databases use a `QueuePool` with `POOL_OPTIONS`, recycling
+      connections after `SERVER_POOL_RECYCLE` seconds.
+
+    Args:
+        uri (str): The database URI.
+        profile (str): The name of the SQLite profile in `SQLITE_PROFILES`.
+        read_only (bool): Open a SQLite file read-only, for a pool that serves
+            only reads. The journal and auto-vacuum modes are left to the
+            writing engine.
+        **options: Engine options overriding the pool defaults.
+
+    Returns:
+        sqlalchemy.engine.Engine: The configured engine.
+    """
+    if is_memory_uri(uri):
+        return create_engine(
+            uri, poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+
+    options = {**POOL_OPTIONS, **options}
+    if make_url(uri).get_backend_name() != "sqlite":
+        options.setdefault("pool_recycle", SERVER_POOL_RECYCLE)
+        return create_engine(uri, **options)
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    if read_only:
+        uri = read_only_uri(uri)
+        pragmas.pop("journal_mode", None)
+        pragmas.pop("auto_vacuum", None)
+
+    options["connect_args"] = {"check_same_thread": False, **options.get("connect_args", {})}
+    engine = create_engine(uri, **options)
+    apply_sqlite_profile(engine, pragmas)
+    return engine
+
+
+def build_async_engine(uri, profile="performance", read_only=False, **options):
+    """
+    Create an asyncio engine for the same database as `build_engine`.
+
+    SQLite files are opened with the `aiosqlite` driver, with the same pool
+    settings and PRAGMA profile as the sync engines. Other URIs must already
+    name an async driver, such as "postgresql+asyncpg://...".
+
+    Args:
+        uri (str): The database URI, as configured for the sync engine.
+        profile (str): The name of the SQLite profile in `SQLITE_PROFILES`.
+        read_only (bool): Open a SQLite file read-only.
+        **options: Engine options overriding the pool defaults.
+
+    Returns:
+        sqlalchemy.ext.asyncio.AsyncEngine: The configured engine.
+
+    Raises:
+        ValueError: For in-memory SQLite, which a second engine cannot share.
+    """
+    if is_memory_uri(uri):
+        raise ValueError("The async engine needs a database file; in-memory SQLite cannot be shared.")
+
+    options = {**POOL_OPTIONS, **options}
+    if make_url(uri).get_backend_name() != "sqlite":
+        options.setdefault("pool_recycle", SERVER_POOL_RECYCLE)
+        return create_async_engine(uri, **options)
+
+    pragmas = dict(SQLITE_PROFILES[profile])
+    if read_only:
+        uri = read_only_uri(uri)
+        pragmas.pop("journal_mode", None)
+        pragmas.pop("auto_vacuum", None)
+
+    # aiosqlite defaults to opening a connection per checkout
+    url = make_url(uri).set(drivername="sqlite+aiosqlite")
+    engine = create_async_engine(url, poolclass=AsyncAdaptedQueuePool, **options)
+    apply_sqlite_profile(engine.sync_engine, pragmas)
+    return engine
+
+
+def init_async(app):
+    """
+    Create the app's async engines and session factories, for the ASGI endpoints.
+
+    Mirrors `init_app`: a write engine, and for SQLite files a read-only
+    engine with its own pool. They are stored with `async_sessionmaker`
+    factories in `app.extensions["async_database"]`. Call it after
+    `init_app`, which settles the database URI.
+
+    Args:
+        app (flask.Flask): The application to configure.
+
+    Returns:
+        dict: The `engine`, `read_engine`, `sessions` and `read_sessions`.
+    """
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    options = {
+        "profile": app.config["SQLITE_PROFILE"],
+        "pool_size": app.config["DB_POOL_SIZE"],
+        "max_overflow": app.config["DB_MAX_OVERFLOW"],
+        "pool_timeout": app.config["DB_POOL_TIMEOUT"],
+    }
+    engine = build_async_engine(uri, **options)
+    if make_url(uri).get_backend_name() == "sqlite":
+        read_engine = build_async_engine(uri, read_only=True, **options)
+    else:
+        read_engine = engine
+
+    app.extensions["async_database"] = {
+        "engine": engine,
+        "read_engine": read_engine,
+        "sessions": async_sessionmaker(engine, expire_on_commit=False),
+        "read_sessions": async_sessionmaker(read_engine, expire_on_commit=False),
+    }
+    return app.extensions["async_database"]
+
+
+def _session_scope():
+    """
+    Identify the current session scope: the Flask app context, or the thread outside one.
+    """
+    if has_app_context():
+        return id(app_ctx._get_current_object())
+    return threading.get_ident()
+
+
+def create_session_factory(bind=None):
+    """
+    Create a session registry scoped to the Flask app context.
+
+    Calling the registry returns the same session for the whole request, and
+    `remove()` closes it and returns its connection to the pool. The app
+    calls `remove()` on app context teardown, so sessions are released on
+    both success and error paths. Outside an app context sessions are scoped
+    per thread.
+
+    Args:
+        bind (sqlalchemy.engine.Engine, optional): The engine sessions connect
+            with. Can be set later with `configure(bind=...)`.
+
+    Returns:
+        sqlalchemy.orm.scoped_session: The session registry.
+    """
+    return scoped_session(sessionmaker(bind=bind), scopefunc=_session_scope)
+
+
+# create a request-scoped session registry, bound by `init_app`
+SessionLocal = create_session_factory()
 """
-sqlalchemy.engine.Engine: The database engine instance for managing connections 
-                           to the SQLite database. 
-                           `echo=True` enables logging of SQL statements.
+sqlalchemy.orm.scoped_session: A session registry bound to the app's engine.
+                               Sessions handle database transactions and are
+                               removed when the Flask app context tears down.
 """
 
-# create a session factory
-SessionLocal = sessionmaker(bind=engine)
+# create a request-scoped session registry for reads, bound by `init_app`
+ReadSessionLocal = create_session_factory()
 """
-sqlalchemy.orm.sessionmaker: A session factory bound to the database engine.
-                              Sessions created by this factory handle database transactions.
+sqlalchemy.orm.scoped_session: A session registry bound to the app's read
+                               engine, for endpoints that only read.
 """
 
+
+def init_app(app):
+    """
+    Create the app's engines from its config and bind the session registries.
+
+    The write engine is built from `SQLALCHEMY_DATABASE_URI`, defaulting to
+    `DATABASE_FILENAME` in the instance folder. SQLite files also get a
+    read-only engine with its own pool; other backends read through the
+    write engine. Both are stored in `app.extensions["database"]`. Only
+    SQLite and PostgreSQL are accepted, the databases `occupancy` can claim
+    capacity on safely.
+
+    `SessionLocal` and `ReadSessionLocal` are process-wide, so they are bound
+    to the most recently initialized app.
+
+    Args:
+        app (flask.Flask): The application to configure.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the URI names another database.
+    """
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI")
+    if not uri:
+        os.makedirs(app.instance_path, exist_ok=True)
+        uri = f"sqlite:///{os.path.join(app.instance_path, DATABASE_FILENAME)}"
+        app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    backend = make_url(uri).get_backend_name()
+    if backend not in COUNTER_INSERTS:
+        raise ValueError(f"Unsupported database {backend!r}: bookings need SQLite or PostgreSQL.")
+
+    options = {
+        "profile": app.config["SQLITE_PROFILE"],
+        "pool_size": app.config["DB_POOL_SIZE"],
+        "max_overflow": app.config["DB_MAX_OVERFLOW"],
+        "pool_timeout": app.config["DB_POOL_TIMEOUT"],
+    }
+    engine = build_engine(uri, **options)
+    if make_url(uri).get_backend_name() == "sqlite" and not is_memory_uri(uri):
+        read_engine = build_engine(uri, read_only=True, **options)
+    else:
+        read_engine = engine
+
+    app.extensions["database"] = {"engine": engine, "read_engine": read_engine}
+
+    for registry, bind in ((SessionLocal, engine), (ReadSessionLocal, read_engine)):
+        registry.remove()
+        registry.configure(bind=bind)
+
+    app.teardown_appcontext(remove_sessions)
+
+
+def remove_sessions(exception=None):
+    """
+    Close the app context's database sessions and return their connections to the pools.
+
+    Registered as an app context teardown, so it also runs when the request failed.
+
+    Args:
+        exception (Exception, optional): The error that ended the request, if any.
+    """
+    SessionLocal.remove()
+    ReadSessionLocal.remove()
+
+
+def get_engine():
+    """
+    Return the current app's write engine.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine created by `init_app`.
+    """
+    return current_app.extensions["database"]["engine"]
+
+
 # Initialize tables
-def initialize_db():
+def initialize_db(bind=None):
     """
     Create all tables defined in the models if they do not already exist.
 
     This function uses SQLAlchemy's `Base.metadata.create_all` method to ensure
-    that all tables mapped to ORM models are created in the database.
+    that all tables mapped to ORM models are created in the database, then
+    migrates any columns and indexes missing from tables that already existed.
+    When the `slot_occupancy` table is new, it is backfilled from existing
+    reservations, and when no dining tables exist, the default floor plan
+    `seating.DEFAULT_TABLE_SEATS` is created.
+
+    Args:
+        bind (sqlalchemy.engine.Engine, optional): The engine to initialize.
+            Defaults to the current app's engine.
 
     Returns:
         None
     """
-    print("Creating tables")
-    Base.metadata.create_all(bind=engine)
-    print("Tables created successfully")
+    bind = bind or get_engine()
+    logger.info("Creating tables")
+    backfill = not inspect(bind).has_table(SlotOccupancy.__tablename__)
+    Base.metadata.create_all(bind=bind)
+    migrate_columns(bind)
+    migrate_indexes(bind)
+
+    with sessionmaker(bind=bind)() as db_session:
+        if backfill:
+            rebuild_occupancy(db_session)
+        if db_session.query(DiningTable).first() is None:
+            db_session.add_all(
+                DiningTable(name=f"T{number}", seats=seats)
+                for number, seats in enumerate(DEFAULT_TABLE_SEATS, start=1)
+            )
+        db_session.commit()
+    logger.info("Tables created successfully")
+
+
+def migrate_columns(bind=None):
+    """
+    Add nullable columns declared on the models that an existing database is missing.
+
+    `create_all` never alters existing tables. New nullable columns without
+    a server default can be added in place with `ALTER TABLE ... ADD COLUMN`,
+    which keeps the existing rows; other schema changes need a rebuild.
+
+    Args:
+        bind (sqlalchemy.engine.Engine, optional): The engine to migrate.
+            Defaults to the current app's engine.
+
+    Returns:
+        None
+    """
+    bind = bind or get_engine()
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable or column.server_default:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                logger.info("Adding column %s.%s", table.name, column.name)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def migrate_indexes(bind=None):
+    """
+    Add indexes declared on the models that an existing database is missing.
+
+    `create_all` only creates indexes together with new tables, so databases
+    created before an index was declared never receive it. Each index is
+    created only if it does not exist yet, which makes this safe to run on
+    every startup and avoids rebuilding the tables.
+
+    Args:
+        bind (sqlalchemy.engine.Engine, optional): The engine to migrate.
+            Defaults to the current app's engine.
+
+    Returns:
+        None
+    """
+    bind = bind or get_engine()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
 
 if __name__ == "__main__":
-    initialize_db()
-    print("Database setup complete")
\ No newline at end of file
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO)
+    with create_app().app_context():
+        initialize_db()
+    logger.info("Database setup complete")
@@ -0,0 +1,285 @@
+import json
+import logging
+import sqlite3
+import threading
+import time as timer
+import uuid
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(payload, event="availability", retry=None):
+    """
+    Encode one Server-Sent Events message.
+
+    Args:
+        payload (dict): The data, sent as a single line of JSON.
+        event (str): The event name clients listen for.
+        retry (int, optional): Milliseconds the browser waits before
+            reconnecting after the stream ends.
+
+    Returns:
+        bytes: The message, terminated by a blank line.
+    """
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(payload, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+HEARTBEAT = b": keepalive\n\n"
+"""
+bytes: An SSE comment, sent on idle streams so proxies keep them open and
+       closed connections are noticed.
+"""
+
+
+class LocalBroker:
+    """
+    Publishes availability updates to the streams of this process, by date.
+
+    Subscribers are callbacks, called with each update's payload from the
+    publishing thread, so they must not block: the WSGI stream puts it on a
+    `queue.Queue` and the ASGI stream hands it to its event loop.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # date -> set of callbacks
+        self._lock = threading.Lock()
+
+    def subscribe(self, day, callback):
+        """
+        Call `callback(payload)` for every update of a date.
+
+        Args:
+            day (datetime.date): The date to follow.
+            callback (callable): Receives each update's payload.
+
+        Returns:
+            callable: Ends the subscription when called.
+        """
+        with self._lock:
+            self._subscribers.setdefault(day, set()).add(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._subscribers.get(day, set())
+                callbacks.discard(callback)
+                if not callbacks:
+                    self._subscribers.pop(day, None)
+
+        return unsubscribe
+
+    def has_listeners(self, day):
+        """
+        Tell whether an update for a date could reach any stream.
+
+        Publishers check this first, so computing an update is skipped while
+        nobody follows the date.
+        """
+        with self._lock:
+            return day in self._subscribers
+
+    def publish(self, day, payload):
+        """
+        Send an update to every subscriber of a date.
+
+        Args:
+            day (datetime.date): The date whose availability changed.
+            payload (dict): The JSON-serializable update.
+        """
+        self._deliver(day, payload)
+
+    def _deliver(self, day, payload):
+        """
+        Call the current subscribers of a date.
+        """
+        with self._lock:
+            callbacks = list(self._subscribers.get(day, ()))
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Availability subscriber for %s failed", day)
+
+    def close(self):
+        """
+        Release the broker's resources. Nothing to do in-process.
+        """
+
+
+class SQLiteBroker(LocalBroker):
+    """
+    Fans availability updates out to the streams of every worker process.
+
+    A stand-in for a message broker on a single host, like
+    `cache.SQLiteCacheBackend`: publishing appends the update to a small
+    SQLite file that all workers open, and one thread per process, started
+    with its first subscription, reads new updates every `poll_interval`
+    seconds and delivers them to that process's subscribers. Updates
+    published in the same process wake the thread immediately. Only the
+    latest `keep` updates are kept; each one carries a date's complete
+    counts, so a stream never needs an older one.
+
+    Every broker also records the dates its process follows as rows of
+    the file's listeners table, refreshed by the polling thread, so
+    `has_listeners` sees the streams of all workers. Rows not refreshed
+    for `listener_ttl` seconds, left behind by a worker that died, are
+    ignored.
+
+    Args:
+        path (str): The SQLite file shared by all workers.
+        poll_interval (float): Seconds between reads of the shared file.
+        keep (int): The number of recent updates kept in the file.
+        timeout (float): Seconds to wait for another worker's write lock.
+        listener_ttl (float): Seconds a followed date stays listed without
+            a heartbeat from its process.
+        clock (callable): Returns the current time in seconds, the same in
+            every process.
+    """
+
+    def __init__(self, path, poll_interval=0.2, keep=1000, timeout=5.0, listener_ttl=30.0, clock=timer.time):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.keep = keep
+        self.timeout = timeout
+        self.listener_ttl = listener_ttl
+        self.clock = clock
+        self._id = uuid.uuid4().hex
+        self._local = threading.local()
+        self._listing_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._poller = None
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS availability_events "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, payload TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS availability_listeners "
+                "(broker TEXT NOT NULL, date TEXT NOT NULL, seen_at REAL NOT NULL, PRIMARY KEY (broker, date))"
+            )
+
+    def _connection(self):
+        """
+        Return this thread's connection to the shared file.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def subscribe(self, day, callback):
+        """
+        Call `callback(payload)` for every update of a date, from any process.
+
+        See `LocalBroker.subscribe`; callbacks run on the polling thread.
+        """
+        unsubscribe = super().subscribe(day, callback)
+        self._list(day)
+        with self._lock:
+            if self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._poll, args=(self._latest_id(),), name="availability-events", daemon=True
+                )
+                self._poller.start()
+
+        def unsubscribe_and_unlist():
+            unsubscribe()
+            self._list(day)
+
+        return unsubscribe_and_unlist
+
+    def _list(self, day):
+        """
+        Add or remove this broker's listeners row for a date to match its subscribers.
+        """
+        with self._listing_lock, self._connection() as connection:
+            if super().has_listeners(day):
+                connection.execute(
+                    "INSERT OR REPLACE INTO availability_listeners (broker, date, seen_at) VALUES (?, ?, ?)",
+                    (self._id, day.isoformat(), self.clock()),
+                )
+            else:
+                connection.execute(
+                    "DELETE FROM availability_listeners WHERE broker = ? AND date = ?", (self._id, day.isoformat())
+                )
+
+    def has_listeners(self, day):
+        """
+        Tell whether a stream in any process follows a date.
+
+        See `LocalBroker.has_listeners`; reads the shared listeners table.
+        """
+        row = self._connection().execute(
+            "SELECT 1 FROM availability_listeners WHERE date = ? AND seen_at > ? LIMIT 1",
+            (day.isoformat(), self.clock() - self.listener_ttl),
+        ).fetchone()
+        return row is not None
+
+    def publish(self, day, payload):
+        """
+        Append an update to the shared file for every process to deliver.
+
+        Args:
+            day (datetime.date): The date whose availability changed.
+            payload (dict): The JSON-serializable update.
+        """
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "INSERT INTO availability_events (date, payload) VALUES (?, ?)",
+                (day.isoformat(), json.dumps(payload, separators=(",", ":"))),
+            )
+            connection.execute(
+                "DELETE FROM availability_events WHERE id <= ?", (cursor.lastrowid - self.keep,)
+            )
+        self._wake.set()
+
+    def _latest_id(self):
+        """
+        Return the id of the newest update in the file, 0 if there is none.
+        """
+        row = self._connection().execute("SELECT max(id) FROM availability_events").fetchone()
+        return row[0] or 0
+
+    def _poll(self, last_id):
+        """
+        Deliver the updates appended after `last_id` until the broker is closed.
+        """
+        connection = self._connection()
+        heartbeat_at = self.clock()
+        while not self._stopped.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                if self.clock() - heartbeat_at >= self.listener_ttl / 3:
+                    heartbeat_at = self.clock()
+                    with connection:
+                        connection.execute(
+                            "UPDATE availability_listeners SET seen_at = ? WHERE broker = ?", (heartbeat_at, self._id)
+                        )
+                rows = connection.execute(
+                    "SELECT id, date, payload FROM availability_events WHERE id > ? ORDER BY id",
+                    (last_id,),
+                ).fetchall()
+            except sqlite3.OperationalError:  # locked by a writer for too long; retry
+                continue
+            for last_id, day, payload in rows:
+                self._deliver(date.fromisoformat(day), json.loads(payload))
+
+    def close(self):
+        """
+        Stop the polling thread and remove this broker's listeners rows.
+        """
+        self._stopped.set()
+        self._wake.set()
+        if self._poller is not None:
+            self._poller.join()
+        with self._connection() as connection:
+            connection.execute("DELETE FROM availability_listeners WHERE broker = ?", (self._id,))
@@ -0,0 +1,188 @@
+import base64
+import csv
+import io
+import json
+from datetime import date, time
+
+from sqlalchemy import select, tuple_
+
+from archive import reservation_history
+from models import Reservation
+
+
+PAGE_SIZE = 100
+"""
+int: Reservations per page of the admin listing, unless the request asks for fewer.
+"""
+
+MAX_PAGE_SIZE = 1000
+"""
+int: The most reservations one page of the admin listing returns.
+"""
+
+BATCH_SIZE = 2000
+"""
+int: Rows fetched from the cursor and written to the response per batch of an export.
+"""
+
+EXPORT_FIELDS = ("id", "name", "email", "num_people", "date", "time", "duration", "table_id", "created_at")
+
+EXPORT_FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+def encode_cursor(row):
+    """
+    Encode the sort key of a reservation as an opaque pagination cursor.
+
+    Args:
+        row: A reservation row with `date`, `time` and `id`.
+
+    Returns:
+        str: A URL-safe cursor for `decode_cursor`.
+    """
+    key = f"{row.date.isoformat()},{row.time.strftime('%H:%M:%S')},{row.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor from `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        tuple: `(date, time, id)` of the last reservation already seen.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day, start_time, reservation_id = key.split(",")
+        return date.fromisoformat(day), time.fromisoformat(start_time), int(reservation_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def reservations_query(start=None, end=None, after=None, include_archived=True):
+    """
+    Build the query of reservations in `(date, time, id)` order.
+
+    The order follows the `ix_reservations_date_time` index, whose entries
+    end with the row id, so SQLite walks the index instead of sorting, and
+    `after` seeks to the cursor's date in the index however deep the page
+    is, where an OFFSET would read and skip every earlier row. Archived
+    reservations are read through `archive.reservation_history`; SQLite
+    pushes the date and cursor filters into both of its tables, walks
+    `ix_reservations_archive_date_time` in the same order and merges the
+    two without sorting either.
+
+    Args:
+        start (datetime.date, optional): The first date to include.
+        end (datetime.date, optional): The last date to include.
+        after (tuple, optional): The `(date, time, id)` of the last row
+            already seen; only rows sorting after it are returned.
+        include_archived (bool): Also return the reservations moved to
+            the archive table.
+
+    Returns:
+        sqlalchemy.sql.Select: The query, selecting the `EXPORT_FIELDS` columns.
+    """
+    columns = reservation_history().c if include_archived else Reservation.__table__.c
+    query = select(*(columns[field] for field in EXPORT_FIELDS))
+    if start is not None:
+        query = query.where(columns.date >= start)
+    if end is not None:
+        query = query.where(columns.date <= end)
+    if after is not None:
+        query = query.where(tuple_(columns.date, columns.time, columns.id) > tuple_(*after))
+    return query.order_by(columns.date, columns.time, columns.id)
+
+
+def serialize(row):
+    """
+    Convert a reservation row to JSON-compatible values.
+
+    Returns:
+        dict: The `EXPORT_FIELDS` values, with dates in ISO format and times as HH:MM.
+    """
+    return {
+        "id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "num_people": row.num_people,
+        "date": row.date.isoformat(),
+        "time": row.time.strftime("%H:%M"),
+        "duration": row.duration,
+        "table_id": row.table_id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def list_reservations(db_session, limit=PAGE_SIZE, start=None, end=None, after=None, include_archived=True):
+    """
+    Read one page of reservations with keyset pagination.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+        limit (int): The number of reservations per page.
+        start (datetime.date, optional): The first date to include.
+        end (datetime.date, optional): The last date to include.
+        after (str, optional): The `next` cursor of the previous page.
+        include_archived (bool): Also list archived reservations.
+
+    Returns:
+        tuple: `(reservations, next)`: the page's reservations as dicts, and
+            the cursor of the following page, or None on the last page.
+
+    Raises:
+        ValueError: If `after` is not a valid cursor.
+    """
+    key = decode_cursor(after) if after else None
+    # one extra row tells whether another page follows
+    rows = db_session.execute(reservations_query(start, end, key, include_archived).limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [serialize(row) for row in rows[:limit]], next_cursor
+
+
+def export_reservations(engine, file_format="csv", start=None, end=None, batch_size=BATCH_SIZE,
+                        include_archived=True):
+    """
+    Stream every reservation of a date range as CSV or JSON Lines.
+
+    The rows come from one query on a connection of its own, read
+    `batch_size` at a time with `yield_per` on a server-side cursor where
+    the database has one, so memory stays constant however many rows there
+    are, and the first batch is sent before the rest is read. The
+    connection is held until the generator is exhausted or closed.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): The engine to read from.
+        file_format (str): "csv", with a header row, or "jsonl".
+        start (datetime.date, optional): The first date to include.
+        end (datetime.date, optional): The last date to include.
+        batch_size (int): Rows per batch.
+        include_archived (bool): Also export archived reservations.
+
+    Yields:
+        str: The export, one batch of rows at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if file_format == "csv":
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue()
+
+    query = reservations_query(start, end, include_archived=include_archived).execution_options(
+        stream_results=True, yield_per=batch_size
+    )
+    with engine.connect() as connection:
+        for rows in connection.execute(query).partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            if file_format == "csv":
+                writer.writerows(serialize(row).values() for row in rows)
+            else:
+                buffer.writelines(json.dumps(serialize(row)) + "\n" for row in rows)
+            yield buffer.getvalue()
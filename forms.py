@@ -1,7 +1,7 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, DateField, SubmitField, SelectField
-from wtforms.validators import DataRequired, Email, NumberRange
-from datetime import time
+
+from validation import DURATIONS, FIELDS, MAX_PEOPLE, MIN_PEOPLE, validate_reservation
 
 
 # Define form model
@@ -9,26 +9,57 @@ class ReservationForm(FlaskForm):
     """
     A Flask-WTF form model for collecting reservation details.
 
+    The fields only render the form; their submitted text is validated by
+    `validation.validate_reservation`, the rules shared with the JSON
+    booking API, and after a successful `validate()` the parsed values are
+    in `values`.
     """
 
     name = StringField(
-        "Name", validators=[DataRequired()], render_kw={"placeholder": "Your Name"}
+        "Name", render_kw={"placeholder": "Your Name", "required": True}
     )
     email = StringField(
         "Email",
-        validators=[DataRequired(), Email(message="email is invalid")],
-        render_kw={"placeholder": "me@example.com"},
+        render_kw={"placeholder": "me@example.com", "required": True},
     )
     num_people = IntegerField(
         "Number of People",
-        validators=[DataRequired(), NumberRange(min=1, max=6, message="For reservations of more than 6 people, please contact us directly.")],
-        render_kw={"placeholder": "2"},
+        render_kw={"placeholder": "2", "required": True, "min": MIN_PEOPLE, "max": MAX_PEOPLE},
     )
     date = DateField(
         "Date",
-        validators=[DataRequired()],
         format="%Y-%m-%d",
-        render_kw={"placeholder": "1990-04-08"},
+        render_kw={"placeholder": "1990-04-08", "required": True},
+    )
+    time = SelectField("Time", coerce=str, choices=[], validate_choice=False, render_kw={"placeholder": "Select a time", "required": True})
+    duration = SelectField(
+        "Duration",
+        coerce=int,
+        choices=[(hours, f"{hours} hour{'s' if hours > 1 else ''}") for hours in DURATIONS],
+        default=1,
     )
-    time = SelectField("Time", validators=[DataRequired()], coerce=str, choices=[], validate_choice=False, render_kw={"placeholder": "Select a time"})
     submit = SubmitField("Reserve Table")
+
+    values = None
+
+    def validate(self, extra_validators=None):
+        """
+        Validate the CSRF token, if enabled, and the reservation fields.
+
+        Each field's error is its message from `validate_reservation`.
+
+        Returns:
+            bool: True if the form is valid; `values` then holds the parsed
+                  `Reservation` column values.
+        """
+        valid = True
+        for name, field in self._fields.items():
+            if name not in FIELDS and not field.validate(self, (extra_validators or {}).get(name, ())):
+                valid = False
+
+        self.values, errors = validate_reservation({
+            name: self[name].raw_data[0] if self[name].raw_data else None for name in FIELDS
+        })
+        for name in FIELDS:
+            self[name].errors = [errors[name]] if name in errors else []
+        return valid and not errors
@@ -0,0 +1,244 @@
+import json
+import os
+from html.parser import HTMLParser
+
+try:
+    from PIL import Image, features
+except ImportError:  # Pillow is only needed to build variants
+    Image = None
+
+
+VARIANT_WIDTHS = (320, 640, 960)
+"""
+tuple: Widths in pixels generated for each image, capped at the image's own
+       width. 320 and 640 cover the 300-350px layout slots at 1x and 2x
+       density; 960 covers 3x phones and full-width images on small screens.
+"""
+
+VARIANT_FORMATS = ("avif", "webp")
+"""
+tuple: Modern formats generated for each image, in order of preference.
+       Formats the installed Pillow cannot encode are skipped.
+"""
+
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+VARIANTS_DIRNAME = "variants"
+MANIFEST_FILENAME = "manifest.json"
+
+QUALITY = {"avif": 50, "webp": 75, "jpeg": 80}
+
+
+def variant_widths(width):
+    """
+    Return the variant widths for an image of the given width, never upscaling.
+
+    Args:
+        width (int): The width of the original image.
+
+    Returns:
+        list: Sorted, distinct widths.
+    """
+    return sorted({min(variant, width) for variant in VARIANT_WIDTHS})
+
+
+def fallback_format(image):
+    """
+    Choose the format served to browsers without AVIF or WebP support.
+
+    Args:
+        image (PIL.Image.Image): The original image.
+
+    Returns:
+        str: "png" for images with transparency, otherwise "jpeg".
+    """
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        return "png"
+    return "jpeg"
+
+
+def _save_variant(image, width, image_format, path):
+    """
+    Resize an image to `width` and save it in `image_format`.
+    """
+    height = round(image.height * width / image.width)
+    resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image.copy()
+    if image_format == "jpeg" and resized.mode != "RGB":
+        resized = resized.convert("RGB")
+    options = {"optimize": True} if image_format == "png" else {"quality": QUALITY[image_format]}
+    resized.save(path, format=image_format.upper(), **options)
+
+
+def build_variants(static_folder, images_dirname="images"):
+    """
+    Generate resized AVIF, WebP and JPEG or PNG variants of the site's images.
+
+    Every JPEG and PNG in `static/<images_dirname>` at least as wide as the
+    smallest variant width is resized to `VARIANT_WIDTHS` and written to
+    `static/<images_dirname>/variants`, together with a manifest describing
+    them. Variants newer than their original are kept, so rebuilding after
+    adding an image only encodes that image.
+
+    Args:
+        static_folder (str): The app's static folder.
+        images_dirname (str): The image folder inside it. Default is "images".
+
+    Returns:
+        dict: The manifest, see `load_manifest`.
+
+    Raises:
+        RuntimeError: If Pillow is not installed.
+    """
+    if Image is None:
+        raise RuntimeError("Building image variants requires Pillow: pip install Pillow")
+
+    formats = [name for name in VARIANT_FORMATS if features.check(name)]
+    source_dir = os.path.join(static_folder, images_dirname)
+    output_dir = os.path.join(source_dir, VARIANTS_DIRNAME)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {}
+
+    for name in sorted(os.listdir(source_dir)):
+        stem, extension = os.path.splitext(name)
+        source_path = os.path.join(source_dir, name)
+        if extension.lower() not in SOURCE_EXTENSIONS:
+            continue
+
+        with Image.open(source_path) as image:
+            if image.width < VARIANT_WIDTHS[0]:
+                continue  # icons and other small images are left alone
+            entry = {
+                "width": image.width,
+                "height": image.height,
+                "bytes": os.path.getsize(source_path),
+                "variants": {},
+            }
+            for image_format in formats + [fallback_format(image)]:
+                variants = []
+                for width in variant_widths(image.width):
+                    filename = f"{stem}-{width}.{'jpg' if image_format == 'jpeg' else image_format}"
+                    path = os.path.join(output_dir, filename)
+                    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source_path):
+                        _save_variant(image, width, image_format, path)
+                    variants.append(
+                        [width, f"{images_dirname}/{VARIANTS_DIRNAME}/{filename}", os.path.getsize(path)]
+                    )
+                entry["variants"][image_format] = variants
+        manifest[f"{images_dirname}/{name}"] = entry
+
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), "w") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def load_manifest(path):
+    """
+    Load the image variant manifest written by `build_variants`.
+
+    The manifest maps an image's static path (e.g. "images/burger.png") to its
+    `width`, `height`, size in `bytes` and `variants`: for each format, a
+    list of `[width, static path, bytes]` sorted by width. The fallback
+    format is "jpeg" or "png".
+
+    Args:
+        path (str): The manifest file.
+
+    Returns:
+        dict: The manifest, or an empty dict if variants were never built.
+    """
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def pick_variant(srcset, display_width, density=2):
+    """
+    Pick the candidate a browser would download from a `w`-descriptor srcset.
+
+    Args:
+        srcset (list): `(url, width)` candidates.
+        display_width (int): The CSS width the image is shown at.
+        density (float): The device pixel ratio. Default is 2, a typical phone.
+
+    Returns:
+        str: The URL of the smallest candidate at least `display_width * density`
+            pixels wide, or of the widest candidate.
+    """
+    candidates = sorted(srcset, key=lambda candidate: candidate[1])
+    for url, width in candidates:
+        if width >= display_width * density:
+            return url
+    return candidates[-1][0]
+
+
+class _ImageCollector(HTMLParser):
+    """
+    Collect the images of a page and the preferred srcset of each `<picture>`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.images = []  # (src, display width, srcset or None)
+        self._sources = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "picture":
+            self._sources = []
+        elif tag == "source" and self._sources is not None:
+            self._sources.append(attrs.get("srcset", ""))
+        elif tag == "img":
+            srcset = self._sources[0] if self._sources else attrs.get("srcset")
+            width = int(attrs["width"]) if attrs.get("width", "").isdigit() else None
+            self.images.append((attrs.get("src", ""), width, srcset))
+
+    def handle_endtag(self, tag):
+        if tag == "picture":
+            self._sources = None
+
+
+def _parse_srcset(srcset):
+    """
+    Split a srcset attribute into `(url, width)` pairs.
+    """
+    candidates = []
+    for candidate in srcset.split(","):
+        url, _, descriptor = candidate.strip().partition(" ")
+        if descriptor.strip().endswith("w"):
+            candidates.append((url, int(descriptor.strip()[:-1])))
+    return candidates
+
+
+def page_image_weight(html, static_folder, static_url_path="/static", density=2):
+    """
+    Compare a page's image bytes as originally served and with its variants.
+
+    For every image on the page, the original file size is compared with the
+    file a browser at `density` would pick from the image's preferred
+    srcset. Images without a srcset count the same on both sides.
+
+    Args:
+        html (str): The rendered page.
+        static_folder (str): The app's static folder.
+        static_url_path (str): The URL prefix of static files.
+        density (float): The device pixel ratio. Default is 2.
+
+    Returns:
+        tuple: `(original_bytes, optimized_bytes)`.
+    """
+    def size_of(url):
+        path = url.split("?", 1)[0]
+        if not path.startswith(static_url_path + "/"):
+            return 0  # external image
+        return os.path.getsize(os.path.join(static_folder, path[len(static_url_path) + 1:]))
+
+    parser = _ImageCollector()
+    parser.feed(html)
+    original = optimized = 0
+    for src, display_width, srcset in parser.images:
+        original += size_of(src)
+        candidates = _parse_srcset(srcset) if srcset and display_width else []
+        optimized += size_of(pick_variant(candidates, display_width, density)) if candidates else size_of(src)
+    return original, optimized
@@ -0,0 +1,79 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from flask.logging import default_handler
+
+
+LOG_FORMAT = "[%(asctime)s] %(levelname)s in %(module)s: %(message)s"
+"""
+str: The log line format, matching Flask's default handler.
+"""
+
+# the queue handler and listener currently installed on the root logger
+_installed = {}
+
+
+def configure_logging(app, level="INFO", sql_echo=False, handlers=None):
+    """
+    Route application and SQL logging through a non-blocking queue.
+
+    Request handlers only put records on an in-memory queue; a background
+    `QueueListener` thread formats them and performs the actual I/O, so slow
+    log output never blocks a worker. Flask's default stream handler on
+    `app.logger` is replaced by the queue handler on the root logger, which
+    the application, `database` and SQLAlchemy loggers all propagate to.
+
+    The root logger is shared by the whole process, so calling this again,
+    for the same or another app, replaces the previous configuration.
+
+    Args:
+        app (flask.Flask): The application whose logger is configured.
+        level (str or int): The level for `app.logger`. Default is "INFO".
+        sql_echo (bool): Log every SQL statement at INFO level. Default is False.
+        handlers (list, optional): Handlers the listener writes to. Defaults to
+            a stream handler on stderr using `LOG_FORMAT`.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener.
+    """
+    shutdown_logging()
+
+    if handlers is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers = [handler]
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    logging.getLogger().addHandler(queue_handler)
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(level)
+    logging.getLogger("database").setLevel(level)
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if sql_echo else logging.WARNING)
+
+    listener.start()
+    atexit.register(listener.stop)
+    _installed.update(listener=listener, queue_handler=queue_handler)
+    return listener
+
+
+def shutdown_logging():
+    """
+    Flush queued records and detach the handler installed by `configure_logging`.
+
+    Does nothing if logging is not configured.
+
+    Returns:
+        None
+    """
+    if not _installed:
+        return
+
+    listener = _installed.pop("listener")
+    atexit.unregister(listener.stop)
+    listener.stop()
+    logging.getLogger().removeHandler(_installed.pop("queue_handler"))
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+
+def categorize_menu(items):
+    """
+    Group menu items by category in a single pass.
+
+    Categories keep the order in which they first appear in the file, so the
+    menu page lists them as the menu file does and new categories need no
+    code changes.
+
+    Args:
+        items (list): Menu item dicts, each with a "category" key.
+
+    Returns:
+        mappingproxy: Category names mapped to tuples of read-only items.
+    """
+    categories = {}
+    for item in items:
+        categories.setdefault(item["category"], []).append(MappingProxyType(dict(item)))
+    return MappingProxyType({name: tuple(entries) for name, entries in categories.items()})
+
+
+def read_menu(path):
+    """
+    Load and categorize the menu file.
+
+    Args:
+        path (str): The path of the menu JSON file.
+
+    Returns:
+        mappingproxy: The categorized menu, see `categorize_menu`.
+    """
+    with open(path, "r") as file:
+        menu_data = json.load(file)
+    return categorize_menu(menu_data["items"])
+
+
+def _file_signature(path):
+    """
+    Identify a version of a file by inode, size and modification time.
+    """
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+MenuSnapshot = namedtuple("MenuSnapshot", ["version", "last_modified", "menu"])
+"""
+namedtuple: A loaded menu together with the signature of its file (`version`)
+            and the file's modification time in UTC (`last_modified`).
+"""
+
+
+def _load_snapshot(path):
+    """
+    Read the menu file together with its version.
+    """
+    version = _file_signature(path)
+    last_modified = datetime.fromtimestamp(version[2] / 1e9, tz=timezone.utc)
+    return MenuSnapshot(version, last_modified, read_menu(path))
+
+
+class MenuCache:
+    """
+    The categorized menu, loaded once and reloaded only when the file changes.
+
+    The file is checked with a single `stat` call, at most once every
+    `check_interval` seconds; requests in between are served from memory.
+    A changed inode, size or modification time triggers a reload, so both
+    edits in place and atomic replacements are picked up. If the reload
+    fails, for example on a half-written file, the previous menu is kept and
+    the file is retried on the next check.
+
+    Args:
+        path (str): The path of the menu JSON file.
+        check_interval (float): Minimum seconds between file checks.
+        clock (callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, path, check_interval=2.0, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        # replaced as a whole, so readers never mix two versions
+        self._state = _load_snapshot(path)
+        self._checked_at = clock()
+
+    def snapshot(self):
+        """
+        Return the current menu with its version, reloading it first if the file changed.
+
+        Returns:
+            MenuSnapshot: The menu and the version and modification time of
+                the file it was read from, all from the same load.
+        """
+        if self.clock() - self._checked_at >= self.check_interval:
+            self._refresh()
+        return self._state
+
+    def get(self):
+        """
+        Return the current menu, reloading it first if the file changed.
+
+        Returns:
+            mappingproxy: Category names mapped to tuples of items.
+        """
+        return self.snapshot().menu
+
+    def _refresh(self):
+        """
+        Reload the menu if the file's signature changed since the last load.
+        """
+        with self._lock:
+            now = self.clock()
+            if now - self._checked_at < self.check_interval:
+                return  # another thread just checked
+            self._checked_at = now
+            try:
+                if _file_signature(self.path) != self._state.version:
+                    self._state = _load_snapshot(self.path)
+            except (OSError, ValueError, KeyError):
+                pass  # keep serving the last good menu
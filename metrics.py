@@ -0,0 +1,370 @@
+import logging
+import threading
+import time as timer
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+
+from flask import before_render_template, request, template_rendered
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+"""
+tuple: Upper bounds in seconds of the request and query latency histograms.
+"""
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+"""
+tuple: Upper bounds of the queries-per-request histogram.
+"""
+
+# the stats of the request being handled in this context, if any
+_current_request = ContextVar("metrics_request", default=None)
+
+
+class Histogram:
+    """
+    A Prometheus-style histogram with fixed buckets.
+
+    Observations are counted in the first bucket whose upper bound they do
+    not exceed; buckets are made cumulative only when rendered. Not
+    thread-safe on its own: `Metrics` updates it under its lock.
+
+    Args:
+        buckets (tuple): Increasing upper bounds. An implicit `+Inf` bucket
+            catches the rest.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Record one observation.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        """
+        Render the histogram's samples in the Prometheus text format.
+
+        Args:
+            name (str): The metric name.
+            labels (str): Rendered labels, e.g. 'route="/menu"', or "".
+
+        Returns:
+            list: One line per sample.
+        """
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class RequestStats:
+    """
+    The measurements of one request, collected while it runs.
+    """
+
+    __slots__ = ("route", "method", "started", "status", "query_times",
+                 "template_time", "template_started")
+
+    def __init__(self, route, method, started):
+        self.route = route
+        self.method = method
+        self.started = started
+        self.status = 200
+        self.query_times = []
+        self.template_time = 0.0
+        self.template_started = None
+
+
+def _labels(**labels):
+    """
+    Render Prometheus labels, escaping their values.
+    """
+    return ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels.items()
+    )
+
+
+class Metrics:
+    """
+    Per-route request latency, SQL and template time, and slow queries.
+
+    Requests are measured between `start_request` and `finish_request`,
+    which `init_app` calls from Flask's request hooks and `asgi.py` around
+    its own handlers. While a request runs, the SQL statements of any
+    instrumented engine and every rendered template add their counts and
+    durations to it, through a context variable, so concurrent requests in
+    other threads or tasks never mix. Statements outside a request, such as
+    those of CLI commands, only count towards the global query metrics.
+
+    Each statement costs one pair of clock reads and a list append, and
+    each request one short lock to fold its stats into the histograms when
+    it finishes.
+
+    Args:
+        slow_query_threshold (float): Statements taking at least this many
+            seconds are logged and kept in `slow_queries`.
+        slow_query_count (int): The number of recent slow queries kept.
+        clock (callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, slow_query_threshold=0.1, slow_query_count=50, clock=timer.perf_counter):
+        self.slow_query_threshold = slow_query_threshold
+        self.clock = clock
+        self.slow_queries = deque(maxlen=slow_query_count)
+        self._lock = threading.Lock()
+        self._request_latency = {}  # (route, method) -> Histogram
+        self._request_queries = {}  # route -> Histogram
+        self._requests = {}  # (route, method, status) -> count
+        self._sql_seconds = {}  # route -> seconds
+        self._template_seconds = {}  # route -> seconds
+        self._query_latency = Histogram(LATENCY_BUCKETS)
+        self._slow_query_total = 0
+
+    def start_request(self, route, method):
+        """
+        Start measuring a request in the current context.
+
+        Args:
+            route (str): The URL rule the request matched, e.g.
+                "/get_available_slots/<date_str>", so every date shares one series.
+            method (str): The HTTP method.
+
+        Returns:
+            tuple: `(stats, token)`, to pass to `finish_request`.
+        """
+        stats = RequestStats(route, method, self.clock())
+        return stats, _current_request.set(stats)
+
+    def finish_request(self, stats, token, status):
+        """
+        Stop measuring a request and record it.
+
+        Args:
+            stats (RequestStats): As returned by `start_request`.
+            token: As returned by `start_request`.
+            status (int): The response status code.
+        """
+        elapsed = self.clock() - stats.started
+        _current_request.reset(token)
+        route = stats.route
+        with self._lock:
+            latency = self._request_latency.get((route, stats.method))
+            if latency is None:
+                latency = self._request_latency[(route, stats.method)] = Histogram(LATENCY_BUCKETS)
+                self._request_queries.setdefault(route, Histogram(QUERY_COUNT_BUCKETS))
+            latency.observe(elapsed)
+            self._request_queries[route].observe(len(stats.query_times))
+            for query_time in stats.query_times:
+                self._query_latency.observe(query_time)
+            key = (route, stats.method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._sql_seconds[route] = self._sql_seconds.get(route, 0.0) + sum(stats.query_times)
+            self._template_seconds[route] = self._template_seconds.get(route, 0.0) + stats.template_time
+
+    def discard_request(self, token):
+        """
+        Stop measuring a request without recording it.
+
+        Args:
+            token: As returned by `start_request`.
+        """
+        _current_request.reset(token)
+
+    def instrument_engine(self, engine):
+        """
+        Time every SQL statement executed by an engine.
+
+        The `do_execute` methods of the engine's own dialect, which run the
+        DBAPI cursor, are wrapped in place. The `before_cursor_execute` and
+        `after_cursor_execute` events would time the same span, but an
+        engine with any listener dispatches events on every connection
+        checkout and statement, which cost more than the timing itself.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine; for an async
+                engine, pass its `sync_engine`.
+        """
+        dialect = engine.dialect
+        if getattr(dialect, "metrics_instrumented", False):
+            return
+        dialect.metrics_instrumented = True
+        for name in ("do_execute", "do_execute_no_params", "do_executemany"):
+            setattr(dialect, name, self._timed(getattr(dialect, name)))
+
+    def _timed(self, execute):
+        """
+        Wrap a dialect execute method to record the duration of each statement.
+        """
+        clock = self.clock
+        record = self.record_query
+
+        def timed(cursor, statement, *args):
+            started = clock()
+            try:
+                return execute(cursor, statement, *args)
+            finally:
+                record(statement, clock() - started)
+
+        return timed
+
+    def record_query(self, statement, elapsed):
+        """
+        Record one SQL statement, in the current request if there is one.
+
+        Args:
+            statement (str): The SQL sent to the database.
+            elapsed (float): Its duration in seconds.
+        """
+        stats = _current_request.get()
+        if elapsed >= self.slow_query_threshold:
+            route = stats.route if stats is not None else None
+            logger.warning("Slow query (%.3fs) in %s: %s", elapsed, route or "-", statement)
+            with self._lock:
+                self._slow_query_total += 1
+                self.slow_queries.append({"statement": statement, "seconds": round(elapsed, 6), "route": route})
+
+        # a request's statements are folded into the histogram when it finishes
+        if stats is not None:
+            stats.query_times.append(elapsed)
+        else:
+            with self._lock:
+                self._query_latency.observe(elapsed)
+
+    def template_started(self, sender, template, context, **extra):
+        """
+        Receive Flask's `before_render_template` signal.
+        """
+        stats = _current_request.get()
+        if stats is not None:
+            stats.template_started = self.clock()
+
+    def template_finished(self, sender, template, context, **extra):
+        """
+        Receive Flask's `template_rendered` signal.
+        """
+        stats = _current_request.get()
+        if stats is not None and stats.template_started is not None:
+            stats.template_time += self.clock() - stats.template_started
+            stats.template_started = None
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        with self._lock:
+            lines = [
+                "# HELP http_request_duration_seconds Request latency by route.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (route, method), histogram in sorted(self._request_latency.items()):
+                lines += histogram.render("http_request_duration_seconds", _labels(route=route, method=method))
+
+            lines += [
+                "# HELP http_requests_total Requests by route, method and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(f"http_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}")
+
+            lines += [
+                "# HELP http_request_db_queries SQL statements per request by route.",
+                "# TYPE http_request_db_queries histogram",
+            ]
+            for route, histogram in sorted(self._request_queries.items()):
+                lines += histogram.render("http_request_db_queries", _labels(route=route))
+
+            for name, help_text, totals in (
+                ("http_request_db_seconds_total", "Time spent in SQL by route.", self._sql_seconds),
+                ("http_request_template_seconds_total", "Time spent rendering templates by route.",
+                 self._template_seconds),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for route, seconds in sorted(totals.items()):
+                    lines.append(f"{name}{{{_labels(route=route)}}} {seconds:.6f}")
+
+            lines += [
+                "# HELP db_query_duration_seconds SQL statement latency, in and outside requests.",
+                "# TYPE db_query_duration_seconds histogram",
+            ]
+            lines += self._query_latency.render("db_query_duration_seconds", "")
+            lines += [
+                "# HELP db_slow_queries_total SQL statements slower than the slow query threshold.",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self._slow_query_total}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+def request_route():
+    """
+    Return the URL rule of the current Flask request, or "unmatched" for a 404.
+    """
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def init_app(app):
+    """
+    Create the app's metrics and hook them into its requests, engines and templates.
+
+    The metrics are stored in `app.extensions["metrics"]` either way, but
+    nothing is measured unless `METRICS_ENABLED` is set. Call it after
+    `database.init_app`, whose engines it instruments.
+
+    Args:
+        app (flask.Flask): The application to instrument.
+
+    Returns:
+        Metrics: The app's metrics.
+    """
+    metrics = Metrics(slow_query_threshold=app.config["SLOW_QUERY_THRESHOLD"])
+    app.extensions["metrics"] = metrics
+    if not app.config["METRICS_ENABLED"]:
+        return metrics
+
+    for engine in {app.extensions["database"]["engine"], app.extensions["database"]["read_engine"]}:
+        metrics.instrument_engine(engine)
+    before_render_template.connect(metrics.template_started, app)
+    template_rendered.connect(metrics.template_finished, app)
+
+    @app.before_request
+    def start_request_metrics():
+        request.environ["metrics.request"] = metrics.start_request(request_route(), request.method)
+
+    @app.after_request
+    def record_response_status(response):
+        started = request.environ.get("metrics.request")
+        if started is not None:
+            started[0].status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exception=None):
+        started = request.environ.pop("metrics.request", None)
+        if started is not None:
+            stats, token = started
+            metrics.finish_request(stats, token, 500 if exception is not None else stats.status)
+
+    return metrics
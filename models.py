@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, declarative_base
-from sqlalchemy import String, Integer, Date, DateTime, Time
+from sqlalchemy import ForeignKey, String, Integer, Date, DateTime, Time, Index
 from datetime import datetime, timezone
 from datetime import date as dt_date
 from datetime import time as dt_time
@@ -18,11 +18,24 @@ class Reservation(Base):
         email (str): The email of the person making the reservation. Cannot be null.
         num_people (int): The number of people for the reservation. Cannot be null.
         date (datetime.date): The date of the reservation. Cannot be null.
+        time (datetime.time): The start time of the reservation. Cannot be null.
+        duration (int): The length of the reservation in hours. Defaults to 1.
+        table_id (int): The table the party is seated at. Null for
+            reservations made before tables were assigned.
         created_at (datetime.datetime): The timestamp when the reservation was created.
             Defaults to the current UTC time.
+
+    Indexes:
+        ix_reservations_date_time: Looks up a day's reservations in time order.
+        ix_reservations_date_time_duration: Covering index for availability
+            queries, which read only `time` and `duration` for a date.
     """
 
     __tablename__ = "reservations"
+    __table_args__ = (
+        Index("ix_reservations_date_time", "date", "time"),
+        Index("ix_reservations_date_time_duration", "date", "time", "duration"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -31,11 +44,90 @@ class Reservation(Base):
     date: Mapped[dt_date] = mapped_column(Date, nullable=False)
     time: Mapped[dt_time] = mapped_column(Time, nullable=False)
     duration: Mapped[int] = mapped_column(Integer, default=1)
+    table_id: Mapped[int] = mapped_column(ForeignKey("dining_tables.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
 
 
+
+# define the archived reservation model
+class ArchivedReservation(Base):
+    """
+    Represents a past reservation moved out of `reservations` by `archive.archive_reservations`.
+
+    Archived rows keep their id and every column of `Reservation`, so reports
+    can read both tables as one through `archive.reservation_history`.
+
+    Attributes:
+        __tablename__ (str): The name of the table in the database (`reservations_archive`).
+        archived_at (datetime.datetime): The timestamp when the reservation was archived.
+        The other attributes are those of `Reservation`.
+
+    Indexes:
+        ix_reservations_archive_date_time: Reads a date range in the
+            `(date, time, id)` order of `ix_reservations_date_time`, so the
+            export merges both tables without sorting.
+    """
+
+    __tablename__ = "reservations_archive"
+    __table_args__ = (Index("ix_reservations_archive_date_time", "date", "time"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    email: Mapped[str] = mapped_column(String(120), nullable=False)
+    num_people: Mapped[int] = mapped_column(nullable=False)
+    date: Mapped[dt_date] = mapped_column(Date, nullable=False)
+    time: Mapped[dt_time] = mapped_column(Time, nullable=False)
+    duration: Mapped[int] = mapped_column(Integer, default=1)
+    table_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+
+# define the dining table model
+class DiningTable(Base):
+    """
+    Represents a table in the restaurant.
+
+    Attributes:
+        __tablename__ (str): The name of the table in the database (`dining_tables`).
+        id (int): The unique identifier for the table. Primary key.
+        name (str): The label staff use for the table, e.g. "T1". Cannot be null.
+        seats (int): The largest party the table seats. Cannot be null.
+    """
+
+    __tablename__ = "dining_tables"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    seats: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+# define the materialized slot occupancy model
+class SlotOccupancy(Base):
+    """
+    Represents the number of reservations overlapping one slot of a day.
+
+    Rows are maintained on every booking so availability can be read directly
+    instead of being recomputed from `Reservation` rows. Slots without any
+    booking have no row.
+
+    Attributes:
+        __tablename__ (str): The name of the table in the database (`slot_occupancy`).
+        date (datetime.date): The date of the slot. Part of the primary key.
+        slot_time (datetime.time): The start time of the slot. Part of the primary key.
+        booked (int): The number of reservations overlapping the slot.
+    """
+
+    __tablename__ = "slot_occupancy"
+
+    date: Mapped[dt_date] = mapped_column(Date, primary_key=True)
+    slot_time: Mapped[dt_time] = mapped_column(Time, primary_key=True)
+    booked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
 def __repr__(self) -> str:
     """
     Return a string representation of the reservation instance.
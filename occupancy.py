@@ -0,0 +1,242 @@
+from itertools import groupby
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from availability import sweep_occupancy
+from models import Reservation, SlotOccupancy
+from schedule import DEFAULT_SCHEDULE
+
+
+COUNTER_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+"""
+dict: The `INSERT ... ON CONFLICT` construct of each database bookings can
+      use, by dialect name. Claiming capacity needs one of them, so the app
+      refuses to start on other databases.
+"""
+
+
+def reservation_intervals(db_session, day):
+    """
+    Load the `(time, duration)` pairs of all reservations on a date.
+
+    This is the recompute path: it reads raw reservations through the covering
+    `(date, time, duration)` index.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+        day (datetime.date): The date to load reservations for.
+
+    Returns:
+        list: `(time, duration)` pairs for the day's reservations.
+    """
+    reservations = db_session.query(Reservation.time, Reservation.duration)
+    reservations = reservations.filter(Reservation.date == day)
+    return [(reservation.time, reservation.duration) for reservation in reservations.all()]
+
+
+def load_occupancy(db_session, day):
+    """
+    Read the materialized occupancy of every booked slot on a date.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+        day (datetime.date): The date to read occupancy for.
+
+    Returns:
+        dict: Slot start times mapped to the number of overlapping reservations.
+              Slots without bookings are absent.
+    """
+    rows = db_session.query(SlotOccupancy.slot_time, SlotOccupancy.booked)
+    rows = rows.filter(SlotOccupancy.date == day)
+    return {row.slot_time: row.booked for row in rows.all()}
+
+
+def load_occupancy_range(db_session, start, end):
+    """
+    Read the materialized occupancy of every booked slot in a date range.
+
+    All dates are loaded with a single query over the primary key.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+        start (datetime.date): The first date of the range.
+        end (datetime.date): The last date of the range, inclusive.
+
+    Returns:
+        dict: Dates mapped to dicts of slot start times and the number of
+              overlapping reservations. Dates without bookings are absent.
+    """
+    rows = db_session.query(SlotOccupancy.date, SlotOccupancy.slot_time, SlotOccupancy.booked)
+    rows = rows.filter(SlotOccupancy.date.between(start, end))
+    rows = rows.order_by(SlotOccupancy.date, SlotOccupancy.slot_time)
+
+    occupancy = {}
+    for day, day_rows in groupby(rows.all(), key=lambda row: row.date):
+        occupancy[day] = {row.slot_time: row.booked for row in day_rows}
+    return occupancy
+
+
+def insert_counters(db_session, keys):
+    """
+    Create the occupancy counters of the given slots that do not exist yet.
+
+    Uses the dialect's `INSERT ... ON CONFLICT DO NOTHING`, so concurrent
+    bookings creating the same counter do not fail. On SQLite this write
+    also takes the database's write lock for the rest of the transaction.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to write with.
+        keys (iterable): `(date, slot_time)` pairs.
+    """
+    rows = [{"date": day, "slot_time": slot_time, "booked": 0} for day, slot_time in keys]
+    if rows:
+        insert_statement = COUNTER_INSERTS[db_session.get_bind().dialect.name]
+        db_session.execute(insert_statement(SlotOccupancy).on_conflict_do_nothing(), rows)
+
+
+def reserve_slots(db_session, reservation, tables=None, schedule=None):
+    """
+    Claim a table in every slot a reservation covers, if all have one free.
+
+    Missing counters are created first, then the covered counters are read
+    with `SELECT ... FOR UPDATE` and incremented only if none of them is
+    already at capacity. On PostgreSQL the row locks make an overlapping
+    booking wait until this transaction ends and then read its counts; on
+    SQLite, which ignores `FOR UPDATE`, the counter insert has already taken
+    the write lock, with the same effect. Rows are locked in slot order, so
+    two bookings cannot deadlock. The work happens in the session's current
+    transaction; the caller commits on success and rolls back on failure.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session holding the reservation.
+        reservation (Reservation): The reservation being booked.
+        tables (int, optional): The number of tables per slot. Defaults to
+            the capacity of the reservation's date in the schedule.
+        schedule (schedule.Schedule, optional): The opening hours and
+            capacity. Defaults to `schedule.DEFAULT_SCHEDULE`.
+
+    Returns:
+        bool: True if the slots were claimed, False if any covered slot is
+              fully booked or the reservation lies outside opening hours.
+    """
+    day_schedule = (schedule or DEFAULT_SCHEDULE).for_day(reservation.date)
+    tables = day_schedule.tables if tables is None else tables
+    slots = day_schedule.covered_slots(reservation.time, reservation.duration)
+    if not slots:
+        return False
+
+    insert_counters(db_session, [(reservation.date, slot_time) for slot_time in slots])
+    booked = db_session.execute(
+        select(SlotOccupancy.booked)
+        .where(SlotOccupancy.date == reservation.date, SlotOccupancy.slot_time.in_(slots))
+        .order_by(SlotOccupancy.slot_time)
+        .with_for_update()
+    ).scalars().all()
+    if len(booked) != len(slots) or max(booked) >= tables:
+        return False
+
+    statement = (
+        update(SlotOccupancy)
+        .where(SlotOccupancy.date == reservation.date, SlotOccupancy.slot_time.in_(slots))
+        .values(booked=SlotOccupancy.booked + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db_session.execute(statement)
+    return True
+
+
+def recompute_occupancy(rows, schedule=None):
+    """
+    Recompute slot occupancy from raw reservation rows.
+
+    Args:
+        rows (iterable): `(date, time, duration)` rows ordered by date.
+        schedule (schedule.Schedule, optional): The opening hours. Defaults
+            to `schedule.DEFAULT_SCHEDULE`.
+
+    Returns:
+        dict: `(date, slot_time)` keys mapped to the number of overlapping
+              reservations. Slots without bookings are absent.
+    """
+    schedule = schedule or DEFAULT_SCHEDULE
+    occupancy = {}
+
+    for day, day_rows in groupby(rows, key=lambda row: row[0]):
+        day_schedule = schedule.for_day(day)
+        intervals = [(row[1], row[2]) for row in day_rows]
+        counts = sweep_occupancy(
+            intervals, len(day_schedule.slots), day_schedule.interval, day_schedule.opening_time
+        )
+        for slot_time, booked in zip(day_schedule.slots, counts):
+            if booked:
+                occupancy[(day, slot_time)] = booked
+
+    return occupancy
+
+
+def _reservation_rows(db_session, batch_size=10_000):
+    """
+    Stream `(date, time, duration)` for every reservation, ordered by date.
+    """
+    query = db_session.query(Reservation.date, Reservation.time, Reservation.duration)
+    query = query.order_by(Reservation.date)
+    return query.yield_per(batch_size)
+
+
+def rebuild_occupancy(db_session, batch_size=10_000, schedule=None):
+    """
+    Backfill the `slot_occupancy` table from existing reservations.
+
+    All materialized rows are replaced within the session's transaction; the
+    caller is responsible for committing.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to rebuild with.
+        batch_size (int): The number of rows fetched and inserted per batch.
+        schedule (schedule.Schedule, optional): The opening hours. Defaults
+            to `schedule.DEFAULT_SCHEDULE`.
+
+    Returns:
+        int: The number of occupancy rows written.
+    """
+    occupancy = recompute_occupancy(_reservation_rows(db_session, batch_size), schedule)
+
+    db_session.execute(delete(SlotOccupancy))
+    rows = [
+        {"date": day, "slot_time": slot_time, "booked": booked}
+        for (day, slot_time), booked in occupancy.items()
+    ]
+    for start in range(0, len(rows), batch_size):
+        db_session.execute(insert(SlotOccupancy), rows[start:start + batch_size])
+
+    return len(rows)
+
+
+def check_occupancy(db_session, schedule=None):
+    """
+    Compare the materialized occupancy with a full recompute from reservations.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to check with.
+        schedule (schedule.Schedule, optional): The opening hours. Defaults
+            to `schedule.DEFAULT_SCHEDULE`.
+
+    Returns:
+        list: `(date, slot_time, materialized, recomputed)` tuples for every
+              slot where the two disagree, sorted by date and time. An empty
+              list means the table is consistent.
+    """
+    expected = recompute_occupancy(_reservation_rows(db_session), schedule)
+    actual = {
+        (row.date, row.slot_time): row.booked
+        for row in db_session.query(SlotOccupancy).all()
+        if row.booked
+    }
+
+    mismatches = [
+        (day, slot_time, actual.get((day, slot_time), 0), expected.get((day, slot_time), 0))
+        for day, slot_time in expected.keys() | actual.keys()
+        if actual.get((day, slot_time), 0) != expected.get((day, slot_time), 0)
+    ]
+    return sorted(mismatches)
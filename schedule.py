@@ -0,0 +1,305 @@
+import json
+import logging
+import os
+import threading
+import time as timer
+from collections import namedtuple
+from datetime import date, datetime
+from types import MappingProxyType
+
+from availability import CLOSING_TIME, OPENING_TIME, SLOT_INTERVAL, TABLES, covered_slot_range, generate_slots
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class DaySchedule(namedtuple(
+    "DaySchedule", ["opening_time", "closing_time", "interval", "tables", "slots", "template"]
+)):
+    """
+    The compiled hours and capacity of one kind of day.
+
+    `slots` holds the slot start times and `template` maps each of them to
+    the number of tables, so availability starts from a copy of the
+    template instead of generating slots. A closed day has no slots.
+    """
+
+    __slots__ = ()
+
+    def covered_slots(self, reserved_time, reserved_duration):
+        """
+        List the slot start times a reservation occupies on this day.
+
+        Args:
+            reserved_time (datetime.time): The reservation start time.
+            reserved_duration (int): The reservation length in hours.
+
+        Returns:
+            list: The covered slot start times, empty outside opening hours.
+        """
+        first, last = covered_slot_range(
+            reserved_time, reserved_duration, len(self.slots), self.interval, self.opening_time
+        )
+        return list(self.slots[first:last])
+
+    def available_tables(self, occupancy, tables=None):
+        """
+        Compute the number of free tables for each slot from stored occupancy.
+
+        Args:
+            occupancy (dict): Slot start times mapped to the number of
+                overlapping reservations. Slots without bookings may be absent.
+            tables (int, optional): A capacity to use instead of the day's.
+
+        Returns:
+            dict: Every slot start time mapped to the number of available
+                  tables, including fully booked slots with 0.
+        """
+        available = dict(self.template) if tables is None else dict.fromkeys(self.slots, tables)
+        for slot_time, booked in occupancy.items():
+            if slot_time in available:
+                available[slot_time] = max(available[slot_time] - booked, 0)
+        return available
+
+
+def compile_day(opening_time, closing_time, interval, tables):
+    """
+    Precompute the slots and availability template of a day.
+
+    Args:
+        opening_time (datetime.time): The start of the first slot.
+        closing_time (datetime.time): The time after which no slot may start.
+        interval (int): The slot length in minutes.
+        tables (int): The number of tables available in every slot.
+
+    Returns:
+        DaySchedule: The compiled day.
+    """
+    slots = tuple(generate_slots(interval, opening_time, closing_time))
+    return DaySchedule(
+        opening_time, closing_time, interval, tables, slots,
+        MappingProxyType(dict.fromkeys(slots, tables)),
+    )
+
+
+class Schedule:
+    """
+    Opening hours and capacity for every date, compiled from a schedule config.
+
+    Args:
+        interval (int): The slot length in minutes, shared by all days since
+            slot occupancy is stored per slot.
+        weekdays (tuple): Seven `DaySchedule` objects, Monday first.
+        holidays (dict): Dates mapped to the `DaySchedule` replacing their weekday's.
+        version: Identifies the config the schedule was compiled from.
+    """
+
+    def __init__(self, interval, weekdays, holidays=None, version=None):
+        self.interval = interval
+        self.weekdays = tuple(weekdays)
+        self.holidays = MappingProxyType(dict(holidays or {}))
+        self.version = version
+
+    def for_day(self, day):
+        """
+        Look up the hours and capacity of a date.
+
+        Args:
+            day (datetime.date): The date, or a datetime on that date.
+
+        Returns:
+            DaySchedule: The date's holiday schedule if it has one, otherwise
+                its weekday's.
+        """
+        if isinstance(day, datetime):
+            day = day.date()
+        return self.holidays.get(day, self.weekdays[day.weekday()])
+
+
+def _parse_time(value, where):
+    """
+    Parse an "HH:MM" time from the schedule config.
+    """
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except (TypeError, ValueError):
+        raise ValueError(f"{where}: expected a time in HH:MM format, got {value!r}")
+
+
+def _compile_override(base, override, where, interval):
+    """
+    Apply a weekday or holiday entry on top of the schedule it replaces.
+    """
+    if not isinstance(override, dict) or set(override) - {"hours", "tables", "closed"}:
+        raise ValueError(f"{where}: expected an object with 'hours', 'tables' or 'closed'")
+
+    opening_time, closing_time, tables = base.opening_time, base.closing_time, base.tables
+    if "hours" in override:
+        hours = override["hours"]
+        if not isinstance(hours, list) or len(hours) != 2:
+            raise ValueError(f"{where}: 'hours' must be [opening, closing]")
+        opening_time = _parse_time(hours[0], where)
+        closing_time = _parse_time(hours[1], where)
+        if closing_time <= opening_time:
+            raise ValueError(f"{where}: closing time must be after opening time")
+    if "tables" in override:
+        tables = override["tables"]
+        if not isinstance(tables, int) or tables < 0:
+            raise ValueError(f"{where}: 'tables' must be a non-negative integer")
+    if override.get("closed"):
+        closing_time = opening_time  # no slots
+    return compile_day(opening_time, closing_time, interval, tables)
+
+
+def compile_schedule(config, version=None):
+    """
+    Compile a schedule config into precomputed per-day slots.
+
+    The config holds the default `hours`, `tables` and slot `interval`,
+    optional `weekdays` entries overriding the hours or tables of a weekday
+    or closing it, and optional `holidays` entries doing the same for a
+    single date on top of its weekday:
+
+        {
+            "interval": 30,
+            "tables": 6,
+            "hours": ["17:00", "23:00"],
+            "weekdays": {"friday": {"hours": ["17:00", "23:30"], "tables": 8},
+                         "monday": {"closed": true}},
+            "holidays": {"2024-12-25": {"closed": true}}
+        }
+
+    Every weekday is compiled once, and so is every holiday, so looking up a
+    date's slots never parses or generates anything.
+
+    Args:
+        config (dict): The schedule config.
+        version: Stored as `Schedule.version`.
+
+    Returns:
+        Schedule: The compiled schedule.
+
+    Raises:
+        ValueError: If the config is invalid.
+    """
+    interval = config.get("interval", SLOT_INTERVAL)
+    if not isinstance(interval, int) or interval <= 0:
+        raise ValueError("interval: must be a positive number of minutes")
+
+    default = _compile_override(
+        compile_day(OPENING_TIME, CLOSING_TIME, interval, TABLES),
+        {key: config[key] for key in ("hours", "tables") if key in config},
+        "schedule", interval,
+    )
+
+    overrides = config.get("weekdays", {})
+    unknown = set(overrides) - set(WEEKDAYS)
+    if unknown:
+        raise ValueError(f"weekdays: unknown weekday {sorted(unknown)[0]!r}")
+    weekdays = [
+        _compile_override(default, overrides[name], name, interval) if name in overrides else default
+        for name in WEEKDAYS
+    ]
+
+    holidays = {}
+    for key, override in config.get("holidays", {}).items():
+        try:
+            day = date.fromisoformat(key)
+        except ValueError:
+            raise ValueError(f"holidays: expected a date in YYYY-MM-DD format, got {key!r}")
+        holidays[day] = _compile_override(weekdays[day.weekday()], override, key, interval)
+
+    return Schedule(interval, weekdays, holidays, version)
+
+
+DEFAULT_SCHEDULE = compile_schedule({})
+"""
+Schedule: The built-in hours and capacity from `availability`, used when no
+          schedule is passed.
+"""
+
+
+def read_schedule(path):
+    """
+    Load and compile a schedule file.
+
+    Args:
+        path (str): The path of the schedule JSON file.
+
+    Returns:
+        Schedule: The compiled schedule, versioned by the file's inode, size
+            and modification time.
+
+    Raises:
+        ValueError: If the file is not valid JSON or not a valid schedule.
+    """
+    stat = os.stat(path)
+    with open(path, "r") as file:
+        config = json.load(file)
+    return compile_schedule(config, version=(stat.st_ino, stat.st_size, stat.st_mtime_ns))
+
+
+class ScheduleCache:
+    """
+    The compiled schedule, reloaded when its file changes.
+
+    Works like `menu.MenuCache`: the file is checked with a single `stat`
+    call at most once every `check_interval` seconds, and an invalid file
+    keeps the previous schedule in use until it is fixed. So does a file
+    changing the slot `interval`, since `slot_occupancy` counts bookings
+    per slot of the loaded interval; that change needs a restart after
+    `flask rebuild-occupancy`.
+
+    Args:
+        path (str): The path of the schedule JSON file.
+        check_interval (float): Minimum seconds between file checks.
+        clock (callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, path, check_interval=2.0, clock=timer.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._schedule = read_schedule(path)
+        self._rejected = None
+        self._checked_at = clock()
+
+    def get(self):
+        """
+        Return the current schedule, reloading it first if the file changed.
+
+        Returns:
+            Schedule: The compiled schedule.
+        """
+        if self.clock() - self._checked_at >= self.check_interval:
+            self._refresh()
+        return self._schedule
+
+    def _refresh(self):
+        """
+        Recompile the schedule if the file's signature changed since the last load.
+        """
+        with self._lock:
+            now = self.clock()
+            if now - self._checked_at < self.check_interval:
+                return  # another thread just checked
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                if version == self._schedule.version or version == self._rejected:
+                    return
+                schedule = read_schedule(self.path)
+            except (OSError, ValueError):
+                return  # keep the last good schedule
+            if schedule.interval != self._schedule.interval:
+                self._rejected = version
+                logger.error(
+                    "%s changes the slot interval from %d to %d minutes; keeping the loaded schedule. "
+                    "Run `flask rebuild-occupancy` and restart the app to apply it.",
+                    self.path, self._schedule.interval, schedule.interval,
+                )
+                return
+            self._schedule = schedule
@@ -0,0 +1,267 @@
+from itertools import groupby
+
+from sqlalchemy import select
+
+from availability import CLOSING_TIME, OPENING_TIME, SLOT_INTERVAL, covered_slot_range, generate_slots
+from models import DiningTable, Reservation
+from schedule import DEFAULT_SCHEDULE
+
+
+DEFAULT_TABLE_SEATS = (2, 2, 4, 4, 6, 6)
+"""
+tuple: Seats per table of the default floor plan, created by `initialize_db`
+       when no tables are configured. Six tables, matching `TABLES`.
+"""
+
+
+class SeatingPlan:
+    """
+    The table assignments of one day, kept as bitsets for constant-time lookups.
+
+    Tables are numbered by increasing seat count, and every slot of the day
+    holds a bitmask of the tables still free in it. A second set of masks
+    marks, per party size, the tables with enough seats. Finding a table for
+    N people from T for D hours is then the AND of the party-size mask with
+    the free masks of the covered slots: a handful of integer operations,
+    however many tables there are. The lowest set bit of the result is the
+    smallest table that fits, so parties are packed best-fit and large
+    tables stay free for large parties.
+
+    Args:
+        tables (iterable): `(table_id, seats)` pairs.
+        interval (int): The slot length in minutes. Default is 30.
+        opening_time (datetime.time): The start of the first slot.
+        closing_time (datetime.time): The time after which no slot may start.
+    """
+
+    def __init__(self, tables, interval=SLOT_INTERVAL, opening_time=OPENING_TIME,
+                 closing_time=CLOSING_TIME):
+        self.tables = sorted(tables, key=lambda table: (table[1], table[0]))
+        self.interval = interval
+        self.opening_time = opening_time
+        self.slot_count = len(generate_slots(interval, opening_time, closing_time))
+        self._bits = {table_id: 1 << index for index, (table_id, _) in enumerate(self.tables)}
+
+        all_tables = (1 << len(self.tables)) - 1
+        self._free = [all_tables] * self.slot_count
+
+        # _fits[n] has a bit for every table seating at least n people
+        max_seats = max((seats for _, seats in self.tables), default=0)
+        self._fits = [0] * (max_seats + 1)
+        for table_id, seats in self.tables:
+            for party in range(seats + 1):
+                self._fits[party] |= self._bits[table_id]
+
+    def _slot_range(self, start_time, duration):
+        """
+        Return the `(first, last)` slot indexes a booking covers.
+        """
+        return covered_slot_range(
+            start_time, duration, self.slot_count, self.interval, self.opening_time
+        )
+
+    def candidates(self, num_people, start_time, duration=1):
+        """
+        Return the bitmask of tables that seat a party and are free for a booking.
+
+        Args:
+            num_people (int): The party size.
+            start_time (datetime.time): The start of the booking.
+            duration (int): The booking length in hours. Default is 1.
+
+        Returns:
+            int: A bit per suitable table, 0 if there is none.
+        """
+        first, last = self._slot_range(start_time, duration)
+        if first == last or num_people >= len(self._fits):
+            return 0
+
+        mask = self._fits[num_people]
+        for slot in range(first, last):
+            mask &= self._free[slot]
+            if not mask:
+                break
+        return mask
+
+    def find_table(self, num_people, start_time, duration=1):
+        """
+        Find the smallest table that seats a party and is free for a booking.
+
+        Args:
+            num_people (int): The party size.
+            start_time (datetime.time): The start of the booking.
+            duration (int): The booking length in hours. Default is 1.
+
+        Returns:
+            The id of the table, or None if no table fits.
+        """
+        mask = self.candidates(num_people, start_time, duration)
+        if not mask:
+            return None
+        return self.tables[(mask & -mask).bit_length() - 1][0]
+
+    def free_tables(self, num_people, start_time, duration=1):
+        """
+        Count the tables that could take a booking.
+
+        Args:
+            num_people (int): The party size.
+            start_time (datetime.time): The start of the booking.
+            duration (int): The booking length in hours. Default is 1.
+
+        Returns:
+            int: The number of suitable free tables.
+        """
+        return self.candidates(num_people, start_time, duration).bit_count()
+
+    def claim(self, table_id, start_time, duration=1):
+        """
+        Mark a table as taken for a booking's slots.
+
+        Args:
+            table_id: The id of the table.
+            start_time (datetime.time): The start of the booking.
+            duration (int): The booking length in hours. Default is 1.
+
+        Raises:
+            ValueError: If the table is unknown or already taken in one of the slots.
+        """
+        bit = self._bits.get(table_id)
+        if bit is None:
+            raise ValueError(f"Unknown table {table_id}")
+
+        first, last = self._slot_range(start_time, duration)
+        if any(not self._free[slot] & bit for slot in range(first, last)):
+            raise ValueError(f"Table {table_id} is already taken at {start_time}")
+        for slot in range(first, last):
+            self._free[slot] &= ~bit
+
+    def assign(self, num_people, start_time, duration=1):
+        """
+        Find the smallest fitting table for a booking and claim it.
+
+        Args:
+            num_people (int): The party size.
+            start_time (datetime.time): The start of the booking.
+            duration (int): The booking length in hours. Default is 1.
+
+        Returns:
+            The id of the assigned table, or None if no table fits.
+        """
+        table_id = self.find_table(num_people, start_time, duration)
+        if table_id is not None:
+            self.claim(table_id, start_time, duration)
+        return table_id
+
+    @classmethod
+    def from_bookings(cls, tables, bookings, **options):
+        """
+        Build a day's plan from its existing bookings.
+
+        Bookings with a table keep it. Bookings made before tables were
+        assigned, or whose table no longer exists, are then seated best-fit,
+        so they still take up a table.
+
+        Args:
+            tables (iterable): `(table_id, seats)` pairs.
+            bookings (iterable): `(table_id, num_people, time, duration)` rows;
+                `table_id` may be None.
+            **options: Passed to `SeatingPlan`.
+
+        Returns:
+            SeatingPlan: The plan with every booking claimed.
+        """
+        plan = cls(tables, **options)
+        unassigned = []
+        for table_id, num_people, start_time, duration in bookings:
+            try:
+                plan.claim(table_id, start_time, duration)
+            except ValueError:  # no table yet, or a removed or clashing one
+                unassigned.append((num_people, start_time, duration))
+        for num_people, start_time, duration in unassigned:
+            plan.assign(num_people, start_time, duration)
+        return plan
+
+
+def load_tables(db_session):
+    """
+    Load the restaurant's tables.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+
+    Returns:
+        list: `(table_id, seats)` pairs.
+    """
+    return [tuple(row) for row in db_session.execute(select(DiningTable.id, DiningTable.seats))]
+
+
+def load_seating_plans(db_session, days, tables=None, exclude_id=None, schedule=None):
+    """
+    Build the seating plans of several dates with a single query.
+
+    Each plan covers its date's opening hours in the schedule.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session to query with.
+        days (iterable): The dates to build plans for.
+        tables (list, optional): `(table_id, seats)` pairs. Loaded if not given.
+        exclude_id (int, optional): A reservation to leave out, such as the
+            one being booked.
+        schedule (schedule.Schedule, optional): The opening hours. Defaults
+            to `schedule.DEFAULT_SCHEDULE`.
+
+    Returns:
+        dict: Dates mapped to `SeatingPlan` objects, one for every date in `days`.
+    """
+    tables = load_tables(db_session) if tables is None else tables
+    schedule = schedule or DEFAULT_SCHEDULE
+    days = set(days)
+    query = (
+        select(Reservation.date, Reservation.table_id, Reservation.num_people,
+               Reservation.time, Reservation.duration)
+        .where(Reservation.date.in_(days))
+        .order_by(Reservation.date, Reservation.id)
+    )
+    if exclude_id is not None:
+        query = query.where(Reservation.id != exclude_id)
+
+    def hours(day):
+        day_schedule = schedule.for_day(day)
+        return {
+            "interval": day_schedule.interval,
+            "opening_time": day_schedule.opening_time,
+            "closing_time": day_schedule.closing_time,
+        }
+
+    plans = {day: SeatingPlan(tables, **hours(day)) for day in days}
+    for day, rows in groupby(db_session.execute(query), key=lambda row: row.date):
+        plans[day] = SeatingPlan.from_bookings(tables, [tuple(row)[1:] for row in rows], **hours(day))
+    return plans
+
+
+def assign_table(db_session, reservation, schedule=None):
+    """
+    Seat a pending reservation at the smallest free table for its party.
+
+    Call this after `occupancy.reserve_slots` in the same transaction: it
+    locks the counters of the booked slots, so no overlapping booking can
+    take the table between this lookup and the commit.
+
+    Args:
+        db_session (sqlalchemy.orm.Session): The session holding the reservation.
+        reservation (Reservation): The reservation being booked.
+        schedule (schedule.Schedule, optional): The opening hours. Defaults
+            to `schedule.DEFAULT_SCHEDULE`.
+
+    Returns:
+        bool: True if a table was assigned to `reservation.table_id`, False if
+              no table seats the party for the whole booking.
+    """
+    db_session.flush()
+    plans = load_seating_plans(
+        db_session, [reservation.date], exclude_id=reservation.id, schedule=schedule
+    )
+    plan = plans[reservation.date]
+    reservation.table_id = plan.assign(reservation.num_people, reservation.time, reservation.duration)
+    return reservation.table_id is not None
@@ -21,20 +21,48 @@ document.addEventListener("mouseleave", () => {
 
 //--------------------------------------------------------//
 // Timeslot AJAX
+// Fill the time select with the available slots, keeping the current choice
+function updateTimeOptions(counts) {
+  const timeSelect = document.getElementById("time");
+  const selected = timeSelect.value;
+  const available = Object.keys(counts).filter(slot => counts[slot] > 0);
+
+  timeSelect.innerHTML = ""; // clear current options
+  available.forEach(slot => {
+    const option = document.createElement("option");
+    option.value = slot;
+    option.textContent = slot;
+    timeSelect.appendChild(option);
+  });
+
+  if (available.includes(selected)) {
+    timeSelect.value = selected;
+  } else if (selected && selected in counts) {
+    // the chosen time was just booked by someone else
+    const timeError = document.getElementById("timeError");
+    timeError.innerText = `${selected} was just booked. Please choose another time.`;
+    timeError.style.color = "red";
+  }
+}
+
+// Follow the selected date's availability over one event stream instead of polling
+let availabilityEvents = null;
 document.getElementById("date").addEventListener("change", function () {
   const selectedDate = this.value;
-  fetch(`/get_available_slots/${selectedDate}`)
-    .then(response => response.json())
-    .then(data => {
-      const timeSelect = document.getElementById("time");
-      timeSelect.innerHTML = ""; // clear current options
-      data.slots.forEach(slot => {
-        const option = document.createElement("option");
-        option.value = slot;
-        option.textContent = slot;
-        timeSelect.appendChild(option);
-      });
-    });
+  if (availabilityEvents) {
+    availabilityEvents.close();
+  }
+  if (!window.EventSource) {
+    fetch(`/get_available_slots/${selectedDate}`)
+      .then(response => response.json())
+      .then(data => updateTimeOptions(Object.fromEntries(data.slots.map(slot => [slot, 1]))));
+    return;
+  }
+  // the first event holds the current counts, later ones follow each booking
+  availabilityEvents = new EventSource(`/availability/${selectedDate}/events`);
+  availabilityEvents.addEventListener("availability", (event) => {
+    updateTimeOptions(JSON.parse(event.data).slots);
+  });
 });
 
 //--------------------------------------------------------//
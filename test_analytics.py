@@ -0,0 +1,103 @@
+import random
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from availability import TABLES, compute_available_slots, generate_slots
+from database import initialize_db
+from models import Reservation
+
+np = pytest.importorskip("numpy")
+from analytics import occupancy_report, reservation_columns_query, slot_bitmap  # noqa: E402
+
+
+@pytest.fixture
+def db_session():
+    """
+    Pytest fixture yielding a session on a fresh in-memory database.
+    """
+    engine = create_engine("sqlite://")
+    initialize_db(engine)
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    engine.dispose()
+
+
+def test_slot_bitmap_matches_slot_overlap():
+    """
+    Test that a reservation covers the slots starting within its period.
+    """
+    slot_starts = np.array([1020, 1050, 1080, 1110])  # 17:00 to 18:30
+    covered = slot_bitmap(np.array([1020, 1035, 990]), np.array([1, 1, 1]), slot_starts)
+
+    assert covered.tolist() == [
+        [True, True, False, False],
+        [False, True, True, False],  # 17:15 covers 17:30 and 18:00
+        [True, False, False, False],  # 16:30 covers 17:00
+    ]
+
+
+def test_occupancy_report_matches_per_day_availability(db_session):
+    """
+    Test that the matrix agrees with the per-day computation and the summary figures add up.
+    """
+    rng = random.Random(17)
+    start = date(2024, 1, 1)
+    rows = [
+        {"name": "Bench", "email": "bench@example.com", "num_people": 2,
+         "date": start + timedelta(days=rng.randrange(30)),
+         "time": time(rng.randint(16, 22), rng.choice((0, 15, 30))),
+         "duration": rng.choice((1, 2, 3, None))}
+        for _ in range(300)
+    ]
+    # 2024-01-31 is fully booked all evening
+    rows += [
+        {"name": "Full", "email": "full@example.com", "num_people": 2,
+         "date": date(2024, 1, 31), "time": time(hour, 0), "duration": 3}
+        for hour in (17, 20) for _ in range(TABLES)
+    ]
+    db_session.execute(insert(Reservation), rows)
+
+    report = occupancy_report(db_session, start, date(2024, 1, 31), batch_size=64)
+
+    assert report.occupancy.shape == (31, len(generate_slots()))
+    for offset in range(31):
+        day = start + timedelta(days=offset)
+        intervals = [(row["time"], row["duration"]) for row in rows if row["date"] == day]
+        available = compute_available_slots(intervals, tables=TABLES)
+        assert {
+            slot_time: TABLES - booked
+            for slot_time, booked in zip(report.slots, report.occupancy[offset].tolist())
+            if booked < TABLES
+        } == available
+
+    assert date(2024, 1, 31) in report.full_days
+    assert 0 < report.utilization <= 1
+    assert report.peak_slots[0][1] == max(report.slot_utilization.values())
+    assert len(report.peak_slots) == 3
+
+
+def test_occupancy_report_of_an_empty_range(db_session):
+    """
+    Test that a range without bookings reports no utilization.
+    """
+    report = occupancy_report(db_session, date(2024, 1, 1), date(2024, 1, 7))
+
+    assert report.occupancy.sum() == 0
+    assert report.utilization == 0.0
+    assert report.full_days == []
+
+
+def test_postgresql_query_uses_its_own_date_functions():
+    """
+    Test that the report query avoids SQLite's text date functions on PostgreSQL.
+    """
+    query = reservation_columns_query("postgresql", date(2024, 1, 1), date(2024, 12, 31))
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert "julianday" not in sql and "substr" not in sql
+    assert "reservation_history.date - " in sql
+    assert "EXTRACT(hour FROM reservation_history.time)" in sql
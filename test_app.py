@@ -1,14 +1,30 @@
+import logging
 import os
+import threading
 import pytest
 from flask import Flask
 from app import (
-    app,
+    create_app,
     Reservation,
     SessionLocal,
     get_available_slots
 )  # Import necessary components such as flask app and database
 from forms import ReservationForm
-from database import SessionLocal, initialize_db
+import database
+from database import SessionLocal, build_engine, create_session_factory, initialize_db
+from logging_config import configure_logging, shutdown_logging
+from benchmarks.soak_sessions import soak
+from occupancy import (
+    check_occupancy,
+    load_occupancy,
+    rebuild_occupancy,
+    reserve_slots,
+    reservation_intervals,
+)
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
 from sqlalchemy.sql import text
 from datetime import datetime
 from unittest.mock import MagicMock, patch
@@ -17,28 +33,41 @@ from datetime import datetime, time
 
 
 @pytest.fixture
-def client():
+def app():
     """
-    Pytest fixture to create a test client for the Flask application.
-    It initializes a temporary SQLite database for testing.
+    Pytest fixture to create the Flask application backed by an in-memory SQLite database.
     """
-    # Configure the app for testing
-    app.config["TESTING"] = True
-    app.config["WTF_CSRF_ENABLED"] = False
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"  # Use in-memory DB
-    app.config["SECRET_KEY"] = "test"
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",  # Use in-memory DB
+        "SECRET_KEY": "test",
+        "RESPONSIVE_IMAGES": False,  # ignore locally built static files
+        "STATIC_FINGERPRINTS": False,
+    })
+    with app.app_context():
+        # Initialize test database
+        initialize_db()
+    yield app
+    app.extensions["database"]["engine"].dispose()
+
 
+@pytest.fixture
+def client(app):
+    """
+    Pytest fixture to create a test client for the Flask application.
+    """
     with app.test_client() as client:
-        with app.app_context():
-            # Initialize test database
-            initialize_db()
+        yield client  # Provide the test client to the tests
 
-            yield client  # Provide the test client to the tests
 
-            # Cleanup: Drop all tables
-            with SessionLocal() as session:
-                session.execute(text("DROP TABLE IF EXISTS reservations"))
-                session.commit()
+@pytest.fixture
+def memory_db(app):
+    """
+    Pytest fixture that yields the session registry bound to the app's in-memory database.
+    """
+    with app.app_context():
+        yield SessionLocal
 
 
 def test_home_page(client):
@@ -69,6 +98,46 @@ def test_menu_page(client):
     response = client.get("/menu")
     assert response.status_code == 200
     assert b"Menu" in response.data  # Adjust to match your template content
+    assert b"<h2>Food</h2>" in response.data
+    assert b"<h2>Drinks</h2>" in response.data
+    assert b"Black Lodge Burger" in response.data
+
+
+def test_static_pages_are_cached_with_validators(app, client):
+    """
+    Test that static pages carry an ETag and Last-Modified and revalidate with a 304.
+    """
+    response = client.get("/about_us")
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    conditional = client.get("/about_us", headers={"If-None-Match": etag})
+    assert conditional.status_code == 304
+    assert conditional.data == b""
+    assert client.get("/about_us", headers={
+        "If-Modified-Since": response.headers["Last-Modified"]
+    }).status_code == 304
+    assert app.extensions["page_cache"].hits == 2
+
+
+def test_menu_edit_invalidates_cached_page(tmp_path):
+    """
+    Test that changing the menu file changes the menu page and its ETag.
+    """
+    path = tmp_path / "menu.json"
+    path.write_text('{"items": [{"category": "Pie", "name": "Cherry Pie", "image": "x.png", "price": "$3"}]}')
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "MENU_PATH": str(path),
+                      "MENU_CHECK_INTERVAL": 0})
+    client = app.test_client()
+    etag = client.get("/menu").headers["ETag"]
+
+    path.write_text('{"items": [{"category": "Coffee", "name": "Damn Fine", "image": "x.png", "price": "$1"}]}')
+    os.utime(path, ns=(0, 10**18))  # force a new mtime on coarse filesystems
+    response = client.get("/menu", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert b"Damn Fine" in response.data and b"Cherry Pie" not in response.data
 
 
 def test_reservations_page_get(client):
@@ -135,18 +204,21 @@ def test_contact_page(client):
     assert b"Address: 135 W North Bend Way, North Bend, Washington"
 
 
-@patch("app.SessionLocal")
-def test_get_available_slots(mock_session):
-    # Mock database session
-    mock_db_session = MagicMock()
-    mock_session.return_value = mock_db_session
-
-    # Mock reservations
-    mock_reservations = [
-        MagicMock(date=datetime(2024, 12, 5).date(), time=time(17, 0), duration=1),
-        MagicMock(date=datetime(2024, 12, 5).date(), time=time(17, 30), duration=1),
-    ]
-    mock_db_session.query.return_value.filter.return_value.all.return_value = mock_reservations
+def test_get_available_slots(memory_db):
+    # Add reservations through the booking write path
+    with memory_db() as db_session:
+        for reserved_time in (time(17, 0), time(17, 30)):
+            reservation = Reservation(
+                name="Dale Cooper",
+                email="cooper@example.com",
+                num_people=2,
+                date=datetime(2024, 12, 5).date(),
+                time=reserved_time,
+                duration=1,
+            )
+            db_session.add(reservation)
+            assert reserve_slots(db_session, reservation)
+        db_session.commit()
 
     # Call the function
     date_to_test = datetime(2024, 12, 5)
@@ -158,6 +230,36 @@ def test_get_available_slots(mock_session):
     assert slots[time(18, 0)] == 5  # Decremented once
     assert slots[time(18, 30)] == 6  # Not decremented
 
+    # Non-default intervals are recomputed from reservations
+    slots = get_available_slots(date_to_test, interval=60)
+    assert slots[time(17, 0)] == 5
+    assert slots[time(18, 0)] == 5
+    assert slots[time(19, 0)] == 6
+
+
+def test_occupancy_rebuild_and_check(memory_db):
+    """
+    Test that a rebuild backfills occupancy and the checker reports drift.
+    """
+    with memory_db() as db_session:
+        db_session.add(Reservation(
+            name="Audrey Horne",
+            email="audrey@example.com",
+            num_people=4,
+            date=datetime(2024, 12, 6).date(),
+            time=time(20, 0),
+            duration=2,
+        ))
+        db_session.commit()
+
+        # Inserted without updating occupancy, so the table has drifted
+        assert len(check_occupancy(db_session)) == 4
+
+        assert rebuild_occupancy(db_session) == 4
+        db_session.commit()
+        assert check_occupancy(db_session) == []
+        assert load_occupancy(db_session, datetime(2024, 12, 6).date())[time(21, 30)] == 1
+
 @patch("app.get_available_slots")
 def test_get_available_slots_api(mock_get_slots, client):
     # Mock available slots
@@ -174,17 +276,7 @@ def test_get_available_slots_api(mock_get_slots, client):
     assert response.status_code == 200
     assert data["17:00"] == 5
 
-@patch("app.get_available_slots")
-@patch("app.SessionLocal")
-def test_reservations_post(mock_session, mock_get_slots, client):
-    # Mock database session
-    mock_db_session = MagicMock()
-    mock_session.return_value = mock_db_session
-
-    # Mock available slots
-    mock_slots = {datetime.strptime("17:00", "%H:%M").time(): 5}
-    mock_get_slots.return_value = mock_slots
-
+def test_reservations_post(client, memory_db):
     # Mock form data
     form_data = {
         "name": "John Doe",
@@ -202,5 +294,451 @@ def test_reservations_post(mock_session, mock_get_slots, client):
     response_data = response.get_json()
     assert response_data["is_valid"] is True
     assert "successfully added" in response_data["message"]
-    mock_db_session.add.assert_called_once()  # Ensure reservation was added
-    mock_db_session.commit.assert_called_once()  # Ensure commit was called
+
+    # Ensure the reservation was committed together with its slot occupancy
+    with memory_db() as db_session:
+        assert db_session.query(Reservation).count() == 1
+        assert check_occupancy(db_session) == []
+        assert load_occupancy(db_session, datetime(2024, 12, 5).date())[time(17, 30)] == 1
+
+
+def test_reservations_post_rejects_fully_booked_slot(client, memory_db):
+    """
+    Test that a booking is rejected once a slot it covers has no free tables.
+    """
+    form_data = {
+        "name": "Bobby Briggs",
+        "email": "bobby@example.com",
+        "num_people": 2,
+        "date": "2024-12-05",
+        "time": "18:30",
+    }
+    for _ in range(6):
+        assert client.post("/reservations", data=form_data).get_json()["is_valid"] is True
+
+    # 18:00 overlaps the fully booked 18:30 slot
+    response = client.post("/reservations", data=dict(form_data, time="18:00"))
+    response_data = response.get_json()
+
+    assert response_data["is_valid"] is False
+    assert response_data["errors"]["time"] == "This time slot is fully booked."
+    with memory_db() as db_session:
+        assert db_session.query(Reservation).count() == 6
+        assert load_occupancy(db_session, datetime(2024, 12, 5).date()).get(time(18, 0), 0) == 0
+    assert client.post("/reservations", data=dict(form_data, time="19:30")).get_json()["is_valid"] is True
+
+
+def test_reservations_post_assigns_tables_by_party_size_and_duration(client, memory_db):
+    """
+    Test that bookings get the smallest free table and are rejected when none seats the party.
+    """
+    form_data = {
+        "name": "Audrey Horne",
+        "email": "audrey@example.com",
+        "num_people": 5,
+        "date": "2024-12-05",
+        "time": "19:00",
+        "duration": 2,
+    }
+    assert client.post("/reservations", data=form_data).get_json()["is_valid"] is True
+    assert client.post("/reservations", data=form_data).get_json()["is_valid"] is True
+
+    # both 6-seat tables are taken until 21:00, though smaller tables are free
+    response = client.post("/reservations", data=dict(form_data, time="20:30", duration=1))
+    response_data = response.get_json()
+    assert response_data["is_valid"] is False
+    assert response_data["errors"]["time"] == "No table for this party size is free at this time."
+
+    response = client.post("/reservations", data=dict(form_data, num_people=2, time="20:30"))
+    assert response.get_json()["is_valid"] is True
+    with memory_db() as db_session:
+        tables = db_session.execute(text(
+            "SELECT r.num_people, r.duration, t.seats FROM reservations r "
+            "JOIN dining_tables t ON t.id = r.table_id ORDER BY r.id"
+        )).all()
+        assert [tuple(row) for row in tables] == [(5, 2, 6), (5, 2, 6), (2, 2, 2)]
+        assert check_occupancy(db_session) == []
+
+
+def test_booking_invalidates_cached_availability(app, client):
+    """
+    Test that availability is served from the cache until a booking for that date invalidates it.
+    """
+    assert client.get("/get_available_slots/2024-12-05?time=20:00").get_json() == {"20:00": 6}
+    assert client.get("/get_available_slots/2024-12-05?time=20:00").get_json() == {"20:00": 6}
+    assert app.extensions["availability_cache"].stats()["hits"] == 1
+
+    form_data = {
+        "name": "Leland Palmer",
+        "email": "leland@example.com",
+        "num_people": 3,
+        "date": "2024-12-05",
+        "time": "20:00",
+    }
+    assert client.post("/reservations", data=form_data).get_json()["is_valid"] is True
+
+    assert client.get("/get_available_slots/2024-12-05?time=20:00").get_json() == {"20:00": 5}
+    assert app.extensions["availability_cache"].stats()["misses"] == 2
+
+
+def test_get_available_slots_range_api(client, memory_db):
+    """
+    Test that the range endpoint returns per-slot counts for every day in the span.
+    """
+    form_data = {
+        "name": "Harry Truman",
+        "email": "truman@example.com",
+        "num_people": 2,
+        "date": "2024-12-06",
+        "time": "17:30",
+    }
+    assert client.post("/reservations", data=form_data).get_json()["is_valid"] is True
+
+    response = client.get("/get_available_slots?from=2024-12-05&to=2024-12-07")
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data["slots"][:3] == ["17:00", "17:30", "18:00"]
+    assert list(data["days"]) == ["2024-12-05", "2024-12-06", "2024-12-07"]
+    assert data["days"]["2024-12-05"] == [6] * 12
+    assert data["days"]["2024-12-06"][:4] == [6, 5, 5, 6]
+
+
+def test_get_available_slots_range_api_rejects_invalid_range(client, memory_db):
+    """
+    Test that malformed, reversed and oversized ranges are rejected.
+    """
+    assert client.get("/get_available_slots?from=2024-12-05").status_code == 400
+    assert client.get("/get_available_slots?from=2024-12-07&to=2024-12-05").status_code == 400
+    assert client.get("/get_available_slots?from=2024-01-01&to=2024-12-31").status_code == 400
+
+
+def test_logging_is_queued_and_sql_echo_off_by_default(app, memory_db):
+    """
+    Test that log records are written by the listener thread and SQL echo stays off by default.
+    """
+    assert not database.get_engine().echo
+    assert logging.getLogger("sqlalchemy.engine").getEffectiveLevel() > logging.INFO
+
+    emitted = []
+
+    class Collector(logging.Handler):
+        def emit(self, record):
+            emitted.append((record.getMessage(), threading.current_thread()))
+
+    configure_logging(app, level="DEBUG", handlers=[Collector()])
+    try:
+        get_available_slots(datetime(2024, 12, 5))
+    finally:
+        shutdown_logging()  # flushes the queue
+        configure_logging(app, level=app.config["LOG_LEVEL"], sql_echo=app.config["SQL_ECHO"])
+
+    messages = [message for message, thread in emitted]
+    assert any(message.startswith("Computed slots for 2024-12-05") for message in messages)
+    assert all(thread is not threading.main_thread() for message, thread in emitted)
+
+
+def test_sessions_are_released_after_every_request(tmp_path):
+    """
+    Test that connections are returned to the pool on success and error paths.
+    """
+    samples = soak(requests=400, checkpoint=100, database_path=str(tmp_path / "soak.db"))
+
+    assert len(samples) == 4
+    assert all(checked_out == 0 for _, checked_out, _ in samples)
+    assert len({open_connections for _, _, open_connections in samples}) == 1
+
+
+def test_sqlite_profile_pragmas_and_read_only_pool(tmp_path):
+    """
+    Test that connections get the performance profile and the read pool cannot write.
+    """
+    uri = f"sqlite:///{tmp_path / 'profile.db'}"
+    engine = build_engine(uri, profile="performance")
+    read_engine = build_engine(uri, profile="performance", read_only=True)
+    initialize_db(bind=engine)
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+    with read_engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM reservations").scalar() == 0
+        with pytest.raises(OperationalError, match="readonly"):
+            connection.exec_driver_sql("DELETE FROM reservations")
+
+    engine.dispose()
+    read_engine.dispose()
+
+
+def test_availability_query_uses_covering_index():
+    """
+    Test that the availability recompute query is answered from the covering index without a table scan.
+    """
+    engine = create_engine("sqlite://")
+    initialize_db(bind=engine)
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with sessionmaker(bind=engine)() as db_session:
+        reservation_intervals(db_session, datetime(2024, 12, 5).date())
+
+    statement, parameters = statements[-1]
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    details = " ".join(row[-1] for row in plan)
+
+    assert "USING COVERING INDEX ix_reservations_date_time_duration" in details
+    assert "SCAN reservations" not in details
+
+
+def test_migrate_indexes_is_idempotent():
+    """
+    Test that indexes are added to an existing reservations table created without them.
+    """
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE reservations (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+            "email VARCHAR(120) NOT NULL, num_people INTEGER NOT NULL, date DATE NOT NULL, "
+            "time TIME NOT NULL, duration INTEGER, created_at DATETIME)"
+        ))
+
+    initialize_db(bind=engine)
+    initialize_db(bind=engine)  # second run must not fail
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("reservations")}
+    assert {"ix_reservations_date_time", "ix_reservations_date_time_duration"} <= index_names
+
+
+def test_concurrent_bookings_never_exceed_capacity(tmp_path):
+    """
+    Test that hundreds of simultaneous bookings for one slot accept exactly the capacity.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'stress.db'}", connect_args={"timeout": 60})
+    initialize_db(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    attempts = 300
+    barrier = threading.Barrier(attempts)
+    accepted = []
+
+    def book(index):
+        barrier.wait()
+        with session_factory() as db_session:
+            reservation = Reservation(
+                name=f"Guest {index}",
+                email="guest@example.com",
+                num_people=2,
+                date=datetime(2024, 12, 5).date(),
+                time=time(19, 0),
+            )
+            db_session.add(reservation)
+            if reserve_slots(db_session, reservation):
+                db_session.commit()
+                accepted.append(index)
+            else:
+                db_session.rollback()
+
+    threads = [threading.Thread(target=book, args=(index,)) for index in range(attempts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(accepted) == 6
+    with session_factory() as db_session:
+        assert db_session.query(Reservation).count() == 6
+        assert check_occupancy(db_session) == []
+    engine.dispose()
+
+
+def test_capacity_claim_locks_counter_rows_on_postgresql():
+    """
+    Test that claiming slots on PostgreSQL upserts the counters and locks them before the check.
+    """
+    db_session = MagicMock()
+    db_session.get_bind.return_value.dialect = postgresql.dialect()
+    db_session.execute.return_value.scalars.return_value.all.return_value = [0, 0]
+    reservation = Reservation(name="Dale Cooper", email="cooper@example.com", num_people=2,
+                              date=datetime(2024, 12, 5).date(), time=time(19, 0), duration=1)
+
+    assert reserve_slots(db_session, reservation)
+    statements = [str(call.args[0].compile(dialect=postgresql.dialect())) for call in db_session.execute.call_args_list]
+    assert "ON CONFLICT DO NOTHING" in statements[0]
+    assert statements[1].endswith("FOR UPDATE")
+    assert statements[2].startswith("UPDATE slot_occupancy")
+
+
+def test_unsupported_databases_are_refused():
+    """
+    Test that the app refuses a database it cannot claim capacity on safely.
+    """
+    with pytest.raises(ValueError, match="SQLite or PostgreSQL"):
+        create_app({"SQLALCHEMY_DATABASE_URI": "mysql://user@localhost/reservations"})
+
+
+def test_bulk_reservations_check_capacity_in_aggregate(app, client, memory_db):
+    """
+    Test that a bulk request validates each record and never overbooks a slot.
+    """
+    booking = {"name": "Log Lady", "email": "log@example.com", "num_people": 1,
+               "date": "2024-12-05", "time": "19:00"}
+    records = [booking] * 7 + [
+        dict(booking, email="not-an-email"),
+        dict(booking, time="09:00"),
+        dict(booking, time="19:30"),
+    ]
+
+    response = client.post("/reservations/bulk", json=records)
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert (data["accepted"], data["rejected"]) == (6, 4)
+    assert data["results"][5] == {"index": 5, "accepted": True, "date": "2024-12-05"}
+    assert data["results"][6]["errors"] == {"time": "This time slot is fully booked."}
+    assert data["results"][7]["errors"] == {"email": "email is invalid"}
+    assert data["results"][8]["errors"] == {"time": "This time is outside opening hours."}
+    assert data["results"][9]["errors"] == {"time": "This time slot is fully booked."}  # overlaps 19:30
+    with memory_db() as db_session:
+        assert db_session.query(Reservation).count() == 6
+        assert check_occupancy(db_session) == []
+
+    assert client.post("/reservations/bulk", json={"name": "x"}).status_code == 400
+    app.config["BULK_API_TOKEN"] = "secret"
+    assert client.post("/reservations/bulk", json=[booking]).status_code == 401
+    assert client.post("/reservations/bulk", json=[], headers={
+        "Authorization": "Bearer secret"
+    }).status_code == 200
+
+
+def test_json_reservations_use_the_form_rules(app, client, memory_db):
+    """
+    Test that the JSON booking API validates like the form and answers with booking status codes.
+    """
+    booking = {"name": "Margaret Lanterman", "email": "log@example.com", "num_people": 1,
+               "date": "2024-12-05", "time": "19:00"}
+
+    response = client.post("/reservations/json", json=dict(booking, email="not-an-email", num_people="7"))
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == {
+        "email": "email is invalid",
+        "num_people": "For reservations of more than 6 people, please contact us directly.",
+    }
+    form_response = client.post("/reservations", data=dict(booking, email="not-an-email", num_people="7"))
+    assert form_response.get_json()["errors"] == response.get_json()["errors"]
+
+    response = client.post("/reservations/json", json=dict(booking, name=["a"], email={"x": 1}))
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == {"name": "Must be a string.", "email": "Must be a string."}
+
+    for _ in range(6):
+        assert client.post("/reservations/json", json=booking).status_code == 201
+    response = client.post("/reservations/json", json=booking)
+    assert response.status_code == 409
+    assert response.get_json()["errors"] == {"time": "This time slot is fully booked."}
+    with memory_db() as db_session:
+        assert db_session.query(Reservation).count() == 6
+
+    assert client.post("/reservations/json", json=[booking]).status_code == 400
+    app.config["BOOKING_API_TOKEN"] = "secret"
+    assert client.post("/reservations/json", json=booking).status_code == 401
+
+
+def test_import_reservations_cli(app, memory_db, tmp_path):
+    """
+    Test that the importer loads CSV files in chunks and reports rejected rows.
+    """
+    path = tmp_path / "history.csv"
+    rows = ["name,email,num_people,date,time"]
+    rows += [f"Guest {day},guest@example.com,2,2023-03-{day:02d},18:00" for day in range(1, 29)]
+    rows += ["Bad,bad,2,2023-03-01,18:00"]
+    path.write_text("\n".join(rows) + "\n")
+
+    result = app.test_cli_runner().invoke(args=["import-reservations", str(path), "--chunk-size", "10"])
+
+    assert result.exit_code == 0, result.output
+    assert "record 28:" in result.output
+    assert "Imported 28 of 29 reservations" in result.output
+    with memory_db() as db_session:
+        assert db_session.query(Reservation).count() == 28
+        assert check_occupancy(db_session) == []
+
+
+def test_occupancy_report_cli(app, tmp_path):
+    """
+    Test that the occupancy report summarizes imported reservations.
+    """
+    pytest.importorskip("numpy")
+    path = tmp_path / "history.csv"
+    rows = ["name,email,num_people,date,time,duration"]
+    rows += [f"Guest {n},guest@example.com,2,2023-03-01,17:00,3" for n in range(6)]
+    rows += [f"Guest {n},guest@example.com,2,2023-03-01,20:00,3" for n in range(6)]
+    rows += ["Guest,guest@example.com,2,2023-03-02,19:00,1"]
+    path.write_text("\n".join(rows) + "\n")
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=["import-reservations", str(path)]).exit_code == 0
+
+    result = runner.invoke(args=["occupancy-report", "--start", "2023-03-01", "--end", "2023-03-02"])
+
+    assert result.exit_code == 0, result.output
+    assert "Utilization: 51.4% of table slots booked." in result.output  # 74 of 2 x 12 x 6
+    assert "Fully booked days: 1\n  2023-03-01" in result.output
+
+
+def test_schedule_change_applies_without_restart(tmp_path):
+    """
+    Test that availability follows the schedule file, including edits made while running.
+    """
+    path = tmp_path / "schedule.json"
+    path.write_text('{"tables": 6, "hours": ["17:00", "23:00"], "weekdays": {"monday": {"closed": true}}}')
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "SCHEDULE_PATH": str(path),
+                      "SCHEDULE_CHECK_INTERVAL": 0, "WTF_CSRF_ENABLED": False})
+    with app.app_context():
+        initialize_db()
+    client = app.test_client()
+
+    assert client.get("/get_available_slots/2024-12-02").get_json() == {"slots": []}  # Monday
+    assert client.get("/get_available_slots/2024-12-05?time=17:00").get_json() == {"17:00": 6}
+    booking = {"name": "Pete Martell", "email": "pete@example.com", "num_people": 2,
+               "date": "2024-12-02", "time": "18:00"}
+    assert client.post("/reservations", data=booking).get_json()["is_valid"] is False
+
+    path.write_text('{"tables": 4, "hours": ["12:00", "15:00"], "holidays": {"2024-12-05": {"tables": 2}}}')
+    os.utime(path, ns=(0, 10**18))  # force a new mtime on coarse filesystems
+
+    assert client.get("/get_available_slots/2024-12-02").get_json()["slots"][0] == "12:00"
+    assert client.get("/get_available_slots/2024-12-05?time=12:00").get_json() == {"12:00": 2}
+    assert client.post("/reservations", data=dict(booking, time="12:00")).get_json()["is_valid"] is True
+    response = client.get("/get_available_slots?from=2024-12-02&to=2024-12-03")
+    assert response.get_json()["days"]["2024-12-02"][:3] == [3, 3, 4]
+
+
+def test_availability_events_stream_booking_updates(app, client):
+    """
+    Test that an event stream starts with a date's counts and receives the counts after each booking.
+    """
+    app.config["AVAILABILITY_EVENTS_HEARTBEAT"] = 0.05
+    response = client.get("/availability/2024-12-05/events", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    events = iter(response.response)
+
+    first = next(events).decode()
+    assert first.startswith("retry: 3000\nevent: availability\n")
+    assert '"17:00":6' in first
+
+    assert client.post("/reservations", data={
+        "name": "Audrey Horne", "email": "audrey@example.com", "num_people": 2,
+        "date": "2024-12-05", "time": "17:00", "duration": 2,
+    }).get_json()["is_valid"]
+    update = next(events).decode()
+    assert update.startswith("event: availability\n")
+    assert '"17:00":5,"17:30":5,"18:00":5,"18:30":5,"19:00":6' in update
+    assert next(events) == b": keepalive\n\n"  # idle
+
+    response.close()
+    assert not app.extensions["availability_broker"].has_listeners(datetime(2024, 12, 5).date())
+    assert client.get("/availability/not-a-date/events").status_code == 400
@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from archive import archive_reservations, reservation_history
+from benchmarks.datagen import seed_database
+from database import build_engine
+from models import ArchivedReservation, Reservation, SlotOccupancy
+from occupancy import check_occupancy
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """
+    Pytest fixture creating a SQLite file seeded with reservations over several months.
+    """
+    engine = build_engine(f"sqlite:///{tmp_path / 'archive.db'}")
+    seed_database(engine, 600, date(2024, 1, 1), months=3)
+    yield engine
+    engine.dispose()
+
+
+def count(db_session, model, *criteria):
+    """
+    Count the rows of a model matching the criteria.
+    """
+    return db_session.scalar(select(func.count()).select_from(model).where(*criteria))
+
+
+def test_archive_moves_old_reservations_in_chunks(engine):
+    """
+    Test that reservations before the cutoff move to the archive with their ids, and nothing else changes.
+    """
+    cutoff = date(2024, 2, 15)
+    with Session(engine) as db_session:
+        old_ids = set(db_session.scalars(select(Reservation.id).where(Reservation.date < cutoff)))
+        total = count(db_session, Reservation)
+
+        result = archive_reservations(db_session, cutoff, chunk_size=50)
+
+        assert result["archived"] == len(old_ids)
+        assert set(db_session.scalars(select(ArchivedReservation.id))) == old_ids
+        assert count(db_session, Reservation, Reservation.date < cutoff) == 0
+        assert count(db_session, Reservation) == total - len(old_ids)
+        assert count(db_session, SlotOccupancy, SlotOccupancy.date < cutoff) == 0
+        assert count(db_session, SlotOccupancy) > 0
+        assert check_occupancy(db_session) == []
+        assert db_session.execute(text("PRAGMA freelist_count")).scalar() == 0
+
+        # running again finds nothing left to move
+        assert archive_reservations(db_session, cutoff)["archived"] == 0
+
+
+def test_history_reads_live_and_archived_reservations(engine):
+    """
+    Test that the reservation history returns the same rows before and after archiving.
+    """
+    history = reservation_history()
+    query = select(history.c.id, history.c.date, history.c.time).where(
+        history.c.date.between(date(2024, 2, 1), date(2024, 2, 29))
+    )
+    with Session(engine) as db_session:
+        before = sorted(db_session.execute(query).all())
+        archive_reservations(db_session, date(2024, 2, 15))
+        assert sorted(db_session.execute(query).all()) == before
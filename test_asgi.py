@@ -0,0 +1,291 @@
+import asyncio
+import json
+from datetime import date, datetime, time, timedelta
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy import insert
+
+pytest.importorskip("aiosqlite")
+from app import create_app  # noqa: E402
+from asgi import create_asgi_app  # noqa: E402
+from database import initialize_db  # noqa: E402
+from models import Reservation  # noqa: E402
+
+
+@pytest.fixture
+def flask_app(tmp_path):
+    """
+    Pytest fixture creating the Flask app on a database file, which the async engine can share.
+    """
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'asgi.db'}",
+        "SECRET_KEY": "test",
+        "RESPONSIVE_IMAGES": False,
+        "STATIC_FINGERPRINTS": False,
+    })
+    with app.app_context():
+        initialize_db()
+    yield app
+    app.extensions["database"]["read_engine"].dispose()
+    app.extensions["database"]["engine"].dispose()
+
+
+async def call(asgi_app, method, path, query="", body=b"", headers=()):
+    """
+    Send one HTTP request to an ASGI app and collect the response.
+    """
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "root_path": "", "query_string": query.encode(),
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Future()  # the client stays connected
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi_app(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def post_form(asgi_app, data):
+    return call(asgi_app, "POST", "/reservations", body=urlencode(data).encode(),
+                headers=[("content-type", "application/x-www-form-urlencoded")])
+
+
+def test_async_endpoints_match_the_wsgi_responses(flask_app):
+    """
+    Test that the ASGI app answers availability and bookings exactly as the Flask views do.
+    """
+    asgi_app = create_asgi_app(flask_app)
+    client = flask_app.test_client()
+    booking = {"name": "Donna Hayward", "email": "donna@example.com", "num_people": 2,
+               "date": "2024-12-05", "time": "18:00", "duration": 1}
+
+    async def scenario():
+        status, headers, body = await call(asgi_app, "GET", "/get_available_slots/2024-12-05")
+        assert status == 200 and headers[b"content-type"] == b"application/json"
+        # measured like the Flask view, with the async engine's statements
+        metrics_text = flask_app.extensions["metrics"].render()
+        route = 'route="/get_available_slots/<date_str>"'
+        assert f'http_requests_total{{{route},method="GET",status="200"}} 1' in metrics_text
+        assert f'http_request_db_queries_bucket{{{route},le="0"}} 0' in metrics_text
+        assert body == client.get("/get_available_slots/2024-12-05").data
+
+        for _ in range(6):
+            status, _, body = await post_form(asgi_app, booking)
+            assert json.loads(body)["is_valid"] is True
+        status, _, body = await post_form(asgi_app, booking)
+        assert body == client.post("/reservations", data=booking).data
+        assert json.loads(body)["errors"] == {"time": "This time slot is fully booked."}
+
+        _, _, body = await post_form(asgi_app, dict(booking, email="not-an-email"))
+        assert body == client.post("/reservations", data=dict(booking, email="not-an-email")).data
+
+        # the booking invalidated the shared availability cache
+        _, _, body = await call(asgi_app, "GET", "/get_available_slots/2024-12-05", query="time=18:00")
+        assert json.loads(body) == {"18:00": 0}
+        assert body == client.get("/get_available_slots/2024-12-05?time=18:00").data
+
+        # everything else is served by Flask
+        status, _, body = await call(asgi_app, "GET", "/menu")
+        assert status == 200 and b"<html" in body.lower()
+        flask_app.config["PROPAGATE_EXCEPTIONS"] = False
+        status, _, _ = await call(asgi_app, "GET", "/get_available_slots/not-a-date")
+        assert status == client.get("/get_available_slots/not-a-date").status_code == 500
+        status, _, body = await call(asgi_app, "GET", "/reservations")
+        assert status == 200 and body == client.get("/reservations").data
+
+        await asgi_app.database["engine"].dispose()
+        await asgi_app.database["read_engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_async_booking_respects_csrf(flask_app):
+    """
+    Test that the async booking path still requires a valid CSRF token when protection is on.
+    """
+    flask_app.config["WTF_CSRF_ENABLED"] = True
+    asgi_app = create_asgi_app(flask_app)
+
+    async def scenario():
+        _, _, body = await post_form(asgi_app, {"name": "Leo Johnson", "email": "leo@example.com",
+                                                "num_people": 2, "date": "2024-12-05", "time": "18:00"})
+        assert json.loads(body)["errors"]["csrf_token"] == "The CSRF token is missing."
+        await asgi_app.database["engine"].dispose()
+        await asgi_app.database["read_engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_async_event_stream_receives_bookings(flask_app):
+    """
+    Test that the event stream is served on the loop and gets an update after an async booking.
+    """
+    asgi_app = create_asgi_app(flask_app)
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/availability/2024-12-05/events", "root_path": "", "query_string": b"",
+        "headers": [], "server": ("testserver", 80), "client": ("127.0.0.1", 1234),
+    }
+
+    async def scenario():
+        disconnect = asyncio.Event()
+        chunks = asyncio.Queue()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            await chunks.put(message)
+
+        stream = asyncio.ensure_future(asgi_app(scope, receive, send))
+        start = await chunks.get()
+        assert start["status"] == 200 and (b"content-type", b"text/event-stream; charset=utf-8") in start["headers"]
+        assert b'"17:00":6' in (await chunks.get())["body"]
+
+        _, _, body = await post_form(asgi_app, {"name": "Bobby Briggs", "email": "bobby@example.com",
+                                                "num_people": 2, "date": "2024-12-05", "time": "17:00"})
+        assert json.loads(body)["is_valid"] is True
+        update = await asyncio.wait_for(chunks.get(), 5)
+        assert b'"17:00":5,"17:30":5,"18:00":6' in update["body"] and update["more_body"]
+
+        disconnect.set()
+        await asyncio.wait_for(stream, 5)
+        assert not flask_app.extensions["availability_broker"].has_listeners(datetime(2024, 12, 5).date())
+        await asgi_app.database["engine"].dispose()
+        await asgi_app.database["read_engine"].dispose()
+
+    asyncio.run(scenario())
+
+
+def test_flask_responses_are_streamed_through_the_loop(flask_app):
+    """
+    Test that a streamed Flask response is sent chunk by chunk while it is produced, then closed.
+    """
+    produced = []
+    closed = []
+
+    def stream():
+        try:
+            for index in range(200):
+                produced.append(index)
+                yield b"x" * 65536
+        finally:
+            closed.append(True)
+
+    flask_app.add_url_rule("/stream", "stream", lambda: flask_app.response_class(stream()))
+    asgi_app = create_asgi_app(flask_app)
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http", "path": "/stream",
+        "root_path": "", "query_string": b"", "headers": [], "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    async def scenario():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Future()
+
+        async def send(message):
+            sent.append((len(produced), message))
+
+        await asgi_app(scope, receive, send)
+        await asgi_app.database["engine"].dispose()
+        await asgi_app.database["read_engine"].dispose()
+        return sent
+
+    sent = asyncio.run(scenario())
+    assert sent[0][1]["status"] == 200
+    bodies = [message for _, message in sent[1:]]
+    assert len(bodies) == 201 and all(message["more_body"] for message in bodies[:-1])
+    assert bodies[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+    assert sent[1][0] < 200  # the first chunk left before the last one was produced
+    assert closed == [True]
+
+
+def test_large_export_is_streamed_in_batches(flask_app):
+    """
+    Test that the admin export leaves the ASGI app one batch at a time rather than as one body.
+    """
+    with flask_app.extensions["database"]["engine"].begin() as connection:
+        connection.execute(insert(Reservation), [
+            {"name": f"Guest {index}", "email": "guest@example.com", "num_people": 2,
+             "date": date(2024, 1, 1) + timedelta(days=index % 300), "time": time(19), "duration": 1}
+            for index in range(10_000)
+        ])
+    flask_app.config["ADMIN_API_TOKEN"] = "secret"
+    asgi_app = create_asgi_app(flask_app)
+
+    async def scenario():
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.Future()
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/admin/reservations/export", "root_path": "", "query_string": b"format=jsonl",
+            "headers": [(b"authorization", b"Bearer secret")], "server": ("testserver", 80),
+            "client": ("127.0.0.1", 1234),
+        }
+        await asgi_app(scope, receive, send)
+        await asgi_app.database["engine"].dispose()
+        await asgi_app.database["read_engine"].dispose()
+        return sent
+
+    sent = asyncio.run(scenario())
+    assert sent[0]["status"] == 200
+    bodies = [message["body"] for message in sent[1:] if message["body"]]
+    assert len(bodies) == 5  # 10k rows in batches of 2000
+    assert sum(body.count(b"\n") for body in bodies) == 10_000
+
+
+def test_export_through_asgi_matches_wsgi(flask_app):
+    """
+    Test that the CSV and JSON Lines exports served over ASGI are byte for byte the WSGI ones.
+    """
+    with flask_app.extensions["database"]["engine"].begin() as connection:
+        connection.execute(insert(Reservation), [
+            {"name": f"Guest {index}", "email": "guest@example.com", "num_people": 2,
+             "date": date(2024, 12, 1) + timedelta(days=index % 10), "time": time(18 + index % 3), "duration": 1}
+            for index in range(3000)
+        ])
+    flask_app.config["ADMIN_API_TOKEN"] = "secret"
+    auth = [("authorization", "Bearer secret")]
+    asgi_app = create_asgi_app(flask_app)
+    client = flask_app.test_client()
+
+    async def scenario():
+        for query in ("", "format=jsonl&from=2024-12-03&to=2024-12-06"):
+            status, headers, body = await call(asgi_app, "GET", "/admin/reservations/export", query, headers=auth)
+            expected = client.get(f"/admin/reservations/export?{query}", headers=dict(auth))
+            assert status == 200
+            assert headers[b"content-disposition"] == expected.headers["Content-Disposition"].encode()
+            assert body == expected.get_data()
+        await asgi_app.database["engine"].dispose()
+        await asgi_app.database["read_engine"].dispose()
+
+    asyncio.run(scenario())
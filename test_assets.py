@@ -0,0 +1,67 @@
+import gzip
+
+from flask import url_for
+
+from app import create_app
+from assets import build_assets, load_manifest
+
+
+def test_build_assets_fingerprints_and_rewrites_css(tmp_path):
+    """
+    Test that assets get content-hashed names and stylesheets point at them.
+    """
+    (tmp_path / "images").mkdir()
+    (tmp_path / "images" / "pointer.png").write_bytes(b"\x89PNG pointer")
+    (tmp_path / "styles.css").write_text('body { background: url("/static/images/pointer.png"); }' * 20)
+
+    manifest = build_assets(str(tmp_path))
+    first_css = manifest["assets"]["styles.css"]
+    pointer = manifest["assets"]["images/pointer.png"]
+
+    assert pointer.startswith("dist/images/pointer.") and pointer.endswith(".png")
+    css = (tmp_path / first_css).read_text()
+    assert f'url("{pointer[len("dist/"):]}")' in css
+    assert "gzip" in manifest["encodings"][first_css]
+    assert gzip.decompress((tmp_path / (first_css + ".gz")).read_bytes()).decode() == css
+    assert manifest["encodings"].get(pointer) is None  # images are not recompressed
+
+    (tmp_path / "styles.css").write_text("body { color: red; }")
+    manifest = build_assets(str(tmp_path))
+    assert manifest["assets"]["styles.css"] != first_css
+    assert not (tmp_path / first_css).exists()  # stale builds are removed
+
+    # the set of fingerprinted paths is built when the manifest is, not per request
+    assert manifest["fingerprinted"] == {manifest["assets"]["styles.css"], pointer}
+    assert load_manifest(str(tmp_path / "dist" / "manifest.json")) == manifest
+    assert load_manifest(str(tmp_path / "missing.json"))["fingerprinted"] == frozenset()
+
+
+def test_fingerprinted_assets_are_immutable_and_precompressed(tmp_path):
+    """
+    Test that templates resolve fingerprinted URLs, served with year-long caching and negotiated encoding.
+    """
+    (tmp_path / "script.js").write_text("console.log('damn fine coffee');\n" * 50)
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    app.static_folder = str(tmp_path)
+    app.extensions["asset_manifest"] = build_assets(str(tmp_path))
+    client = app.test_client()
+
+    with app.test_request_context():
+        url = url_for("static", filename="script.js")
+    assert url.startswith("/static/dist/script.") and url.endswith(".js")
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Content-Type"].startswith("text/javascript")
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "max-age=31536000" in response.headers["Cache-Control"]
+    assert gzip.decompress(response.data).startswith(b"console.log")
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data.startswith(b"console.log")
+
+    manifest = client.get("/static/dist/manifest.json")
+    assert manifest.headers["Cache-Control"] == "no-cache"
+    assert manifest.get_json()["assets"]["script.js"] == url.removeprefix("/static/")
@@ -0,0 +1,44 @@
+from datetime import time
+
+from availability import compute_available_slots, generate_slots, sweep_occupancy
+
+
+def test_generate_slots():
+    """
+    Test that slots cover opening hours at the requested interval.
+    """
+    slots = generate_slots(30)
+    assert slots[0] == time(17, 0)
+    assert slots[-1] == time(22, 30)
+    assert len(slots) == 12
+
+
+def test_sweep_occupancy_matches_slot_overlap():
+    """
+    Test that each reservation is counted in every slot starting within its period.
+    """
+    intervals = [
+        (time(17, 0), 1),  # 17:00, 17:30
+        (time(17, 15), 1),  # 17:30, 18:00
+        (time(16, 30), 1),  # starts before opening, covers 17:00
+        (time(22, 30), 2),  # runs past closing, covers 22:30
+        (time(18, 0), None),  # missing duration defaults to 1 hour
+    ]
+    occupancy = sweep_occupancy(intervals, slot_count=12)
+
+    assert occupancy[:5] == [2, 2, 2, 1, 0]
+    assert occupancy[-1] == 1
+    assert sum(occupancy) == 8
+
+
+def test_compute_available_slots_omits_fully_booked_slots():
+    """
+    Test that slots with no free tables are dropped from the result.
+    """
+    intervals = [(time(19, 0), 1)] * 6 + [(time(19, 30), 1)]
+    slots = compute_available_slots(intervals, tables=6)
+
+    assert time(19, 0) not in slots
+    assert time(19, 30) not in slots
+    assert slots[time(20, 0)] == 5
+    assert slots[time(18, 30)] == 6
@@ -0,0 +1,45 @@
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from benchmarks.datagen import seed_database
+from benchmarks.suite import LOAD_CHECKED, compare
+from database import build_engine
+from models import Reservation
+from occupancy import check_occupancy
+
+
+def test_seeded_reservations_fit_and_match_occupancy():
+    """
+    Test that seeding inserts every reservation and keeps `slot_occupancy` consistent.
+    """
+    engine = build_engine("sqlite://")
+    first, last = seed_database(engine, 500, date(2031, 1, 1), months=2)
+
+    assert (first, last) == (date(2031, 1, 1), date(2031, 3, 1))
+    with Session(engine) as db_session:
+        assert db_session.scalar(select(func.count()).select_from(Reservation)) == 500
+        assert db_session.scalar(select(func.min(Reservation.date))) >= first
+        assert db_session.scalar(select(func.max(Reservation.date))) <= last
+        assert check_occupancy(db_session) == []
+    engine.dispose()
+
+
+def test_compare_flags_regressions_scaled_by_machine_speed():
+    """
+    Test that figures beyond the tolerance are regressions once the baseline is scaled to the machine's speed.
+    """
+    baseline = {
+        "micro": {"throughput": 1000, "p50_ms": 1.0, "p95_ms": 2.0, "reference_ms": 10},
+        "load x8": {"throughput": 100, "p50_ms": 10.0, "p95_ms": 50.0},
+    }
+    results = {
+        # the machine is twice as slow, so half the throughput is no regression
+        "micro": {"throughput": 500, "p50_ms": 2.0, "p95_ms": 5.0, "reference_ms": 20},
+        "load x8": {"throughput": 60, "p50_ms": 10.0, "p95_ms": 500.0},
+        "new": {"throughput": 1, "p50_ms": 1.0, "p95_ms": 1.0},
+    }
+
+    assert compare({"micro": results["micro"]}, baseline, 0.2) == [("micro", "p95_ms", 4.0, 5.0)]
+    assert compare(results, baseline, 0.3, LOAD_CHECKED) == [("load x8", "throughput", 100, 60)]
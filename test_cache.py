@@ -0,0 +1,106 @@
+from datetime import date
+
+from cache import AvailabilityCache, PageCache, SQLiteCacheBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    """
+    Test that the least recently used entry is evicted and lookups are counted.
+    """
+    cache = AvailabilityCache(maxsize=2)
+    first, second, third = ((date(2024, 12, day), 6, 30) for day in (1, 2, 3))
+
+    cache.set(first, "a")
+    cache.set(second, "b")
+    assert cache.get(first) == "a"  # first is now most recently used
+    cache.set(third, "c")
+
+    assert cache.get(second) is None
+    assert cache.get(first) == "a"
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2}
+
+
+def test_ttl_expiry():
+    """
+    Test that entries expire once their time to live has passed.
+    """
+    clock = FakeClock()
+    cache = AvailabilityCache(ttl=30, clock=clock)
+    key = (date(2024, 12, 5), 6, 30)
+
+    cache.set(key, "slots")
+    clock.now = 29
+    assert cache.get(key) == "slots"
+    clock.now = 30
+    assert cache.get(key) is None
+
+
+def test_invalidate_drops_every_entry_for_the_date():
+    """
+    Test that invalidation removes all keys of a date and leaves other dates cached.
+    """
+    cache = AvailabilityCache()
+    cache.set((date(2024, 12, 5), 6, 30), "a")
+    cache.set((date(2024, 12, 5), 6, 60), "b")
+    cache.set((date(2024, 12, 6), 6, 30), "c")
+
+    cache.invalidate(date(2024, 12, 5))
+
+    assert cache.get((date(2024, 12, 5), 6, 30)) is None
+    assert cache.get((date(2024, 12, 5), 6, 60)) is None
+    assert cache.get((date(2024, 12, 6), 6, 30)) == "c"
+
+
+def test_shared_backend_invalidates_other_workers(tmp_path):
+    """
+    Test that invalidating a date in one worker's cache is seen by another.
+    """
+    path = str(tmp_path / "cache.db")
+    worker_a = AvailabilityCache(backend=SQLiteCacheBackend(path))
+    worker_b = AvailabilityCache(backend=SQLiteCacheBackend(path))
+    key = (date(2024, 12, 5), 6, 30)
+
+    worker_a.set(key, "a")
+    worker_b.set(key, "b")
+    worker_a.invalidate(key[0])
+
+    assert worker_b.get(key) is None
+    worker_b.set(key, "fresh")
+    assert worker_b.get(key) == "fresh"
+
+
+def test_page_cache_keeps_only_the_current_version():
+    """
+    Test that a page is a miss under a new version and its ETag follows the body.
+    """
+    cache = PageCache()
+    page = cache.set("main.menu", 1, b"<h1>Menu</h1>", None)
+
+    assert cache.get("main.menu", 1) is page
+    assert cache.get("main.menu", 2) is None
+    assert cache.set("main.menu", 2, b"<h1>Menu</h1>", None).etag == page.etag
+    assert cache.set("main.menu", 3, b"<h1>New</h1>", None).etag != page.etag
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_value_computed_before_an_invalidation_is_not_stored(tmp_path):
+    """
+    Test that a value computed under an older generation is dropped instead of cached.
+    """
+    key = (date(2024, 12, 5), 6, 30)
+    for cache in (AvailabilityCache(), AvailabilityCache(backend=SQLiteCacheBackend(str(tmp_path / "cache.db")))):
+        generation = cache.generation(key[0])
+        cache.invalidate(key[0])  # a booking commits while the slots are computed
+
+        assert cache.set(key, "stale", generation) is False
+        assert cache.get(key) is None
+        assert cache.set(key, "fresh", cache.generation(key[0])) is True
+        assert cache.get(key) == "fresh"
@@ -0,0 +1,120 @@
+import json
+import queue
+from datetime import date
+
+from events import LocalBroker, SQLiteBroker, format_event
+
+
+def test_format_event():
+    """
+    Test that an update is encoded as one named SSE message with a JSON data line.
+    """
+    message = format_event({"date": "2024-12-05", "slots": {"17:00": 6}}, retry=3000)
+    assert message == (
+        b'retry: 3000\nevent: availability\ndata: {"date":"2024-12-05","slots":{"17:00":6}}\n\n'
+    )
+
+
+def test_local_broker_delivers_by_date_until_unsubscribed():
+    """
+    Test that only the subscribers of a date receive its updates, and only while subscribed.
+    """
+    broker = LocalBroker()
+    received = []
+    unsubscribe = broker.subscribe(date(2024, 12, 5), received.append)
+    assert broker.has_listeners(date(2024, 12, 5))
+    assert not broker.has_listeners(date(2024, 12, 6))
+
+    broker.publish(date(2024, 12, 5), {"n": 1})
+    broker.publish(date(2024, 12, 6), {"n": 2})
+    unsubscribe()
+    broker.publish(date(2024, 12, 5), {"n": 3})
+
+    assert received == [{"n": 1}]
+    assert not broker.has_listeners(date(2024, 12, 5))
+
+
+def test_sqlite_broker_fans_out_across_processes(tmp_path):
+    """
+    Test that an update published by one worker reaches the subscribers of another.
+    """
+    path = str(tmp_path / "events.db")
+    publisher = SQLiteBroker(path, poll_interval=0.01)
+    subscriber = SQLiteBroker(path, poll_interval=0.01)
+    publisher.publish(date(2024, 12, 5), {"n": 0})  # before subscribing: not replayed
+
+    received = queue.SimpleQueue()
+    subscriber.subscribe(date(2024, 12, 5), received.put)
+    publisher.publish(date(2024, 12, 6), {"n": 1})
+    publisher.publish(date(2024, 12, 5), {"n": 2})
+
+    try:
+        assert received.get(timeout=5) == {"n": 2}
+        assert received.empty()
+    finally:
+        subscriber.close()
+        publisher.close()
+
+    # only the latest updates are kept
+    pruned = SQLiteBroker(path, keep=2)
+    for n in range(5):
+        pruned.publish(date(2024, 12, 5), {"n": n})
+    rows = pruned._connection().execute("SELECT payload FROM availability_events").fetchall()
+    assert [json.loads(payload)["n"] for payload, in rows] == [3, 4]
+
+
+def test_sqlite_broker_lists_the_dates_followed_by_every_process(tmp_path):
+    """
+    Test that `has_listeners` sees another worker's subscriptions and ignores those without a heartbeat.
+    """
+    path = str(tmp_path / "events.db")
+    now = [1000.0]
+    publisher = SQLiteBroker(path, listener_ttl=30, clock=lambda: now[0])
+    subscriber = SQLiteBroker(path, poll_interval=0.01, listener_ttl=30, clock=lambda: now[0])
+    assert not publisher.has_listeners(date(2024, 12, 5))
+
+    try:
+        unsubscribe = subscriber.subscribe(date(2024, 12, 5), lambda payload: None)
+        second = subscriber.subscribe(date(2024, 12, 5), lambda payload: None)
+        assert publisher.has_listeners(date(2024, 12, 5))
+        assert not publisher.has_listeners(date(2024, 12, 6))
+
+        unsubscribe()
+        assert publisher.has_listeners(date(2024, 12, 5))
+        second()
+        assert not publisher.has_listeners(date(2024, 12, 5))
+
+        # a worker that stops refreshing its rows is no longer counted
+        subscriber.subscribe(date(2024, 12, 6), lambda payload: None)
+        subscriber.close()
+        subscriber._list(date(2024, 12, 6))  # as if the worker died instead of closing
+        now[0] += 31
+        assert not publisher.has_listeners(date(2024, 12, 6))
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_sqlite_broker_keeps_polling_after_a_failing_callback(tmp_path, caplog):
+    """
+    Test that an exception in one subscriber is logged and the other subscribers still get every update.
+    """
+    path = str(tmp_path / "events.db")
+    publisher = SQLiteBroker(path, poll_interval=0.01)
+    subscriber = SQLiteBroker(path, poll_interval=0.01)
+
+    def fail(payload):
+        raise RuntimeError("stream gone")
+
+    received = queue.SimpleQueue()
+    subscriber.subscribe(date(2024, 12, 5), fail)
+    subscriber.subscribe(date(2024, 12, 5), received.put)
+    try:
+        publisher.publish(date(2024, 12, 5), {"n": 1})
+        assert received.get(timeout=5) == {"n": 1}
+        publisher.publish(date(2024, 12, 5), {"n": 2})
+        assert received.get(timeout=5) == {"n": 2}
+    finally:
+        subscriber.close()
+        publisher.close()
+    assert "Availability subscriber for 2024-12-05 failed" in caplog.text
@@ -0,0 +1,131 @@
+import json
+from datetime import date, time
+
+import pytest
+from sqlalchemy import event, insert
+
+from app import create_app
+from archive import archive_reservations
+from database import SessionLocal, initialize_db
+from export import reservations_query
+from models import Reservation
+
+AUTH = {"Authorization": "Bearer secret"}
+
+
+@pytest.fixture
+def app():
+    """
+    Pytest fixture creating the app on an in-memory database with reservations sharing dates and times.
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "SECRET_KEY": "test",
+        "ADMIN_API_TOKEN": "secret",
+    })
+    with app.app_context():
+        initialize_db()
+        db_session = SessionLocal()
+        db_session.execute(insert(Reservation), [
+            {"name": f"Guest {index}", "email": "guest@example.com", "num_people": 2,
+             "date": date(2024, 12, 5 + index % 3), "time": time(19 if index % 2 else 18), "duration": 1}
+            for index in range(25)
+        ])
+        db_session.commit()
+    yield app
+    app.extensions["database"]["engine"].dispose()
+
+
+def test_pages_follow_date_time_id_order(app):
+    """
+    Test that following `next` cursors lists every reservation once, in order, including ties on date and time.
+    """
+    client = app.test_client()
+    listed = []
+    after = ""
+    while after is not None:
+        page = client.get(f"/admin/reservations?limit=4&after={after}", headers=AUTH).get_json()
+        assert len(page["reservations"]) <= 4
+        listed.extend(page["reservations"])
+        after = page["next"]
+
+    keys = [(row["date"], row["time"], row["id"]) for row in listed]
+    assert len(keys) == 25
+    assert keys == sorted(keys)
+
+    page = client.get("/admin/reservations?from=2024-12-06&to=2024-12-06", headers=AUTH).get_json()
+    assert {row["date"] for row in page["reservations"]} == {"2024-12-06"}
+    assert len(page["reservations"]) == 8
+    assert page["next"] is None
+
+
+def test_export_streams_csv_and_jsonl(app):
+    """
+    Test that the export streams every reservation in the listing's order.
+    """
+    client = app.test_client()
+    response = client.get("/admin/reservations/export", headers=AUTH)
+    assert response.mimetype == "text/csv"
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == "id,name,email,num_people,date,time,duration,table_id,created_at"
+    assert len(lines) == 26
+    assert lines[1].split(",")[4:6] == ["2024-12-05", "18:00"]
+
+    response = client.get("/admin/reservations/export?format=jsonl&from=2024-12-07", headers=AUTH)
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    listed = client.get("/admin/reservations?from=2024-12-07", headers=AUTH).get_json()["reservations"]
+    assert rows == listed
+
+
+def test_admin_api_requires_token(app):
+    """
+    Test that the admin API rejects missing tokens, bad parameters, and is off without a token configured.
+    """
+    client = app.test_client()
+    assert client.get("/admin/reservations").status_code == 401
+    assert client.get("/admin/reservations/export", headers={"Authorization": "Bearer x"}).status_code == 401
+    assert client.get("/admin/reservations?after=bogus", headers=AUTH).status_code == 400
+    assert client.get("/admin/reservations?limit=0", headers=AUTH).status_code == 400
+    assert client.get("/admin/reservations/export?format=xml", headers=AUTH).status_code == 400
+
+    app.config["ADMIN_API_TOKEN"] = None
+    assert client.get("/admin/reservations", headers=AUTH).status_code == 403
+
+
+def test_listing_and_export_include_archived_reservations(app):
+    """
+    Test that archived reservations are still listed and exported, in the same order.
+    """
+    client = app.test_client()
+    before = client.get("/admin/reservations?limit=1000", headers=AUTH).get_json()["reservations"]
+    with app.app_context():
+        assert archive_reservations(SessionLocal(), date(2024, 12, 7), chunk_size=4)["archived"] == 17
+
+    assert client.get("/admin/reservations?limit=1000", headers=AUTH).get_json()["reservations"] == before
+    rows = client.get("/admin/reservations/export?format=jsonl", headers=AUTH).get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in rows] == before
+
+
+def test_history_query_merges_both_indexes_without_sorting(app):
+    """
+    Test that the live and archived halves are both read in index order and merged without a sort.
+    """
+    engine = app.extensions["database"]["engine"]
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with engine.connect() as connection:
+        query = reservations_query(date(2024, 12, 1), date(2024, 12, 31), after=(date(2024, 12, 5), time(19), 3))
+        connection.execute(query)
+        statement, parameters = statements[-1]
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    details = " ".join(row[-1] for row in plan)
+
+    assert "USING INDEX ix_reservations_date_time " in details
+    assert "USING INDEX ix_reservations_archive_date_time" in details
+    assert "TEMP B-TREE" not in details
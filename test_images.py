@@ -0,0 +1,57 @@
+import pytest
+from flask import render_template_string
+
+from app import create_app
+from images import build_variants, page_image_weight, pick_variant
+
+
+def test_pick_variant_matches_browser_choice():
+    """
+    Test that the smallest candidate covering the display width at the density is chosen.
+    """
+    srcset = [("a-320.avif", 320), ("a-960.avif", 960), ("a-640.avif", 640)]
+
+    assert pick_variant(srcset, 300, density=1) == "a-320.avif"
+    assert pick_variant(srcset, 300, density=2) == "a-640.avif"
+    assert pick_variant(srcset, 600, density=3) == "a-960.avif"  # widest available
+
+
+def test_build_variants_and_page_weight(tmp_path):
+    """
+    Test that variants are built without upscaling and that the page weight report uses them.
+    """
+    Image = pytest.importorskip("PIL.Image")
+    images = tmp_path / "images"
+    images.mkdir()
+    Image.effect_noise((800, 600), 64).convert("RGB").save(images / "pie.png")
+    Image.new("RGBA", (32, 32)).save(images / "icon.png")
+
+    manifest = build_variants(str(tmp_path))
+
+    assert list(manifest) == ["images/pie.png"]  # small icons are skipped
+    variants = manifest["images/pie.png"]["variants"]
+    assert [width for width, _, _ in variants["jpeg"]] == [320, 640, 800]
+    assert (tmp_path / "images" / "variants" / "manifest.json").exists()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "STATIC_FINGERPRINTS": False})
+    app.extensions["image_variants"] = manifest
+    with app.test_request_context():
+        html = render_template_string("{{ responsive_image('images/pie.png', 'Pie', 300) }}")
+
+    assert html.startswith("<picture>") and 'src="/static/images/pie.png"' in html
+    assert 'height="225"' in html
+    original, optimized = page_image_weight(html, str(tmp_path))
+    assert original == (images / "pie.png").stat().st_size
+    assert 0 < optimized < original
+
+
+def test_responsive_image_without_variants():
+    """
+    Test that images missing from the manifest render as a plain escaped img tag.
+    """
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "STATIC_FINGERPRINTS": False})
+    app.extensions["image_variants"] = {}
+    with app.test_request_context():
+        html = render_template_string("{{ responsive_image('images/tea.png', 'Tea & pie', 350, loading='lazy') }}")
+
+    assert html == '<img src="/static/images/tea.png" alt="Tea &amp; pie" width="350" loading="lazy">'
@@ -0,0 +1,57 @@
+import json
+import os
+
+from menu import MenuCache, categorize_menu
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def write_menu(path, items):
+    with open(path, "w") as file:
+        json.dump({"items": items}, file)
+
+
+def test_categorize_menu_keeps_file_order():
+    """
+    Test that items are grouped by any category, in order of first appearance.
+    """
+    menu = categorize_menu([
+        {"category": "Pie", "name": "Cherry"},
+        {"category": "Coffee", "name": "Black"},
+        {"category": "Pie", "name": "Huckleberry"},
+    ])
+
+    assert list(menu) == ["Pie", "Coffee"]
+    assert [item["name"] for item in menu["Pie"]] == ["Cherry", "Huckleberry"]
+
+
+def test_menu_cache_reloads_only_after_interval_and_change(tmp_path):
+    """
+    Test that the file is re-read only when the interval passed and the file changed.
+    """
+    path = tmp_path / "menu.json"
+    write_menu(path, [{"category": "Pie", "name": "Cherry"}])
+    clock = FakeClock()
+    cache = MenuCache(str(path), check_interval=2, clock=clock)
+    first = cache.get()
+
+    clock.now = 5
+    assert cache.get() is first  # unchanged file is not parsed again
+
+    write_menu(path, [{"category": "Coffee", "name": "Black"}])
+    os.utime(path, ns=(0, 10**18))  # force a new mtime on coarse filesystems
+    clock.now = 6
+    assert cache.get() is first  # checked less than 2 seconds ago
+    clock.now = 7
+    assert list(cache.get()) == ["Coffee"]
+
+    path.write_text("{not json")
+    os.utime(path, ns=(0, 2 * 10**18))
+    clock.now = 10
+    assert list(cache.get()) == ["Coffee"]  # a broken file keeps the last menu
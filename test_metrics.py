@@ -0,0 +1,123 @@
+import pytest
+
+from app import create_app
+from database import initialize_db
+from metrics import Histogram, Metrics
+
+AUTH = {"Authorization": "Bearer secret"}
+
+
+@pytest.fixture
+def app():
+    """
+    Pytest fixture creating the app on an in-memory database, logging every statement as slow.
+    """
+    app = create_app({
+        "TESTING": True,
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": "sqlite://",
+        "SECRET_KEY": "test",
+        "RESPONSIVE_IMAGES": False,
+        "STATIC_FINGERPRINTS": False,
+        "AVAILABILITY_CACHE_SIZE": 0,
+        "SLOW_QUERY_THRESHOLD": 0,
+        "ADMIN_API_TOKEN": "secret",
+    })
+    with app.app_context():
+        initialize_db()
+    yield app
+    app.extensions["database"]["engine"].dispose()
+
+
+def test_histogram_renders_cumulative_buckets():
+    """
+    Test that observations land in the first bucket they fit and render cumulatively.
+    """
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 7):
+        histogram.observe(value)
+
+    assert histogram.render("x", 'route="/"') == [
+        'x_bucket{route="/",le="1"} 2',
+        'x_bucket{route="/",le="5"} 3',
+        'x_bucket{route="/",le="+Inf"} 4',
+        'x_sum{route="/"} 11.500000',
+        'x_count{route="/"} 4',
+    ]
+
+
+def test_requests_are_measured_per_route(app):
+    """
+    Test that latency, queries, template time and statuses are reported per route, not per URL.
+    """
+    client = app.test_client()
+    client.get("/get_available_slots/2024-12-05")
+    client.get("/get_available_slots/2024-12-06")
+    client.get("/reservations")
+    client.get("/no-such-page")
+
+    page = client.get("/metrics", headers=AUTH)
+    assert page.mimetype == "text/plain"
+    text = page.get_data(as_text=True)
+
+    route = 'route="/get_available_slots/<date_str>"'
+    assert f'http_request_duration_seconds_count{{{route},method="GET"}} 2' in text
+    assert f'http_requests_total{{{route},method="GET",status="200"}} 2' in text
+    assert 'http_requests_total{route="unmatched",method="GET",status="404"} 1' in text
+    # one occupancy query per date, none below the 1-query bucket
+    assert f'http_request_db_queries_bucket{{{route},le="0"}} 0' in text
+    assert f'http_request_db_queries_count{{{route}}} 2' in text
+
+    template_seconds = next(
+        line for line in text.splitlines()
+        if line.startswith('http_request_template_seconds_total{route="/reservations"}')
+    )
+    assert float(template_seconds.split()[-1]) > 0
+
+    slow = client.get("/metrics/slow_queries", headers=AUTH).get_json()
+    assert slow["threshold"] == 0
+    assert any(
+        query["route"] == "/get_available_slots/<date_str>" and "slot_occupancy" in query["statement"]
+        for query in slow["queries"]
+    )
+
+
+def test_queries_outside_requests_count_only_globally():
+    """
+    Test that statements without a request still feed the global query metrics.
+    """
+    ticks = iter([0.0, 0.2, 1.0, 1.01])
+    metrics = Metrics(slow_query_threshold=0.1, clock=lambda: next(ticks))
+    execute = metrics._timed(lambda cursor, statement, parameters, context=None: None)
+    for statement in ("SELECT 1", "SELECT 2"):
+        execute(None, statement, ())
+
+    assert list(metrics.slow_queries) == [{"statement": "SELECT 1", "seconds": 0.2, "route": None}]
+    text = metrics.render()
+    assert "db_query_duration_seconds_count 2" in text
+    assert "db_slow_queries_total 1" in text
+    assert "http_requests_total{" not in text
+
+
+def test_metrics_can_be_disabled():
+    """
+    Test that nothing is measured with `METRICS_ENABLED` off.
+    """
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "METRICS_ENABLED": False, "METRICS_PUBLIC": True})
+    client = app.test_client()
+    client.get("/about_us")
+    assert "http_requests_total{" not in client.get("/metrics").get_data(as_text=True)
+
+
+def test_metrics_require_the_admin_token(app):
+    """
+    Test that the metrics need the admin token, and that only `/metrics` can be made public.
+    """
+    client = app.test_client()
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics/slow_queries").status_code == 401
+
+    app.config["METRICS_PUBLIC"] = True
+    assert client.get("/metrics").status_code == 200
+    assert client.get("/metrics/slow_queries").status_code == 401
+    assert client.get("/metrics/slow_queries", headers=AUTH).status_code == 200
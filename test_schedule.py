@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+from datetime import date, time
+
+import pytest
+
+from schedule import DEFAULT_SCHEDULE, ScheduleCache, compile_schedule
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+CONFIG = {
+    "interval": 30,
+    "tables": 6,
+    "hours": ["17:00", "23:00"],
+    "weekdays": {
+        "friday": {"hours": ["17:00", "23:30"], "tables": 8},
+        "monday": {"closed": True},
+    },
+    "holidays": {
+        "2024-12-25": {"closed": True},
+        "2024-12-27": {"tables": 10},  # a Friday: keeps Friday's hours
+    },
+}
+
+
+def test_compile_schedule_applies_weekday_and_holiday_overrides():
+    """
+    Test that each date gets its weekday's or holiday's hours and tables.
+    """
+    schedule = compile_schedule(CONFIG)
+
+    tuesday = schedule.for_day(date(2024, 12, 3))
+    assert (tuesday.slots[0], tuesday.slots[-1], len(tuesday.slots)) == (time(17, 0), time(22, 30), 12)
+    assert tuesday.template[time(17, 0)] == 6
+
+    friday = schedule.for_day(date(2024, 12, 6))
+    assert (friday.slots[-1], friday.tables) == (time(23, 0), 8)
+    assert schedule.for_day(date(2024, 12, 2)).slots == ()  # Monday
+    assert schedule.for_day(date(2024, 12, 25)).slots == ()
+    assert schedule.for_day(date(2024, 12, 27)).tables == 10
+    assert schedule.for_day(date(2024, 12, 27)).slots == friday.slots
+
+    # days of the same kind share one compiled schedule
+    assert schedule.for_day(date(2024, 12, 10)) is tuesday
+
+
+def test_default_schedule_matches_built_in_hours():
+    """
+    Test that an empty config keeps the built-in hours and capacity.
+    """
+    day = DEFAULT_SCHEDULE.for_day(date(2024, 12, 5))
+    assert (day.opening_time, day.closing_time, day.interval, day.tables) == (time(17, 0), time(23, 0), 30, 6)
+
+
+def test_day_schedule_availability_and_covered_slots():
+    """
+    Test that availability is a copy of the template less the occupancy.
+    """
+    friday = compile_schedule(CONFIG).for_day(date(2024, 12, 6))
+
+    available = friday.available_tables({time(19, 0): 3, time(19, 30): 9, time(12, 0): 1})
+    assert available[time(19, 0)] == 5
+    assert available[time(19, 30)] == 0
+    assert time(12, 0) not in available
+    assert friday.template[time(19, 0)] == 8  # the template is left untouched
+    assert friday.covered_slots(time(22, 30), 2) == [time(22, 30), time(23, 0)]
+
+
+@pytest.mark.parametrize("config", [
+    {"interval": 0},
+    {"hours": ["23:00", "17:00"]},
+    {"hours": ["5pm", "11pm"]},
+    {"tables": -1},
+    {"weekdays": {"funday": {"closed": True}}},
+    {"holidays": {"christmas": {"closed": True}}},
+    {"holidays": {"2024-12-25": {"open": False}}},
+])
+def test_compile_schedule_rejects_invalid_configs(config):
+    """
+    Test that invalid schedule configs raise ValueError.
+    """
+    with pytest.raises(ValueError):
+        compile_schedule(config)
+
+
+def test_schedule_cache_recompiles_changed_file(tmp_path):
+    """
+    Test that the schedule is recompiled after a change and a broken file keeps the last one.
+    """
+    path = tmp_path / "schedule.json"
+    path.write_text(json.dumps(CONFIG))
+    clock = FakeClock()
+    cache = ScheduleCache(str(path), check_interval=2, clock=clock)
+    first = cache.get()
+
+    clock.now = 5
+    assert cache.get() is first
+
+    path.write_text(json.dumps(dict(CONFIG, tables=4)))
+    os.utime(path, ns=(0, 10**18))  # force a new mtime on coarse filesystems
+    clock.now = 10
+    assert cache.get().for_day(date(2024, 12, 3)).tables == 4
+
+    path.write_text(json.dumps(dict(CONFIG, hours=["23:00", "17:00"])))
+    os.utime(path, ns=(0, 2 * 10**18))
+    clock.now = 15
+    assert cache.get().for_day(date(2024, 12, 3)).tables == 4
+
+
+def test_schedule_cache_rejects_interval_change(tmp_path, caplog):
+    """
+    Test that a reload changing the slot interval keeps the loaded schedule and logs an error once.
+    """
+    path = tmp_path / "schedule.json"
+    path.write_text(json.dumps(CONFIG))
+    clock = FakeClock()
+    cache = ScheduleCache(str(path), check_interval=2, clock=clock)
+    first = cache.get()
+
+    path.write_text(json.dumps(dict(CONFIG, interval=15, tables=4)))
+    os.utime(path, ns=(0, 10**18))
+    clock.now = 5
+    with caplog.at_level(logging.ERROR, logger="schedule"):
+        assert cache.get() is first
+        clock.now = 10
+        assert cache.get() is first
+    assert [record.levelno for record in caplog.records] == [logging.ERROR]
+    assert "from 30 to 15 minutes" in caplog.records[0].getMessage()
+
+    path.write_text(json.dumps(dict(CONFIG, tables=4)))
+    os.utime(path, ns=(0, 2 * 10**18))
+    clock.now = 15
+    assert cache.get().interval == 30
+    assert cache.get().for_day(date(2024, 12, 3)).tables == 4
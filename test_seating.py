@@ -0,0 +1,85 @@
+from datetime import time
+
+import pytest
+
+from seating import SeatingPlan
+
+
+TABLES = [(1, 2), (2, 2), (3, 4), (4, 6)]
+
+
+def test_find_table_picks_the_smallest_table_that_fits():
+    """
+    Test that parties are seated best-fit, leaving larger tables free.
+    """
+    plan = SeatingPlan(TABLES)
+
+    assert plan.find_table(2, time(19, 0)) == 1
+    assert plan.find_table(3, time(19, 0)) == 3
+    assert plan.find_table(5, time(19, 0)) == 4
+    assert plan.find_table(7, time(19, 0)) is None
+    assert plan.free_tables(1, time(19, 0)) == 4
+
+
+def test_assign_honors_duration():
+    """
+    Test that a table stays taken for every slot of a booking and frees up after it.
+    """
+    plan = SeatingPlan(TABLES)
+    assert plan.assign(6, time(19, 0), duration=2) == 4
+
+    assert plan.find_table(5, time(20, 30)) is None  # 20:30 is still within 19:00-21:00
+    assert plan.find_table(5, time(18, 30)) is None  # overlaps 19:00
+    assert plan.find_table(5, time(21, 0)) == 4
+    assert plan.find_table(5, time(18, 0)) == 4
+
+
+def test_small_parties_spill_over_to_larger_tables():
+    """
+    Test that once the small tables are taken, a small party gets a larger one.
+    """
+    plan = SeatingPlan(TABLES)
+    assert [plan.assign(2, time(19, 0)) for _ in range(5)] == [1, 2, 3, 4, None]
+
+
+def test_claim_rejects_taken_and_unknown_tables():
+    """
+    Test that a table cannot be claimed twice for overlapping slots.
+    """
+    plan = SeatingPlan(TABLES)
+    plan.claim(3, time(19, 0))
+
+    with pytest.raises(ValueError):
+        plan.claim(3, time(19, 30))
+    with pytest.raises(ValueError):
+        plan.claim(99, time(19, 0))
+    plan.claim(3, time(20, 0))
+
+
+def test_from_bookings_seats_bookings_without_a_table():
+    """
+    Test that bookings made before table assignment still take up a table.
+    """
+    bookings = [
+        (4, 6, time(19, 0), 1),
+        (None, 2, time(19, 0), None),  # legacy booking, 1 hour
+        (99, 4, time(19, 0), 1),  # table since removed
+    ]
+    plan = SeatingPlan.from_bookings(TABLES, bookings)
+
+    assert plan.free_tables(1, time(19, 0)) == 1
+    assert plan.find_table(1, time(19, 0)) == 2
+    assert plan.free_tables(1, time(20, 0)) == 4
+
+
+def test_plan_with_fifteen_minute_slots():
+    """
+    Test that bookings cover the right slots at a finer interval.
+    """
+    plan = SeatingPlan(TABLES, interval=15)
+    plan.assign(2, time(19, 15))
+    plan.assign(2, time(19, 15))
+
+    assert plan.find_table(2, time(20, 0)) == 3  # 19:15-20:15 still holds tables 1 and 2
+    assert plan.find_table(2, time(20, 15)) == 1
+    assert plan.find_table(2, time(19, 0)) == 3
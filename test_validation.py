@@ -0,0 +1,67 @@
+from datetime import date, time
+
+import pytest
+
+from validation import INVALID_EMAIL, REQUIRED, validate_reservation
+
+email_validator = pytest.importorskip("email_validator")
+
+
+def test_valid_fields_are_parsed():
+    """
+    Test that form text and JSON values both come out as `Reservation` column values.
+    """
+    expected = {"name": "Dale Cooper", "email": "cooper@example.com", "num_people": 2,
+                "date": date(2024, 12, 5), "time": time(19, 0), "duration": 1}
+
+    assert validate_reservation({"name": " Dale Cooper ", "email": "cooper@example.com", "num_people": "2",
+                                 "date": "2024-12-05", "time": "19:00", "duration": ""}) == (expected, {})
+    assert validate_reservation({"name": "Dale Cooper", "email": "cooper@example.com", "num_people": 2,
+                                 "date": "2024-12-05", "time": "19:00", "duration": 1}) == (expected, {})
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("name", "   ", REQUIRED),
+    ("num_people", 0, REQUIRED),
+    ("num_people", "two", "Not a valid integer value."),
+    ("num_people", True, "Not a valid integer value."),
+    ("num_people", 2.5, "Not a valid integer value."),
+    ("num_people", -1, "For reservations of more than 6 people, please contact us directly."),
+    ("date", "2024-02-30", "Not a valid date value."),
+    ("date", "05/12/2024", "Not a valid date value."),
+    ("time", "24:00", "Not a valid time value."),
+    ("duration", 4, "Not a valid choice."),
+    ("duration", "long", "Not a valid choice."),
+    ("duration", 2.0, "Not a valid choice."),
+    ("name", ["Dale Cooper"], "Must be a string."),
+    ("email", {"x": 1}, "Must be a string."),
+    ("date", 20241205, "Must be a string."),
+    ("time", True, "Must be a string."),
+])
+def test_invalid_fields_report_the_form_messages(field, value, message):
+    """
+    Test that each invalid field is reported with the message the form shows.
+    """
+    record = {"name": "Dale Cooper", "email": "cooper@example.com", "num_people": 2,
+              "date": "2024-12-05", "time": "19:00", field: value}
+    assert validate_reservation(record) == (None, {field: message})
+
+
+@pytest.mark.parametrize("email", [
+    "john.doe@example.com", "user+tag@sub.example.org", "o'brien@example.ie", "üñî@exämple.de",
+    "a@xn--bcher-kva.ch", "A@Example.COM", "not-an-email", "a@b", "a@b.c1", "a..b@example.com",
+    ".a@example.com", "a.@example.com", "a@-example.com", "a@exa_mple.com", "a b@example.com",
+    "a@example..com", "@example.com", "a@example.com.", "x" * 65 + "@example.com",
+    "a@" + "b" * 64 + ".com", "a@example.test", "a@example.local", 'a"b@example.com',
+])
+def test_email_rule_matches_email_validator(email):
+    """
+    Test that the shared core accepts the addresses the WTForms `Email` validator accepted.
+    """
+    try:
+        email_validator.validate_email(email, check_deliverability=False)
+        accepted = True
+    except email_validator.EmailNotValidError:
+        accepted = False
+    record = {"name": "Dale Cooper", "email": email, "num_people": 2, "date": "2024-12-05", "time": "19:00"}
+    assert validate_reservation(record)[1] == ({} if accepted else {"email": INVALID_EMAIL})
@@ -0,0 +1,176 @@
+import re
+from datetime import date, time
+
+from email_validator import EmailNotValidError, validate_email
+
+
+MIN_PEOPLE = 1
+MAX_PEOPLE = 6
+DURATIONS = (1, 2, 3)
+"""
+tuple: The reservation lengths, in hours, that can be booked.
+"""
+
+REQUIRED = "This field is required."
+INVALID_EMAIL = "email is invalid"
+TOO_MANY_PEOPLE = f"For reservations of more than {MAX_PEOPLE} people, please contact us directly."
+INVALID_INTEGER = "Not a valid integer value."
+INVALID_DATE = "Not a valid date value."
+INVALID_TIME = "Not a valid time value."
+INVALID_DURATION = "Not a valid choice."
+NOT_A_STRING = "Must be a string."
+
+DATE_PATTERN = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+TIME_PATTERN = re.compile(r"(\d{1,2}):(\d{1,2})")
+
+
+def _text(value):
+    """
+    Return a submitted text value, rejecting JSON lists, objects, numbers and booleans.
+    """
+    if not isinstance(value, str):
+        raise ValueError(NOT_A_STRING)
+    return value
+
+
+def parse_name(value):
+    """
+    Return the guest's name without surrounding whitespace.
+    """
+    return _text(value).strip()
+
+
+def parse_email(value):
+    """
+    Return the email address if `email_validator` accepts it, skipping DNS checks like the WTForms `Email` validator.
+    """
+    email = _text(value).strip()
+    try:
+        validate_email(email, check_deliverability=False)
+    except EmailNotValidError:
+        raise ValueError(INVALID_EMAIL)
+    return email
+
+
+def parse_people(value):
+    """
+    Return the party size, an integer or integer text from `MIN_PEOPLE` to `MAX_PEOPLE`.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(INVALID_INTEGER)
+    try:
+        people = int(value)
+    except ValueError:
+        raise ValueError(INVALID_INTEGER)
+    if people == 0:  # a party of 0 counts as missing, as it always has on the form
+        raise ValueError(REQUIRED)
+    if not MIN_PEOPLE <= people <= MAX_PEOPLE:
+        raise ValueError(TOO_MANY_PEOPLE)
+    return people
+
+
+def parse_date(value):
+    """
+    Return the `datetime.date` of YYYY-MM-DD text.
+    """
+    match = DATE_PATTERN.fullmatch(_text(value).strip())
+    if not match:
+        raise ValueError(INVALID_DATE)
+    try:
+        return date(*map(int, match.groups()))
+    except ValueError:
+        raise ValueError(INVALID_DATE)
+
+
+def parse_time(value):
+    """
+    Return the `datetime.time` of HH:MM text.
+    """
+    match = TIME_PATTERN.fullmatch(_text(value).strip())
+    if not match:
+        raise ValueError(INVALID_TIME)
+    try:
+        return time(*map(int, match.groups()))
+    except ValueError:
+        raise ValueError(INVALID_TIME)
+
+
+def parse_duration(value):
+    """
+    Return the reservation length in hours, one of `DURATIONS`, as an integer or integer text.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(INVALID_DURATION)
+    try:
+        duration = int(value)
+    except ValueError:
+        raise ValueError(INVALID_DURATION)
+    if duration not in DURATIONS:
+        raise ValueError(INVALID_DURATION)
+    return duration
+
+
+RULES = (
+    ("name", parse_name, None),
+    ("email", parse_email, None),
+    ("num_people", parse_people, None),
+    ("date", parse_date, None),
+    ("time", parse_time, None),
+    ("duration", parse_duration, 1),
+)
+"""
+tuple: `(field, parse, default)` for every reservation field, in form order.
+       A field without a default is required. `parse` turns the submitted
+       value into the `Reservation` column value or raises `ValueError`
+       with the error message.
+"""
+
+FIELDS = tuple(field for field, _, _ in RULES)
+
+
+def validate_reservation(data):
+    """
+    Validate submitted reservation fields with the rules of the booking form.
+
+    The single validation core of every booking path: `ReservationForm`
+    runs it on the form's submitted text, and the JSON and bulk APIs run it
+    directly on decoded JSON, without building a form. The rules are
+    compiled once into `RULES`, and the values come out parsed, so callers
+    never parse the date or time again.
+
+    A field that is missing, null or blank takes its default, or is
+    reported as required. Then:
+
+    - `name`, `email`, `date` and `time` must be strings.
+    - `email` must be an address of the form `local@domain.tld`.
+    - `num_people` must be an integer from `MIN_PEOPLE` to `MAX_PEOPLE`.
+    - `date` must be YYYY-MM-DD and `time` HH:MM.
+    - `duration`, 1 if missing, must be one of `DURATIONS`.
+
+    Args:
+        data (dict): Field names mapped to submitted values: text, or
+            decoded JSON, where `num_people` and `duration` may also be
+            integers.
+
+    Returns:
+        tuple: `(values, errors)`. `values` maps every field to its parsed
+            value, or is None when `errors` maps field names to the error
+            message of each invalid field.
+    """
+    values = {}
+    errors = {}
+    for field, parse, default in RULES:
+        value = data.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            if default is None:
+                errors[field] = REQUIRED
+            else:
+                values[field] = default
+            continue
+        try:
+            values[field] = parse(value)
+        except ValueError as error:
+            errors[field] = str(error)
+    if errors:
+        return None, errors
+    return values, errors